@@ -1,5 +1,7 @@
 __version__ = "0.32.6"
 
+import os
+
 from ai_transform.timer import Timer
 
 _TIMER = Timer()
@@ -27,4 +29,7 @@ def add_config_paths(verbose: bool = False):
         print(f"paths: {sys.path}")
 
 
-add_config_paths()
+# Only workflows run from the EFS mount need their script folder on the path,
+# everywhere else importing ai_transform should not touch sys.path or the disk
+if "EFS_MOUNT_PATH" in os.environ:
+    add_config_paths()
@@ -1,57 +1,34 @@
 import os
 import time
 import uuid
-import logging
 import requests
 
 from requests.models import Response
 from functools import wraps
 
-from typing import Any, Dict, List, Optional, Literal, Callable
+from typing import Any, Dict, List, Optional, Literal, Callable, Tuple
 
-from ai_transform.logger import format_logging_info
+from ai_transform.logger import format_logging_info, summarize
 from ai_transform.utils import document
+from ai_transform.utils.codec import get_codec
 from ai_transform.types import Credentials, FieldTransformer, Filter, Schema
 from ai_transform.api.wrappers import request_wrapper
+from ai_transform.api.retry import get_retry_policy
+from ai_transform.api.session import get_session
+from ai_transform.api.compression import COMPRESS_REQUESTS, get_compressor
+from ai_transform.api.hedging import HEDGE_REQUESTS, get_hedger, get_timeout, is_hedgeable
+from ai_transform.api.payload import MAX_PAYLOAD_BYTES, TARGET_PAYLOAD_BYTES, join_payload, merge_results, split_payload
+from ai_transform.api.streaming import DocumentStream
+from ai_transform.api.cassette import RECORD_REQUESTS, record_requests
+from ai_transform.api.request_log import REQUEST_LOGGER
+
+# these used to be defined here
+from ai_transform.api.request_log import LOG_REQUESTS, log_request, log_response, to_curl
 
 from ai_transform import __version__
 from ai_transform.logger import ic
-
-
-LOG_REQUESTS = bool(os.getenv("LOG_REQUESTS"))
-if LOG_REQUESTS:
-    # Get the current Unix timestamp as a string
-    timestamp = str(int(time.time()))
-
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[logging.FileHandler(f"{timestamp}_request_logs.log")],
-    )
-
-
-def to_curl(request: requests.PreparedRequest):
-    command = "curl -X {method} '{url}'".format(method=request.method, url=request.url)
-
-    for header, value in request.headers.items():
-        if header.lower() == "authorization":
-            value = "MASKED"
-        command += " -H '{header}: {value}'".format(header=header, value=value)
-
-    if request.body:
-        command += " -d '{data}'".format(data=request.body)
-
-    return command
-
-
-def log_request(request: requests.PreparedRequest):
-    curl_command = to_curl(request)
-    logging.debug(curl_command)
-
-
-def log_response(response: requests.Response):
-    logging.debug("Response Headers: %s", response.headers)
-    logging.debug("Response Content: %s\n", response.text)
+from ai_transform.metrics import endpoint_name, record_request
+from ai_transform.tracing import span
 
 
 def get_response(response: requests.Response) -> Dict[str, Any]:
@@ -59,7 +36,7 @@ def get_response(response: requests.Response) -> Dict[str, Any]:
     # if errors - print what the response contains
     if response.status_code == 200:
         try:
-            return response.json()
+            return get_codec().decode(response.content)
         except Exception as e:
             ic(e)
             ic(format_logging_info({"x-trace-id": response.headers["x-trace-id"]}))
@@ -109,7 +86,14 @@ def retry(num_of_retries: int = 3, timeout: int = 30, retry_func: Callable = Non
 
 
 class API:
-    def __init__(self, credentials: Credentials, job_id: str = None, name: str = None) -> None:
+    def __init__(
+        self,
+        credentials: Credentials,
+        job_id: str = None,
+        name: str = None,
+        compress_requests: bool = None,
+        hedge_requests: bool = None,
+    ) -> None:
         self._credentials = credentials
         self._base_url = f"https://api-{self.credentials.region}.stack.tryrelevance.com/latest"
         self._headers = dict(
@@ -120,7 +104,18 @@ class API:
         if name is not None:
             self.headers.update(ai_transform_name=name)
 
-        self.session = requests.Session()
+        # shared with every other API for the same credentials and region
+        self.session = get_session(credentials)
+        if RECORD_REQUESTS:
+            record_requests(self, RECORD_REQUESTS)
+
+        if compress_requests is None:
+            compress_requests = COMPRESS_REQUESTS
+        self._compressor = get_compressor(self.base_url) if compress_requests else None
+
+        if hedge_requests is None:
+            hedge_requests = HEDGE_REQUESTS
+        self._hedger = get_hedger(self.base_url) if hedge_requests else None
 
     @property
     def credentials(self) -> Credentials:
@@ -134,26 +129,126 @@ class API:
     def headers(self) -> Dict[str, str]:
         return self._headers
 
-    @retry()
-    def _request(self, method: Literal["GET", "POST"], suffix: str, *args, **kwargs) -> Response:
-        request = requests.Request(method=method, url=self.base_url + suffix, headers=self.headers, *args, **kwargs)
+    def _send(
+        self,
+        method: Literal["GET", "POST"],
+        suffix: str,
+        *args,
+        stream: bool = False,
+        timeout: Optional[Tuple[float, float]] = None,
+        **kwargs,
+    ) -> Response:
+        request = requests.Request(method=method, url=self.base_url + suffix, *args, **kwargs)
         prepared_request = request.prepare()
 
-        if LOG_REQUESTS:
-            log_request(prepared_request)
+        if timeout is None:
+            timeout = get_timeout(suffix)
+        start = time.perf_counter()
+        try:
+            if self._hedger is not None and is_hedgeable(suffix):
+                response = self._hedger.call(
+                    suffix, self.session.send, prepared_request, stream=stream, timeout=timeout
+                )
+            else:
+                response = self.session.send(prepared_request, stream=stream, timeout=timeout)
+        except Exception as e:
+            REQUEST_LOGGER.log(prepared_request, error=e, seconds=time.perf_counter() - start)
+            raise
+
+        REQUEST_LOGGER.log(prepared_request, response, seconds=time.perf_counter() - start, stream=stream)
+        return response
 
-        response = self.session.send(prepared_request)
+    def _request(self, method: Literal["GET", "POST"], suffix: str, *args, **kwargs) -> Response:
+        attempts = 0
 
-        if LOG_REQUESTS:
-            log_response(response)
+        def attempt(*args, **kwargs) -> Response:
+            nonlocal attempts
+            attempts += 1
+            return self._attempt(*args, **kwargs)
 
+        request_bytes = len(kwargs.get("data") or b"")
+        start = time.perf_counter()
+        try:
+            with span(f"{method} {endpoint_name(suffix)}", cat="api", bytes=request_bytes):
+                response = get_retry_policy(self.base_url, suffix).call(attempt, method, suffix, *args, **kwargs)
+        except Exception as e:
+            record_request(method, suffix, type(e).__name__, time.perf_counter() - start, attempts, request_bytes, 0)
+            raise
+
+        if kwargs.get("stream"):
+            # don't read the body of a stream just to measure it
+            response_bytes = int(response.headers.get("Content-Length", 0))
+        else:
+            response_bytes = len(response.content)
+        seconds = time.perf_counter() - start
+        record_request(method, suffix, str(response.status_code), seconds, attempts, request_bytes, response_bytes)
+        return response
+
+    def _attempt(self, method: Literal["GET", "POST"], suffix: str, *args, **kwargs) -> Response:
+        headers = kwargs.pop("headers", self.headers)
+        if self._compressor is None:
+            return self._send(method, suffix, headers=headers, *args, **kwargs)
+
+        data = kwargs.pop("data", None)
+        compressed_data, encoding = self._compressor.compress(data)
+        if encoding is not None:
+            compressed_headers = {**headers, "Content-Encoding": encoding}
+            response = self._send(method, suffix, headers=compressed_headers, data=compressed_data, *args, **kwargs)
+        else:
+            response = self._send(method, suffix, headers=headers, data=data, *args, **kwargs)
+
+        if self._compressor.observe(response, encoding):
+            response = self._send(method, suffix, headers=headers, data=data, *args, **kwargs)
         return response
 
+    def _encode_body(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # Serialize the body once, up front, so that retries resend the same bytes
+        if kwargs.get("json") is not None:
+            with span("serialize", cat="api"):
+                kwargs["data"] = get_codec().encode(kwargs.pop("json"))
+            kwargs["headers"] = {**self.headers, "Content-Type": "application/json", **kwargs.get("headers", {})}
+        return kwargs
+
+    @staticmethod
+    def _document_payloads(
+        key: str, documents: List[document.Document], params: Dict[str, Any], target_payload_bytes: Optional[int] = None
+    ) -> List[bytes]:
+        # Encode every document once, then split them into as many bodies as
+        # it takes to keep each one around `target_payload_bytes`
+        codec = get_codec()
+        with span("serialize", cat="api", documents=len(documents)):
+            parts = [codec.encode(document) for document in documents]
+            encoded_params = codec.encode(params)
+        batches = split_payload(
+            parts,
+            target_bytes=TARGET_PAYLOAD_BYTES if target_payload_bytes is None else target_payload_bytes,
+            max_bytes=MAX_PAYLOAD_BYTES,
+            overhead=len(encoded_params) + len(key) + 6,
+            ids=[document.get("_id") for document in documents],
+        )
+        # an empty request is still sent for no documents, as before
+        return [join_payload(key, parts[start:end], encoded_params) for start, end in list(batches) or [(0, 0)]]
+
+    def _post_documents(
+        self,
+        suffix: str,
+        key: str,
+        documents: List[document.Document],
+        params: Dict[str, Any],
+        target_payload_bytes: Optional[int] = None,
+    ) -> Any:
+        headers = {**self.headers, "Content-Type": "application/json"}
+        results = []
+        for body in self._document_payloads(key, documents, params, target_payload_bytes):
+            response = self.post(suffix=suffix, data=body, headers=headers)
+            results.append(get_response(response))
+        return merge_results(results)
+
     def get(self, suffix: str, *args, **kwargs) -> Response:
-        return self._request(method="GET", suffix=suffix, *args, **kwargs)
+        return self._request(method="GET", suffix=suffix, *args, **self._encode_body(kwargs))
 
     def post(self, suffix: str, *args, **kwargs) -> Response:
-        return self._request(method="POST", suffix=suffix, *args, **kwargs)
+        return self._request(method="POST", suffix=suffix, *args, **self._encode_body(kwargs))
 
     def _list_datasets(self):
         response = self.get(suffix="/datasets/list")
@@ -186,11 +281,13 @@ class API:
         wait_for_update: bool = True,
         field_transformers: List[FieldTransformer] = None,
         ingest_in_background: bool = False,
+        target_payload_bytes: Optional[int] = None,
     ) -> Any:
-        response = self.post(
+        return self._post_documents(
             suffix=f"/datasets/{dataset_id}/documents/bulk_insert",
-            json=dict(
-                documents=documents,
+            key="documents",
+            documents=documents,
+            params=dict(
                 insert_date=insert_date,
                 overwrite=overwrite,
                 update_schema=update_schema,
@@ -198,8 +295,8 @@ class API:
                 ingest_in_background=ingest_in_background,
                 wait_for_update=wait_for_update,
             ),
+            target_payload_bytes=target_payload_bytes,
         )
-        return get_response(response)
 
     def _bulk_update(
         self,
@@ -208,17 +305,17 @@ class API:
         insert_date: bool = True,
         ingest_in_background: bool = True,
         update_schema: bool = True,
+        target_payload_bytes: Optional[int] = None,
     ) -> Any:
-        response = self.post(
+        return self._post_documents(
             suffix=f"/datasets/{dataset_id}/documents/bulk_update",
-            json=dict(
-                updates=documents,
-                insert_date=insert_date,
-                ingest_in_background=ingest_in_background,
-                update_schema=update_schema,
+            key="updates",
+            documents=documents,
+            params=dict(
+                insert_date=insert_date, ingest_in_background=ingest_in_background, update_schema=update_schema
             ),
+            target_payload_bytes=target_payload_bytes,
         )
-        return get_response(response)
 
     def _get_where(
         self,
@@ -232,6 +329,7 @@ class API:
         is_random: bool = False,
         after_id: Optional[List] = None,
         worker_number: int = 0,
+        stream: bool = False,
     ):
         response = self.post(
             suffix=f"/datasets/{dataset_id}/documents/get_where",
@@ -246,7 +344,13 @@ class API:
                 after_id=[] if after_id is None else after_id,
                 worker_number=worker_number,
             ),
+            stream=stream,
         )
+        if stream:
+            if response.status_code != 200:
+                get_response(response)
+                response.raise_for_status()
+            return DocumentStream(response)
         return get_response(response)
 
     def _delete_where(self, dataset_id: str, filters: Optional[List[Filter]] = None):
@@ -301,9 +405,8 @@ class API:
         )
         return get_response(response)
 
-    def _set_workflow_status(
-        self,
-        job_id: str,
+    @staticmethod
+    def _workflow_status_parameters(
         workflow_name: str,
         additional_information: str = "",
         metadata: Dict[str, Any] = None,
@@ -313,10 +416,7 @@ class API:
         output: Dict[str, Any] = None,
         email: Dict[str, Any] = None,
         user_errors: str = None,
-    ):
-        # add edge case for API
-        if job_id == "":
-            return
+    ) -> Dict[str, Any]:
         if status not in {"inprogress", "complete", "failed"}:
             raise ValueError("state should be one of `['inprogress', 'complete', 'failed']`")
         parameters = dict(
@@ -347,8 +447,37 @@ class API:
 
             parameters["email"] = email
 
-        ic(parameters)
+        if ic.enabled:
+            ic(summarize(parameters))
+        return parameters
 
+    def _set_workflow_status(
+        self,
+        job_id: str,
+        workflow_name: str,
+        additional_information: str = "",
+        metadata: Dict[str, Any] = None,
+        status: str = "inprogress",
+        send_email: bool = True,
+        worker_number: int = None,
+        output: Dict[str, Any] = None,
+        email: Dict[str, Any] = None,
+        user_errors: str = None,
+    ):
+        # add edge case for API
+        if job_id == "":
+            return
+        parameters = self._workflow_status_parameters(
+            workflow_name=workflow_name,
+            additional_information=additional_information,
+            metadata=metadata,
+            status=status,
+            send_email=send_email,
+            worker_number=worker_number,
+            output=output,
+            email=email,
+            user_errors=user_errors,
+        )
         response = self.post(suffix=f"/workflows/{job_id}/status", json=parameters)
         return get_response(response)
 
@@ -377,7 +506,8 @@ class API:
             category=fieldchildren_id,
             metadata={} if metadata is None else metadata,
         )
-        ic(params)
+        if ic.enabled:
+            ic(summarize(params))
         response = self.post(suffix=f"/datasets/{dataset_id}/field_children/{str(uuid.uuid4())}/update", json=params)
         return get_response(response)
 
@@ -448,7 +578,7 @@ class API:
             data["instance_type"] = instance_type
         if host_type is not None:
             data["host_type"] = host_type
-        return self.post(suffix=f"/workflows/trigger", json=data).json()
+        return get_codec().decode(self.post(suffix=f"/workflows/trigger", json=data).content)
 
     def _trigger_polling_workflow(
         self,
@@ -508,7 +638,8 @@ class API:
         params = dict(worker_number=worker_number, step=step, n_processed=n_processed, n_total=n_total)
 
         ic("adding progress...")
-        ic(params)
+        if ic.enabled:
+            ic(summarize(params))
 
         response = self.post(suffix=f"/workflows/{workflow_id}/progress", json=params)
         return get_response(response)
@@ -530,7 +661,8 @@ class API:
 
         params = dict(worker_number=worker_number, step=step, n_processed_pricing=n_processed_pricing)
         ic("adding progress...")
-        ic(params)
+        if ic.enabled:
+            ic(summarize(params))
         response = self.post(suffix=f"/workflows/{workflow_id}/progress", json=params)
         return get_response(response)
 
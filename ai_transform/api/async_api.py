@@ -0,0 +1,383 @@
+"""Asyncio API client
+
+`AsyncAPI` mirrors the endpoints engines and operators use most (get_where,
+bulk insert/update, centroids, workflow status and progress) over `httpx`, so
+hundreds of requests can be in flight from a single thread. Install it with
+`pip install ai_transform[async]`.
+
+```
+    from ai_transform.api.async_api import AsyncAPI
+
+    async with AsyncAPI(credentials, max_in_flight=200) as api:
+        pages = await asyncio.gather(*[api._get_schema(dataset_id) for dataset_id in dataset_ids])
+```
+
+Requests go through the same retry policies, timeouts, JSON codec, payload
+splitting and request compression as `API`.
+"""
+import time
+import asyncio
+import requests
+
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from ai_transform import __version__
+from ai_transform.api.api import API, get_response
+from ai_transform.api.compression import COMPRESS_REQUESTS, get_compressor
+from ai_transform.api.hedging import get_timeout
+from ai_transform.api.payload import merge_results
+from ai_transform.api.retry import get_retry_policy
+from ai_transform.metrics import record_request
+from ai_transform.types import Credentials, Filter, Schema
+from ai_transform.utils import document
+from ai_transform.utils.codec import get_codec
+
+
+class AsyncAPI:
+    def __init__(
+        self,
+        credentials: Credentials,
+        job_id: str = None,
+        name: str = None,
+        compress_requests: bool = None,
+        max_in_flight: int = 100,
+        transport: Any = None,
+    ) -> None:
+        import httpx
+
+        self._httpx = httpx
+        self._credentials = credentials
+        self._base_url = f"https://api-{self.credentials.region}.stack.tryrelevance.com/latest"
+        self._headers = dict(
+            Authorization=f"{self.credentials.project}:{self.credentials.api_key}", ai_transform_version=__version__
+        )
+        if job_id is not None:
+            self.headers.update(ai_transform_job_id=job_id)
+        if name is not None:
+            self.headers.update(ai_transform_name=name)
+
+        if compress_requests is None:
+            compress_requests = COMPRESS_REQUESTS
+        self._compressor = get_compressor(self.base_url) if compress_requests else None
+
+        # bounds both the connection pool and the requests waiting on it
+        self._max_in_flight = max_in_flight
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncAPI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    @property
+    def credentials(self) -> Credentials:
+        return self._credentials
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return self._headers
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # created lazily so that it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_in_flight)
+        return self._semaphore
+
+    async def _send(
+        self,
+        method: Literal["GET", "POST"],
+        suffix: str,
+        headers: Dict[str, str],
+        data: Optional[bytes] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+    ):
+        httpx = self._httpx
+        connect_timeout, read_timeout = get_timeout(suffix) if timeout is None else timeout
+        try:
+            async with self.semaphore:
+                return await self.client.request(
+                    method,
+                    self.base_url + suffix,
+                    headers=headers,
+                    content=data,
+                    params=params,
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                )
+        # raised as their requests equivalents so retries and engines handle both clients alike
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    async def _attempt(self, method: Literal["GET", "POST"], suffix: str, **kwargs):
+        headers = kwargs.pop("headers", self.headers)
+        if self._compressor is None:
+            return await self._send(method, suffix, headers=headers, **kwargs)
+
+        data = kwargs.pop("data", None)
+        compressed_data, encoding = self._compressor.compress(data)
+        if encoding is not None:
+            compressed_headers = {**headers, "Content-Encoding": encoding}
+            response = await self._send(method, suffix, headers=compressed_headers, data=compressed_data, **kwargs)
+        else:
+            response = await self._send(method, suffix, headers=headers, data=data, **kwargs)
+
+        if self._compressor.observe(response, encoding):
+            response = await self._send(method, suffix, headers=headers, data=data, **kwargs)
+        return response
+
+    async def _request(self, method: Literal["GET", "POST"], suffix: str, **kwargs):
+        attempts = 0
+
+        async def attempt(*args, **kwargs):
+            nonlocal attempts
+            attempts += 1
+            return await self._attempt(*args, **kwargs)
+
+        request_bytes = len(kwargs.get("data") or b"")
+        start = time.perf_counter()
+        try:
+            response = await get_retry_policy(self.base_url, suffix).call_async(attempt, method, suffix, **kwargs)
+        except Exception as e:
+            record_request(method, suffix, type(e).__name__, time.perf_counter() - start, attempts, request_bytes, 0)
+            raise
+
+        seconds = time.perf_counter() - start
+        record_request(
+            method, suffix, str(response.status_code), seconds, attempts, request_bytes, len(response.content)
+        )
+        return response
+
+    def _encode_body(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        if kwargs.get("json") is not None:
+            kwargs["data"] = get_codec().encode(kwargs.pop("json"))
+            kwargs["headers"] = {**self.headers, "Content-Type": "application/json", **kwargs.get("headers", {})}
+        else:
+            kwargs.pop("json", None)
+        return kwargs
+
+    async def get(self, suffix: str, **kwargs):
+        return await self._request(method="GET", suffix=suffix, **self._encode_body(kwargs))
+
+    async def post(self, suffix: str, **kwargs):
+        return await self._request(method="POST", suffix=suffix, **self._encode_body(kwargs))
+
+    async def _post_documents(
+        self,
+        suffix: str,
+        key: str,
+        documents: List[document.Document],
+        params: Dict[str, Any],
+        target_payload_bytes: Optional[int] = None,
+    ) -> Any:
+        headers = {**self.headers, "Content-Type": "application/json"}
+        bodies = API._document_payloads(key, documents, params, target_payload_bytes)
+        responses = await asyncio.gather(*[self.post(suffix=suffix, data=body, headers=headers) for body in bodies])
+        return merge_results([get_response(response) for response in responses])
+
+    async def _get_schema(self, dataset_id: str) -> Schema:
+        response = await self.get(suffix=f"/datasets/{dataset_id}/schema")
+        return get_response(response)
+
+    async def _get_health(self, dataset_id: str):
+        response = await self.get(suffix=f"/datasets/{dataset_id}/monitor/health")
+        return get_response(response)
+
+    async def _bulk_insert(
+        self,
+        dataset_id: str,
+        documents: List[document.Document],
+        insert_date: bool = True,
+        overwrite: bool = True,
+        update_schema: bool = True,
+        wait_for_update: bool = True,
+        field_transformers: List[Any] = None,
+        ingest_in_background: bool = False,
+        target_payload_bytes: Optional[int] = None,
+    ) -> Any:
+        return await self._post_documents(
+            suffix=f"/datasets/{dataset_id}/documents/bulk_insert",
+            key="documents",
+            documents=documents,
+            params=dict(
+                insert_date=insert_date,
+                overwrite=overwrite,
+                update_schema=update_schema,
+                field_transformers=[] if field_transformers is None else field_transformers,
+                ingest_in_background=ingest_in_background,
+                wait_for_update=wait_for_update,
+            ),
+            target_payload_bytes=target_payload_bytes,
+        )
+
+    async def _bulk_update(
+        self,
+        dataset_id: str,
+        documents: List[document.Document],
+        insert_date: bool = True,
+        ingest_in_background: bool = True,
+        update_schema: bool = True,
+        target_payload_bytes: Optional[int] = None,
+    ) -> Any:
+        return await self._post_documents(
+            suffix=f"/datasets/{dataset_id}/documents/bulk_update",
+            key="updates",
+            documents=documents,
+            params=dict(
+                insert_date=insert_date, ingest_in_background=ingest_in_background, update_schema=update_schema
+            ),
+            target_payload_bytes=target_payload_bytes,
+        )
+
+    async def _get_where(
+        self,
+        dataset_id: str,
+        page_size: int,
+        filters: Optional[List[Filter]] = None,
+        sort: Optional[list] = None,
+        select_fields: Optional[List[str]] = None,
+        include_vector: bool = True,
+        random_state: int = 0,
+        is_random: bool = False,
+        after_id: Optional[List] = None,
+        worker_number: int = 0,
+    ):
+        response = await self.post(
+            suffix=f"/datasets/{dataset_id}/documents/get_where",
+            json=dict(
+                select_fields=[] if select_fields is None else select_fields,
+                page_size=min(9999, page_size),
+                sort=[] if sort is None else sort,
+                include_vector=include_vector,
+                filters=[] if filters is None else filters,
+                random_state=random_state,
+                is_random=is_random,
+                after_id=[] if after_id is None else after_id,
+                worker_number=worker_number,
+            ),
+        )
+        return get_response(response)
+
+    async def _insert_centroids(
+        self, dataset_id: str, cluster_centers: List[document.Document], vector_fields: List[str], alias: str
+    ):
+        response = await self.post(
+            suffix=f"/datasets/{dataset_id}/cluster/centroids/insert",
+            json=dict(dataset_id=dataset_id, cluster_centers=cluster_centers, vector_fields=vector_fields, alias=alias),
+        )
+        return get_response(response)
+
+    async def _get_centroids(
+        self,
+        dataset_id: str,
+        vector_fields: List[str],
+        alias: str,
+        page_size: int = 5,
+        page: int = 1,
+        cluster_ids: Optional[List] = None,
+        include_vector: bool = False,
+    ):
+        response = await self.post(
+            suffix=f"/datasets/{dataset_id}/cluster/centroids/documents",
+            json=dict(
+                cluster_ids=[] if cluster_ids is None else cluster_ids,
+                vector_fields=vector_fields,
+                alias=alias,
+                page_size=min(9999, page_size),
+                page=page,
+                include_vector=include_vector,
+            ),
+        )
+        return get_response(response)
+
+    async def _list_closest_to_center(
+        self,
+        dataset_id: str,
+        vector_fields: List[str],
+        alias: str,
+        approx: int = 0,
+        sum_fields: bool = True,
+        page: int = 1,
+        similarity_metric: str = "cosine",
+        min_score: float = 0,
+        include_vector: bool = False,
+        include_count: bool = True,
+        include_relevance: bool = False,
+        page_size: int = 20,
+        cluster_properties_filter: Dict[str, Any] = None,
+        cluster_ids: List[str] = None,
+        filters: List[Filter] = None,
+        select_fields: List[str] = None,
+    ):
+        response = await self.post(
+            suffix=f"/datasets/{dataset_id}/cluster/centroids/list_closest_to_center",
+            json=dict(
+                vector_fields=vector_fields,
+                alias=alias,
+                approx=approx,
+                sum_fields=sum_fields,
+                page=page,
+                similarity_metric=similarity_metric,
+                min_score=min_score,
+                include_vector=include_vector,
+                include_count=include_count,
+                include_relevance=include_relevance,
+                page_size=min(9999, page_size),
+                cluster_properties_filter=cluster_properties_filter if cluster_properties_filter is not None else {},
+                filters=filters if filters is not None else [],
+                cluster_ids=cluster_ids if cluster_ids is not None else [],
+                select_fields=select_fields if select_fields is not None else [],
+            ),
+        )
+        return get_response(response)
+
+    async def _set_workflow_status(self, job_id: str, workflow_name: str, **kwargs):
+        """
+        Takes the same arguments as `API._set_workflow_status`.
+        """
+        # add edge case for API
+        if job_id == "":
+            return
+        parameters = API._workflow_status_parameters(workflow_name=workflow_name, **kwargs)
+        response = await self.post(suffix=f"/workflows/{job_id}/status", json=parameters)
+        return get_response(response)
+
+    async def _get_workflow_status(self, job_id: str):
+        response = await self.post(suffix=f"/workflows/{job_id}/get")
+        return get_response(response)
+
+    async def _update_workflow_progress(
+        self,
+        workflow_id: str,
+        worker_number: int = 0,
+        step: str = "Workflow",
+        n_processed: int = 0,
+        n_total: int = 0,
+        n_processed_pricing: Optional[int] = None,
+    ):
+        """
+        Tracks Workflow Progress
+        """
+        if worker_number is None:
+            worker_number = 0
+
+        params = dict(worker_number=worker_number, step=step, n_processed=n_processed, n_total=n_total)
+        if n_processed_pricing:
+            params["n_processed_pricing"] = n_processed_pricing
+
+        response = await self.post(suffix=f"/workflows/{workflow_id}/progress", json=params)
+        return get_response(response)
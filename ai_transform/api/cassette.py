@@ -0,0 +1,302 @@
+"""Recording and replaying API traffic
+
+`RecordingAdapter` wraps the session's transport and appends every request it
+sends to a cassette: one JSON line with the method, path, status, response
+body and how long the request took. Set `RECORD_REQUESTS` to a path to record
+every `API` in the process, or record one API at a time:
+
+```
+    from ai_transform.api.cassette import record_requests
+
+    record_requests(dataset.api, "slow_job.jsonl.gz")
+    StableEngine(dataset=dataset, operator=operator).apply()
+```
+
+`ReplayAdapter` answers requests from a cassette in-process, in the order they
+were recorded, after the recorded latency times `latency_scale`. Replaying a
+production cassette benchmarks an engine change against production traffic
+offline:
+
+```
+    from ai_transform.api.cassette import mount_replay
+
+    replay = mount_replay(dataset.api, "slow_job.jsonl.gz", latency_scale=0.5)
+    StableEngine(dataset=dataset, operator=operator).apply()
+    replay.misses  # requests the cassette had no response for
+```
+
+Cassettes are redacted: headers are limited to `RECORDED_HEADERS`, and any
+JSON key in `REDACTED_KEYS` is masked in request and response bodies. Request
+bodies are only kept as their size and hash unless `record_request_bodies`
+is set. Paths ending in `.gz` are gzipped.
+"""
+import os
+import gzip
+import time
+import base64
+import hashlib
+import threading
+import requests
+
+from collections import defaultdict, deque
+from typing import IO, TYPE_CHECKING, Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from requests.adapters import BaseAdapter
+
+from ai_transform.api.session import get_session
+from ai_transform.types import Credentials
+from ai_transform.utils.codec import get_codec
+
+if TYPE_CHECKING:
+    from ai_transform.api.api import API
+
+RECORD_REQUESTS = os.getenv("RECORD_REQUESTS")
+
+RECORDED_HEADERS = {"content-type", "content-encoding", "retry-after", "x-trace-id"}
+REDACTED_KEYS = {"authorization", "api_key", "apikey", "password", "secret", "token", "firebase_uid"}
+REDACTED = "REDACTED"
+
+
+def _redact(obj: Any, keys: Set[str]) -> Any:
+    if isinstance(obj, dict):
+        return {key: REDACTED if str(key).lower() in keys else _redact(value, keys) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_redact(value, keys) for value in obj]
+    return obj
+
+
+def _redact_body(body: bytes, keys: Set[str]) -> bytes:
+    codec = get_codec()
+    try:
+        return codec.encode(_redact(codec.decode(body), keys))
+    except Exception:
+        # not JSON, i.e. compressed or a media upload
+        return body
+
+
+def _dump_body(body: bytes) -> Dict[str, str]:
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_base64": base64.b64encode(body).decode()}
+
+
+def _load_body(interaction: Dict[str, Any]) -> bytes:
+    if "body_base64" in interaction:
+        return base64.b64decode(interaction["body_base64"])
+    return interaction.get("body", "").encode("utf-8")
+
+
+def _request_body(request: requests.PreparedRequest) -> bytes:
+    body = request.body or b""
+    return body.encode() if isinstance(body, str) else body
+
+
+def _path(url: str) -> str:
+    parsed = requests.utils.urlparse(url)
+    return parsed.path + (f"?{parsed.query}" if parsed.query else "")
+
+
+def _open(path: str, mode: str) -> IO[bytes]:
+    return gzip.open(path, mode) if str(path).endswith(".gz") else open(path, mode)
+
+
+class CassetteWriter:
+    """
+    Appends interactions to a cassette. Every line is flushed as it is
+    written so a job that crashes still leaves a usable cassette.
+    """
+
+    def __init__(
+        self, path: str, record_request_bodies: bool = False, redacted_keys: Optional[Set[str]] = None
+    ) -> None:
+        self.path = path
+        self.record_request_bodies = record_request_bodies
+        self.redacted_keys = REDACTED_KEYS if redacted_keys is None else {key.lower() for key in redacted_keys}
+        self._lock = threading.Lock()
+        self._file = _open(path, "wb")
+        self._start = time.perf_counter()
+
+    def write(
+        self, request: requests.PreparedRequest, response: requests.Response, started: float, elapsed: float
+    ) -> None:
+        body = _request_body(request)
+        interaction: Dict[str, Any] = {
+            "start": round(started - self._start, 6),
+            "elapsed": round(elapsed, 6),
+            "method": request.method,
+            "path": _path(request.url),
+            "request_bytes": len(body),
+            "request_sha1": hashlib.sha1(body).hexdigest(),
+            "status_code": response.status_code,
+            "headers": {key: value for key, value in response.headers.items() if key.lower() in RECORDED_HEADERS},
+            **_dump_body(_redact_body(response.content, self.redacted_keys)),
+        }
+        if self.record_request_bodies:
+            interaction["request_body"] = _dump_body(_redact_body(body, self.redacted_keys))
+
+        line = get_codec().encode(interaction) + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_WRITERS: Dict[str, CassetteWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def get_cassette_writer(path: str, **kwargs) -> CassetteWriter:
+    """
+    Every API recording to `path` shares one writer.
+    """
+    with _WRITERS_LOCK:
+        if path not in _WRITERS or _WRITERS[path].closed:
+            _WRITERS[path] = CassetteWriter(path, **kwargs)
+        return _WRITERS[path]
+
+
+def iter_cassette(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Streams a cassette without loading it whole, i.e. to summarise a long job.
+    """
+    codec = get_codec()
+    with _open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield codec.decode(line)
+
+
+def load_cassette(path: str) -> List[Dict[str, Any]]:
+    return list(iter_cassette(path))
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Sends requests through `adapter` and records them to `writer`.
+    """
+
+    def __init__(self, writer: CassetteWriter, adapter: BaseAdapter):
+        super().__init__()
+        self.writer = writer
+        self.adapter = adapter
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        started = time.perf_counter()
+        response = self.adapter.send(request, **kwargs)
+        # reads streamed bodies too, they are served from memory afterwards
+        response.content
+        self.writer.write(request, response, started, time.perf_counter() - started)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+def _base_url(credentials: Credentials) -> str:
+    return f"https://api-{credentials.region}.stack.tryrelevance.com"
+
+
+def record_requests(api: Union["API", Credentials], path: str, **kwargs) -> RecordingAdapter:
+    """
+    Records every request for these credentials to `path`, including those of
+    other APIs sharing the session. `kwargs` configure the `CassetteWriter`.
+    """
+    credentials = api if isinstance(api, Credentials) else api.credentials
+    session = get_session(credentials)
+    adapter = session.get_adapter(_base_url(credentials))
+    if isinstance(adapter, RecordingAdapter) and adapter.writer.path == path:
+        return adapter
+
+    recorder = RecordingAdapter(get_cassette_writer(path, **kwargs), adapter)
+    session.mount(_base_url(credentials), recorder)
+    return recorder
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves the responses of a cassette in the order they were recorded.
+
+    Requests are matched by method and path. When a path's recorded
+    responses run out its last one is repeated, i.e. for status polling.
+    A request the cassette never saw answers 404 and is counted in `misses`,
+    or raises a `KeyError` if `strict`.
+    """
+
+    def __init__(
+        self,
+        cassette: Union[str, List[Dict[str, Any]]],
+        latency_scale: float = 1.0,
+        strict: bool = False,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        super().__init__()
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+        interactions = load_cassette(cassette) if isinstance(cassette, str) else cassette
+        self._queues: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        for interaction in interactions:
+            self._queues[interaction["method"], interaction["path"]].append(interaction)
+        self._last: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        self.requests = 0
+        self.misses = 0
+
+    def _next(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self.requests += 1
+            queue = self._queues.get(key)
+            if queue:
+                self._last[key] = queue.popleft()
+            interaction = self._last.get(key)
+            if interaction is None:
+                self.misses += 1
+            return interaction
+
+    @property
+    def remaining(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        key = (request.method, _path(request.url))
+        interaction = self._next(key)
+        if interaction is None:
+            if self.strict:
+                raise KeyError(f"{key[0]} {key[1]} is not in the cassette")
+            message = {"message": f"{key[0]} {key[1]} is not in the cassette"}
+            interaction = {"status_code": 404, "body": get_codec().encode(message).decode()}
+
+        self._sleep(interaction.get("elapsed", 0.0) * self.latency_scale)
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = interaction["status_code"]
+        response.headers.update(interaction.get("headers", {}))
+        response._content = _load_body(interaction)
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        pass
+
+
+def mount_replay(api: Union["API", Credentials], cassette: Union[str, List[Dict[str, Any]]], **kwargs) -> ReplayAdapter:
+    """
+    Routes every request for these credentials to a cassette. `kwargs`
+    configure the `ReplayAdapter`.
+    """
+    credentials = api if isinstance(api, Credentials) else api.credentials
+    adapter = ReplayAdapter(cassette, **kwargs)
+    get_session(credentials).mount(_base_url(credentials), adapter)
+    return adapter
@@ -0,0 +1,542 @@
+"""In-process Relevance API emulator
+
+A `requests` transport adapter that answers the endpoints engines use from
+memory, so engines can be tested and benchmarked without `TEST_TOKEN` or a
+backend.
+
+```
+    from ai_transform.api.emulator import mount_emulator
+
+    dataset = Dataset(API(credentials), "test_dataset")
+    emulator = mount_emulator(dataset.api, latency=0.05, jitter=0.5)
+    dataset.insert_documents(mock_documents(1000))
+
+    StableEngine(dataset=dataset, operator=operator).apply()
+    emulator.requests  # number of requests served
+```
+
+Each request takes `latency` seconds plus the time to move its bytes at
+`bytes_per_second`, multiplied by a log-normal factor with sigma `jitter`
+for a realistic long tail. Endpoints that aren't emulated answer 404.
+"""
+import re
+import gzip
+import math
+import time
+import uuid
+import random
+import threading
+import requests
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from requests.adapters import BaseAdapter
+
+from ai_transform.api.api import API
+from ai_transform.api.session import get_session
+from ai_transform.types import Credentials
+from ai_transform.utils.codec import get_codec
+from ai_transform.utils.document import Document
+
+
+class EmulatorError(Exception):
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+def _is_vector(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and isinstance(value[0], (int, float))
+
+
+def _field_type(key: str, value: Any) -> Any:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "numeric"
+    if key.endswith("_vector_") and _is_vector(value):
+        return {"vector": len(value)}
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return "chunks"
+    return "text"
+
+
+def _schema(documents: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    schema = {}
+
+    def add(prefix: str, value: Any):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                add(f"{prefix}.{key}" if prefix else key, child)
+            return
+
+        schema.setdefault(prefix, _field_type(prefix, value))
+        if schema[prefix] == "chunks":
+            for chunk in value:
+                for key, child in chunk.items():
+                    add(f"{prefix}.{key}", child)
+
+    for document in documents.values():
+        add("", document)
+    schema.pop("_id", None)
+    return schema
+
+
+def _merge(document: Dict[str, Any], update: Dict[str, Any]) -> None:
+    for key, value in update.items():
+        if "." in key:
+            *parents, key = key.split(".")
+            target = document
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[key] = value
+        elif isinstance(value, dict) and isinstance(document.get(key), dict):
+            _merge(document[key], value)
+        else:
+            document[key] = value
+
+
+def _get(document: Dict[str, Any], field: str) -> Any:
+    value: Any = document
+    for key in field.split("."):
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return None
+    return value
+
+
+def _compare(value: Any, condition: str, condition_value: Any) -> bool:
+    if value is None:
+        return condition == "!="
+    try:
+        if condition == "==":
+            if isinstance(condition_value, list):
+                return value in condition_value
+            return value == condition_value
+        if condition == "!=":
+            return value != condition_value
+        if condition == "<":
+            return value < condition_value
+        if condition == "<=":
+            return value <= condition_value
+        if condition == ">":
+            return value > condition_value
+        if condition == ">=":
+            return value >= condition_value
+    except TypeError:
+        return False
+    raise EmulatorError(400, f"Unsupported filter condition {condition!r}")
+
+
+def _match_modulo(document: Dict[str, Any], field: str, modulo: int, value: int) -> bool:
+    # stable across processes, unlike `hash`
+    return sum(str(_get(document, field)).encode()) % modulo == value
+
+
+def _matches(document: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    if "matchModulo" in filter:
+        return _match_modulo(document, **filter["matchModulo"])
+
+    if "chunk" in filter:
+        path = filter["chunk"]["path"]
+        chunks = _get(document, path)
+        if not isinstance(chunks, list):
+            return False
+        for chunk_filter in filter["chunk"]["filters"]:
+            field = chunk_filter["fieldExists"]["field"]
+            if field == path:
+                if not chunks:
+                    return False
+                continue
+            subfield = field[len(path) + 1 :] if field.startswith(path + ".") else field
+            if not any(_get(chunk, subfield) is not None for chunk in chunks if isinstance(chunk, dict)):
+                return False
+        return True
+
+    filter_type = filter.get("filter_type")
+    if filter_type == "or":
+        # an empty "or" places no constraint
+        conditions = filter["condition_value"]
+        return not conditions or any(_matches(document, condition) for condition in conditions)
+
+    value = _get(document, filter["field"])
+    condition = filter.get("condition", "==")
+    if filter_type == "exists":
+        exists = value is not None
+        return exists if condition == "==" else not exists
+    if filter_type == "contains":
+        return isinstance(value, str) and str(filter["condition_value"]) in value
+    if filter_type in {"ids", "exact_match", "numeric", "date", "text"}:
+        return _compare(value, condition, filter["condition_value"])
+    raise EmulatorError(400, f"Unsupported filter {filter!r}")
+
+
+def _select(document: Dict[str, Any], select_fields: List[str], include_vector: bool) -> Dict[str, Any]:
+    if select_fields:
+        selected = Document({"_id": document["_id"]})
+        for field in select_fields:
+            value = _get(document, field)
+            if value is not None:
+                selected[field] = value
+        document = dict(selected)
+    else:
+        document = dict(document)
+
+    if not include_vector:
+        document = {key: value for key, value in document.items() if not key.endswith("_vector_")}
+    return document
+
+
+class EmulatedDataset:
+    def __init__(self, schema: Optional[Dict[str, Any]] = None):
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.metadata: Dict[str, Any] = {}
+        self.settings: Dict[str, Any] = {}
+        self.field_children: Dict[str, Dict[str, Any]] = {}
+        self.centroids: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        self.fixed_schema = {} if schema is None else dict(schema)
+        self._schema: Optional[Dict[str, Any]] = None
+
+    @property
+    def schema(self) -> Dict[str, Any]:
+        # inferred from the documents, and only again once they have changed
+        if self._schema is None:
+            self._schema = _schema(self.documents)
+        return {**self._schema, **self.fixed_schema}
+
+    def changed(self) -> None:
+        self._schema = None
+
+    def filter(self, filters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [document for document in self.documents.values() if all(_matches(document, f) for f in filters)]
+
+
+Route = Tuple[str, "re.Pattern", Callable[..., Any]]
+
+
+class EmulatorAdapter(BaseAdapter):
+    """
+    Serves the Relevance API from memory. `datasets` holds every dataset by id.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        bytes_per_second: Optional[float] = None,
+        seed: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.bytes_per_second = bytes_per_second
+        self._random = random.Random(seed)
+        self._sleep = sleep
+        self._lock = threading.RLock()
+
+        self.datasets: Dict[str, EmulatedDataset] = {}
+        self.workflows: Dict[str, Dict[str, Any]] = {}
+        self.requests = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+        self._routes: List[Route] = [
+            ("GET", "/datasets/list", self._list_datasets),
+            ("POST", "/datasets/create", self._create_dataset),
+            ("POST", "/datasets/{dataset_id}/delete", self._delete_dataset),
+            ("GET", "/datasets/{dataset_id}/schema", self._get_schema),
+            ("GET", "/datasets/{dataset_id}/monitor/health", self._get_health),
+            ("POST", "/datasets/{dataset_id}/documents/get_where", self._get_where),
+            ("POST", "/datasets/{dataset_id}/documents/bulk_insert", self._bulk_insert),
+            ("POST", "/datasets/{dataset_id}/documents/bulk_update", self._bulk_update),
+            ("POST", "/datasets/{dataset_id}/documents/delete_where", self._delete_where),
+            ("GET", "/datasets/{dataset_id}/metadata", self._get_metadata),
+            ("POST", "/datasets/{dataset_id}/metadata", self._update_metadata),
+            ("GET", "/datasets/{dataset_id}/settings", self._get_settings),
+            ("POST", "/datasets/{dataset_id}/settings", self._update_settings),
+            ("POST", "/datasets/{dataset_id}/field_children/list", self._list_field_children),
+            ("POST", "/datasets/{dataset_id}/field_children/{fieldchildren_id}/update", self._set_field_children),
+            ("POST", "/datasets/{dataset_id}/field_children/{fieldchildren_id}/delete", self._delete_field_children),
+            ("POST", "/datasets/{dataset_id}/cluster/centroids/insert", self._insert_centroids),
+            ("POST", "/datasets/{dataset_id}/cluster/centroids/documents", self._get_centroids),
+            ("POST", "/datasets/{dataset_id}/cluster/centroids/list_closest_to_center", self._list_closest_to_center),
+            ("POST", "/workflows/{job_id}/status", self._set_workflow_status),
+            ("POST", "/workflows/{job_id}/progress", self._update_workflow_progress),
+            ("POST", "/workflows/{job_id}/get", self._get_workflow_status),
+            ("POST", "/workflows/{job_id}/metadata", self._update_workflow_metadata),
+        ]
+        self._routes = [
+            (method, re.compile("/latest" + re.sub(r"{(\w+)}", r"(?P<\1>[^/]+)", path) + "$"), handler)
+            for method, path, handler in self._routes
+        ]
+
+    def _dataset(self, dataset_id: str) -> EmulatedDataset:
+        if dataset_id not in self.datasets:
+            raise EmulatorError(404, f"Dataset {dataset_id} not found")
+        return self.datasets[dataset_id]
+
+    def add_dataset(self, dataset_id: str, documents: Optional[List[Dict[str, Any]]] = None) -> EmulatedDataset:
+        """
+        Creates a dataset directly, i.e. to seed a benchmark without paying for the requests.
+        """
+        with self._lock:
+            dataset = self.datasets.setdefault(dataset_id, EmulatedDataset())
+            for document in documents or []:
+                document = get_codec().decode(get_codec().encode(document))
+                dataset.documents[str(document.setdefault("_id", str(uuid.uuid4())))] = document
+            dataset.changed()
+            return dataset
+
+    def _delay(self, size: int) -> float:
+        delay = self.latency
+        if self.bytes_per_second:
+            delay += size / self.bytes_per_second
+        if self.jitter:
+            delay *= self._random.lognormvariate(0.0, self.jitter) / math.exp(self.jitter**2 / 2)
+        return delay
+
+    @staticmethod
+    def _decode_body(request: requests.PreparedRequest) -> Any:
+        body = request.body
+        if not body:
+            return {}
+        if isinstance(body, str):
+            body = body.encode()
+        encoding = request.headers.get("Content-Encoding")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "zstd":
+            import zstandard
+
+            body = zstandard.ZstdDecompressor().decompress(body)
+        return get_codec().decode(body)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        path = requests.utils.urlparse(request.url).path
+        status_code, result = 404, {"message": f"{request.method} {path} is not emulated"}
+        for method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if match and method == request.method:
+                try:
+                    with self._lock:
+                        result = handler(self._decode_body(request), **match.groupdict())
+                    status_code = 200
+                except EmulatorError as e:
+                    status_code, result = e.status_code, {"message": str(e)}
+                break
+
+        content = get_codec().encode(result)
+        received = len(request.body or b"")
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += received
+            self.bytes_sent += len(content)
+
+        self._sleep(self._delay(received + len(content)))
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = status_code
+        response.headers["Content-Type"] = "application/json"
+        response.headers["x-trace-id"] = str(uuid.uuid4())
+        response._content = content
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        pass
+
+    def _list_datasets(self, body: Dict[str, Any]):
+        return {"datasets": [{"dataset_id": dataset_id} for dataset_id in self.datasets]}
+
+    def _create_dataset(self, body: Dict[str, Any]):
+        dataset_id = body["id"]
+        if dataset_id in self.datasets and not body.get("upsert", True):
+            raise EmulatorError(400, f"Dataset {dataset_id} already exists")
+        dataset = self.datasets.setdefault(dataset_id, EmulatedDataset())
+        dataset.fixed_schema.update(body.get("schema") or {})
+        return {"dataset_id": dataset_id}
+
+    def _delete_dataset(self, body: Dict[str, Any], dataset_id: str):
+        self.datasets.pop(dataset_id, None)
+        return {}
+
+    def _get_schema(self, body: Dict[str, Any], dataset_id: str):
+        return self._dataset(dataset_id).schema
+
+    def _get_health(self, body: Dict[str, Any], dataset_id: str):
+        dataset = self._dataset(dataset_id)
+        return {
+            field: {"exists": sum(_get(document, field) is not None for document in dataset.documents.values())}
+            for field in dataset.schema
+        }
+
+    def _get_where(self, body: Dict[str, Any], dataset_id: str):
+        dataset = self._dataset(dataset_id)
+        documents = dataset.filter(body.get("filters") or [])
+        count = len(documents)
+
+        if body.get("is_random"):
+            random.Random(body.get("random_state", 0)).shuffle(documents)
+        else:
+            # after_id pages through the documents in _id order
+            documents.sort(key=lambda document: str(document["_id"]))
+            after_id = body.get("after_id") or []
+            if after_id:
+                documents = [document for document in documents if str(document["_id"]) > str(after_id[0])]
+
+        page = documents[: body.get("page_size", 20)]
+        select_fields = body.get("select_fields") or []
+        include_vector = body.get("include_vector", True)
+        return {
+            "documents": [_select(document, select_fields, include_vector) for document in page],
+            "after_id": [page[-1]["_id"]] if page else body.get("after_id") or [],
+            "count": count,
+        }
+
+    def _bulk_insert(self, body: Dict[str, Any], dataset_id: str):
+        dataset = self.datasets.setdefault(dataset_id, EmulatedDataset())
+        insert_date = datetime.utcnow().isoformat() if body.get("insert_date", True) else None
+        for document in body.get("documents", []):
+            _id = str(document.setdefault("_id", str(uuid.uuid4())))
+            if insert_date is not None:
+                document["insert_date_"] = insert_date
+            if body.get("overwrite", True) or _id not in dataset.documents:
+                dataset.documents[_id] = document
+        dataset.changed()
+        return {"inserted": len(body.get("documents", [])), "failed_documents": [], "failed_documents_detailed": []}
+
+    def _bulk_update(self, body: Dict[str, Any], dataset_id: str):
+        dataset = self._dataset(dataset_id)
+        inserted = 0
+        failed_documents = []
+        for update in body.get("updates", []):
+            document = dataset.documents.get(str(update.get("_id")))
+            if document is None:
+                failed_documents.append(update.get("_id"))
+                continue
+            _merge(document, update)
+            inserted += 1
+        dataset.changed()
+        return {"inserted": inserted, "failed_documents": failed_documents, "failed_documents_detailed": []}
+
+    def _delete_where(self, body: Dict[str, Any], dataset_id: str):
+        dataset = self._dataset(dataset_id)
+        for document in dataset.filter(body.get("filters") or []):
+            dataset.documents.pop(str(document["_id"]))
+        dataset.changed()
+        return {}
+
+    def _get_metadata(self, body: Dict[str, Any], dataset_id: str):
+        return {"results": self._dataset(dataset_id).metadata}
+
+    def _update_metadata(self, body: Dict[str, Any], dataset_id: str):
+        self._dataset(dataset_id).metadata = body.get("metadata", {})
+        return {}
+
+    def _get_settings(self, body: Dict[str, Any], dataset_id: str):
+        return self._dataset(dataset_id).settings
+
+    def _update_settings(self, body: Dict[str, Any], dataset_id: str):
+        self._dataset(dataset_id).settings.update(body.get("settings", {}))
+        return {}
+
+    def _list_field_children(self, body: Dict[str, Any], dataset_id: str):
+        results = list(self._dataset(dataset_id).field_children.values())
+        return {"results": results, "count": len(results)}
+
+    def _set_field_children(self, body: Dict[str, Any], dataset_id: str, fieldchildren_id: str):
+        self._dataset(dataset_id).field_children[fieldchildren_id] = {"_id": fieldchildren_id, **body}
+        return {}
+
+    def _delete_field_children(self, body: Dict[str, Any], dataset_id: str, fieldchildren_id: str):
+        self._dataset(dataset_id).field_children.pop(fieldchildren_id, None)
+        return {}
+
+    @staticmethod
+    def _centroid_key(body: Dict[str, Any]) -> Tuple[str, str]:
+        return body["vector_fields"][0], body["alias"]
+
+    def _insert_centroids(self, body: Dict[str, Any], dataset_id: str):
+        centroids = self._dataset(dataset_id).centroids.setdefault(self._centroid_key(body), {})
+        for centroid in body["cluster_centers"]:
+            centroids[str(centroid["_id"])] = centroid
+        return {}
+
+    def _get_centroids(self, body: Dict[str, Any], dataset_id: str):
+        centroids = list(self._dataset(dataset_id).centroids.get(self._centroid_key(body), {}).values())
+        if body.get("cluster_ids"):
+            centroids = [centroid for centroid in centroids if centroid["_id"] in body["cluster_ids"]]
+        if not body.get("include_vector", False):
+            vector_field = body["vector_fields"][0]
+            centroids = [{key: value for key, value in c.items() if key != vector_field} for c in centroids]
+
+        page_size = body.get("page_size", 5)
+        start = (body.get("page", 1) - 1) * page_size
+        return {"results": centroids[start : start + page_size]}
+
+    def _list_closest_to_center(self, body: Dict[str, Any], dataset_id: str):
+        import numpy as np
+
+        dataset = self._dataset(dataset_id)
+        vector_field, alias = self._centroid_key(body)
+        cluster_field = f"_cluster_.{vector_field}.{alias}"
+        documents = dataset.filter(body.get("filters") or [])
+
+        results = {}
+        for _id, centroid in dataset.centroids.get((vector_field, alias), {}).items():
+            if body.get("cluster_ids") and _id not in body["cluster_ids"]:
+                continue
+            members = [document for document in documents if _get(document, cluster_field) == _id]
+            members = [document for document in members if _get(document, vector_field) is not None]
+            if members:
+                center = np.asarray(centroid[vector_field], dtype=np.float64)
+                vectors = np.asarray([_get(document, vector_field) for document in members], dtype=np.float64)
+                norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(center)
+                scores = vectors @ center / np.where(norms == 0, 1, norms)
+                members = [members[index] for index in np.argsort(-scores)]
+
+            page_size = body.get("page_size", 20)
+            start = (body.get("page", 1) - 1) * page_size
+            page = members[start : start + page_size]
+            select_fields = body.get("select_fields") or []
+            include_vector = body.get("include_vector", False)
+            results[_id] = {"results": [_select(document, select_fields, include_vector) for document in page]}
+        return {"results": results}
+
+    def _set_workflow_status(self, body: Dict[str, Any], job_id: str):
+        self.workflows.setdefault(job_id, {}).update(body)
+        return {}
+
+    def _update_workflow_progress(self, body: Dict[str, Any], job_id: str):
+        self.workflows.setdefault(job_id, {}).setdefault("progress", []).append(body)
+        return {}
+
+    def _get_workflow_status(self, body: Dict[str, Any], job_id: str):
+        if job_id not in self.workflows:
+            raise EmulatorError(404, f"Workflow {job_id} not found")
+        return self.workflows[job_id]
+
+    def _update_workflow_metadata(self, body: Dict[str, Any], job_id: str):
+        self.workflows.setdefault(job_id, {}).setdefault("metadata", {}).update(body.get("metadata", {}))
+        return {}
+
+
+def mount_emulator(
+    api: Union[API, Credentials], adapter: Optional[EmulatorAdapter] = None, **kwargs
+) -> EmulatorAdapter:
+    """
+    Routes every request for these credentials to an emulator, including those
+    of other APIs sharing the session. `kwargs` configure a new adapter.
+    """
+    credentials = api.credentials if isinstance(api, API) else api
+    if adapter is None:
+        adapter = EmulatorAdapter(**kwargs)
+    get_session(credentials).mount(f"https://api-{credentials.region}.stack.tryrelevance.com", adapter)
+    return adapter
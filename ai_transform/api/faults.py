@@ -0,0 +1,225 @@
+"""Fault injection for the API transport
+
+`FaultInjectionAdapter` wraps a session's transport (a real backend, the
+emulator or a replayed cassette) and, at set rates per endpoint, injects
+latency, 429/502/503 responses, truncated or non-JSON bodies, connection
+resets and hung sockets. Use it to measure how engines, retries and
+throttling hold up under realistic failures without a live backend.
+
+```
+    from ai_transform.api.emulator import mount_emulator
+    from ai_transform.api.faults import Faults, inject_faults
+
+    mount_emulator(dataset.api)
+    faults = inject_faults(
+        dataset.api,
+        {
+            "/bulk_update$": Faults(statuses={503: 0.05, 429: 0.05}, retry_after=1.0),
+            "/get_where$": Faults(latency=0.2, jitter=0.5, truncate=0.01),
+            ".*": Faults(reset=0.01),
+        },
+        seed=0,
+    )
+    StableEngine(dataset=dataset, operator=operator).apply()
+    faults.injected  # i.e. {"status_503": 12, "reset": 3, ...}
+```
+
+Endpoints are matched by searching their path (after `/latest`) with each
+pattern in order, the first match applies.
+"""
+import re
+import math
+import time
+import random
+import threading
+import requests
+
+from collections import Counter
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
+
+from requests.adapters import BaseAdapter
+
+from ai_transform.api.session import get_session
+from ai_transform.types import Credentials
+from ai_transform.utils.codec import get_codec
+
+if TYPE_CHECKING:
+    from ai_transform.api.api import API
+
+NON_JSON_BODY = b"<html><body><h1>502 Bad Gateway</h1></body></html>"
+
+
+class Faults:
+    """
+    What to inject into the requests of one endpoint. Every rate is the
+    probability, per request, of that fault.
+
+    Parameters
+    ------------
+
+    latency: float
+        Seconds added to every request
+    jitter: float
+        Sigma of a log-normal factor on `latency`, for a long tail
+    statuses: Dict[int, float]
+        Rates of responding with a status code instead of sending the request
+    retry_after: float
+        The `Retry-After` header sent with injected 429 and 503 responses
+    reset: float
+        Rate of raising a connection reset instead of sending the request
+    hang: float
+        Rate of the socket hanging until the request's read timeout, or
+        `hang_seconds` if the request has none, then raising a read timeout
+    truncate: float
+        Rate of cutting a successful response's body in half
+    non_json: float
+        Rate of replacing a successful response's body with an HTML error page
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        statuses: Optional[Dict[int, float]] = None,
+        retry_after: Optional[float] = None,
+        reset: float = 0.0,
+        hang: float = 0.0,
+        hang_seconds: float = 60.0,
+        truncate: float = 0.0,
+        non_json: float = 0.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.statuses = {} if statuses is None else statuses
+        self.retry_after = retry_after
+        self.reset = reset
+        self.hang = hang
+        self.hang_seconds = hang_seconds
+        self.truncate = truncate
+        self.non_json = non_json
+
+
+def _read_timeout(timeout) -> Optional[float]:
+    if isinstance(timeout, tuple):
+        return timeout[1]
+    return timeout
+
+
+class FaultInjectionAdapter(BaseAdapter):
+    """
+    Sends requests through `adapter`, injecting `faults` on the way.
+    `injected` counts every fault by kind.
+    """
+
+    def __init__(
+        self,
+        adapter: BaseAdapter,
+        faults: Union[Faults, Dict[str, Faults]],
+        seed: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        super().__init__()
+        self.adapter = adapter
+        if isinstance(faults, Faults):
+            faults = {".*": faults}
+        self._faults: List[Tuple["re.Pattern", Faults]] = [
+            (re.compile(pattern), endpoint_faults) for pattern, endpoint_faults in faults.items()
+        ]
+        self._random = random.Random(seed)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.injected: Counter = Counter()
+
+    def _match(self, request: requests.PreparedRequest) -> Optional[Faults]:
+        path = requests.utils.urlparse(request.url).path
+        if path.startswith("/latest"):
+            path = path[len("/latest") :]
+        for pattern, faults in self._faults:
+            if pattern.search(path):
+                return faults
+        return None
+
+    def _roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def _count(self, kind: str) -> None:
+        with self._lock:
+            self.injected[kind] += 1
+
+    def _latency(self, faults: Faults) -> float:
+        delay = faults.latency
+        if delay and faults.jitter:
+            with self._lock:
+                factor = self._random.lognormvariate(0.0, faults.jitter)
+            delay *= factor / math.exp(faults.jitter**2 / 2)
+        return delay
+
+    def _status_response(self, request: requests.PreparedRequest, status_code: int, faults: Faults):
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = status_code
+        response.headers["Content-Type"] = "application/json"
+        if faults.retry_after is not None and status_code in (429, 503):
+            response.headers["Retry-After"] = str(faults.retry_after)
+        response._content = get_codec().encode({"message": f"Injected {status_code}"})
+        response._content_consumed = True
+        return response
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        with self._lock:
+            self.requests += 1
+        faults = self._match(request)
+        if faults is None:
+            return self.adapter.send(request, **kwargs)
+
+        latency = self._latency(faults)
+        if latency:
+            self._sleep(latency)
+
+        if self._roll(faults.reset):
+            self._count("reset")
+            raise requests.ConnectionError(ConnectionResetError(104, "Connection reset by peer (injected)"))
+        if self._roll(faults.hang):
+            self._count("hang")
+            timeout = _read_timeout(kwargs.get("timeout"))
+            self._sleep(faults.hang_seconds if timeout is None else timeout)
+            raise requests.ReadTimeout("Read timed out (injected)")
+        for status_code, rate in faults.statuses.items():
+            if self._roll(rate):
+                self._count(f"status_{status_code}")
+                return self._status_response(request, status_code, faults)
+
+        response = self.adapter.send(request, **kwargs)
+        if response.status_code == 200:
+            if self._roll(faults.truncate):
+                self._count("truncate")
+                response._content = response.content[: len(response.content) // 2]
+            elif self._roll(faults.non_json):
+                self._count("non_json")
+                response._content = NON_JSON_BODY
+                response.headers["Content-Type"] = "text/html"
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+def inject_faults(
+    api: Union["API", Credentials], faults: Union[Faults, Dict[str, Faults]], **kwargs
+) -> FaultInjectionAdapter:
+    """
+    Injects faults into every request for these credentials, on top of
+    whichever transport is mounted. `kwargs` configure the adapter.
+    """
+    credentials = api if isinstance(api, Credentials) else api.credentials
+    base_url = f"https://api-{credentials.region}.stack.tryrelevance.com"
+    session = get_session(credentials)
+    adapter = FaultInjectionAdapter(session.get_adapter(base_url), faults, **kwargs)
+    session.mount(base_url, adapter)
+    return adapter
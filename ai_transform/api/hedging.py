@@ -0,0 +1,173 @@
+"""Request timeouts and hedged reads
+
+Every request is sent with a `(connect, read)` timeout for its class of
+endpoint (see `ai_transform.api.retry.endpoint_class`), so a hung connection
+raises `requests.Timeout` and gets retried instead of stalling an engine.
+
+Idempotent reads (get_where, schema and centroid lookups) can also be hedged,
+enabled with `API(..., hedge_requests=True)` or by setting
+`AI_TRANSFORM_HEDGE_REQUESTS=1`. If a read hasn't returned by the p95 latency
+seen for its endpoint, a duplicate is sent and whichever answers first wins.
+At most `HEDGE_FRACTION` of reads are ever duplicated.
+
+```
+    from ai_transform.api.hedging import TIMEOUTS
+
+    # connect and read timeouts in seconds
+    TIMEOUTS["read"] = (5.0, 30.0)
+```
+"""
+import os
+import time
+import threading
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from requests.models import Response
+
+from ai_transform.api.retry import endpoint_class
+from ai_transform.logger import ic
+
+
+CONNECT_TIMEOUT = float(os.getenv("AI_TRANSFORM_CONNECT_TIMEOUT", 10.0))
+
+TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "read": (CONNECT_TIMEOUT, 60.0),
+    # the backend can take a while to index a large bulk_update
+    "write": (CONNECT_TIMEOUT, 300.0),
+    "status": (CONNECT_TIMEOUT, 30.0),
+    "default": (CONNECT_TIMEOUT, 120.0),
+}
+
+HEDGE_REQUESTS = bool(os.getenv("AI_TRANSFORM_HEDGE_REQUESTS"))
+HEDGE_FRACTION = float(os.getenv("AI_TRANSFORM_HEDGE_FRACTION", 0.05))
+HEDGE_PERCENTILE = 95
+# latencies needed before an endpoint's percentile is trusted
+HEDGE_MIN_SAMPLES = 20
+
+HEDGED_ENDPOINTS = ("/get_where", "/schema", "/centroids/documents", "/centroids/list_closest_to_center")
+
+
+def get_timeout(suffix: str) -> Tuple[float, float]:
+    return TIMEOUTS[endpoint_class(suffix)]
+
+
+def is_hedgeable(suffix: str) -> bool:
+    return suffix.endswith(HEDGED_ENDPOINTS)
+
+
+class LatencyTracker:
+    """
+    Keeps the most recent latencies of an endpoint.
+    """
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def percentile(self, percentile: float) -> float:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        return latencies[index]
+
+
+def _close(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class Hedger:
+    """
+    Sends a duplicate of slow reads for a single server.
+    """
+
+    def __init__(
+        self,
+        max_fraction: float = HEDGE_FRACTION,
+        percentile: float = HEDGE_PERCENTILE,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        max_workers: int = 32,
+    ):
+        self.max_fraction = max_fraction
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai_transform_hedge")
+        self.requests = 0
+        self.hedged = 0
+
+    def _tracker(self, suffix: str) -> LatencyTracker:
+        # i.e. "get_where", so that every dataset shares its latencies
+        name = suffix.rsplit("/", 1)[-1]
+        with self._lock:
+            if name not in self._trackers:
+                self._trackers[name] = LatencyTracker()
+            return self._trackers[name]
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.max_fraction * self.requests:
+                return False
+            self.hedged += 1
+            return True
+
+    @staticmethod
+    def _timed(tracker: LatencyTracker, send: Callable[..., Response], *args, **kwargs) -> Response:
+        start = time.perf_counter()
+        response = send(*args, **kwargs)
+        tracker.record(time.perf_counter() - start)
+        return response
+
+    def call(self, suffix: str, send: Callable[..., Response], *args, **kwargs) -> Response:
+        """
+        Returns the first successful response of `send(*args, **kwargs)` and
+        of its duplicate, if one was sent.
+        """
+        tracker = self._tracker(suffix)
+        with self._lock:
+            self.requests += 1
+
+        if len(tracker) < self.min_samples:
+            return self._timed(tracker, send, *args, **kwargs)
+
+        delay = tracker.percentile(self.percentile)
+        primary = self._executor.submit(self._timed, tracker, send, *args, **kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget():
+            return primary.result()
+
+        ic(f"Hedging {suffix} after {delay:.3f}s")
+        futures = [primary, self._executor.submit(self._timed, tracker, send, *args, **kwargs)]
+        for future in as_completed(futures):
+            if future.exception() is None:
+                for other in futures:
+                    if other is not future:
+                        # release the slower response's connection once it arrives
+                        other.add_done_callback(_close)
+                return future.result()
+        return primary.result()
+
+
+_LOCK = threading.Lock()
+_HEDGERS: Dict[str, Hedger] = {}
+
+
+def get_hedger(base_url: str) -> Hedger:
+    """
+    Returns the hedger shared by every API talking to `base_url`.
+    """
+    with _LOCK:
+        if base_url not in _HEDGERS:
+            _HEDGERS[base_url] = Hedger()
+        return _HEDGERS[base_url]
@@ -0,0 +1,92 @@
+"""Byte-size-aware bulk payloads
+
+Splits bulk_insert and bulk_update requests by encoded size rather than by
+document count, so large vector documents don't produce bodies over the
+gateway limit and small ones aren't sent in many tiny requests.
+
+Each document is encoded once. Batches are filled up to
+`TARGET_PAYLOAD_BYTES` and a single document over `MAX_PAYLOAD_BYTES` raises
+`PayloadTooLargeError` before anything is sent.
+
+```
+    from ai_transform.api.payload import split_payload
+
+    for start, end in split_payload(encoded_documents, target_bytes=4 * 1024 * 1024):
+        ...
+```
+"""
+import os
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ai_transform.errors import PayloadTooLargeError
+
+
+TARGET_PAYLOAD_BYTES = int(os.getenv("AI_TRANSFORM_TARGET_PAYLOAD_BYTES", 4 * 1024 * 1024))
+# API gateways reject bodies over 10 MB
+MAX_PAYLOAD_BYTES = int(os.getenv("AI_TRANSFORM_MAX_PAYLOAD_BYTES", 9 * 1024 * 1024))
+
+
+def split_payload(
+    parts: Sequence[bytes],
+    target_bytes: int = TARGET_PAYLOAD_BYTES,
+    max_bytes: int = MAX_PAYLOAD_BYTES,
+    overhead: int = 0,
+    ids: Optional[Sequence[Any]] = None,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Yields `(start, end)` ranges of `parts` whose joined size, plus `overhead`
+    bytes for the rest of the body, stays under `target_bytes`. A part that is
+    too big to batch with others is sent on its own, as long as it fits in `max_bytes`.
+    """
+    for index, part in enumerate(parts):
+        if len(part) + overhead > max_bytes:
+            _id = None if ids is None else ids[index]
+            raise PayloadTooLargeError(
+                f"Document {_id!r} is {len(part)} bytes when encoded, over the {max_bytes} byte request limit"
+            )
+
+    start = 0
+    size = overhead
+    for index, part in enumerate(parts):
+        # +1 for the comma between documents
+        if index > start and size + len(part) + 1 > target_bytes:
+            yield start, index
+            start = index
+            size = overhead
+        size += len(part) + 1
+    if start < len(parts):
+        yield start, len(parts)
+
+
+def join_payload(key: str, parts: Sequence[bytes], params: bytes) -> bytes:
+    """
+    Builds `{key: [*parts], **params}` from already encoded parts and params.
+    """
+    documents = b'{"' + key.encode() + b'":[' + b",".join(parts) + b"]"
+    if params == b"{}":
+        return documents + b"}"
+    return documents + b"," + params[1:]
+
+
+def merge_results(results: List[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    Combines the responses of a split request, i.e. summing `inserted` and
+    concatenating `failed_documents`.
+    """
+    merged: Optional[Dict[str, Any]] = None
+    for result in results:
+        if result is None:
+            continue
+        if merged is None:
+            merged = dict(result)
+            continue
+        for key, value in result.items():
+            previous = merged.get(key)
+            if isinstance(value, list) and isinstance(previous, list):
+                merged[key] = previous + value
+            elif isinstance(value, (int, float)) and not isinstance(value, bool) and isinstance(previous, (int, float)):
+                merged[key] = previous + value
+            else:
+                merged[key] = value
+    return merged
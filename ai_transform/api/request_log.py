@@ -0,0 +1,137 @@
+"""Request and response logging
+
+Set `LOG_REQUESTS` to log API traffic to `<timestamp>_request_logs.log`, each
+request as a curl command followed by its response. Payloads are large, so:
+
+- nothing is formatted unless logging is enabled
+- bodies are cut to `LOG_REQUESTS_MAX_BYTES` (default 4096, 0 for no limit)
+- only 1 in `LOG_REQUESTS_SAMPLE` successful requests is logged (default 1)
+- failed requests, errors and 4xx/5xx responses are always logged in full
+
+```
+    LOG_REQUESTS=1 LOG_REQUESTS_MAX_BYTES=1024 LOG_REQUESTS_SAMPLE=100 python main.py
+```
+"""
+import os
+import time
+import logging
+import itertools
+import threading
+import requests
+
+from typing import Optional, Union
+
+
+LOG_REQUESTS = bool(os.getenv("LOG_REQUESTS"))
+LOG_REQUESTS_MAX_BYTES = int(os.getenv("LOG_REQUESTS_MAX_BYTES", 4096))
+LOG_REQUESTS_SAMPLE = max(1, int(os.getenv("LOG_REQUESTS_SAMPLE", 1)))
+
+logger = logging.getLogger("ai_transform.requests")
+
+
+def _truncate(body: Union[bytes, str, None], max_bytes: Optional[int]) -> str:
+    if not body:
+        return ""
+    if max_bytes and len(body) > max_bytes:
+        omitted = len(body) - max_bytes
+        body = body[:max_bytes]
+        suffix = f"... [{omitted} more bytes]"
+    else:
+        suffix = ""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    return body + suffix
+
+
+def to_curl(request: requests.PreparedRequest, max_body_bytes: Optional[int] = None) -> str:
+    command = "curl -X {method} '{url}'".format(method=request.method, url=request.url)
+
+    for header, value in request.headers.items():
+        if header.lower() == "authorization":
+            value = "MASKED"
+        command += " -H '{header}: {value}'".format(header=header, value=value)
+
+    if request.body:
+        command += " -d '{data}'".format(data=_truncate(request.body, max_body_bytes))
+
+    return command
+
+
+class RequestLogger:
+    """
+    Decides which requests to log and formats them only once they will be.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = LOG_REQUESTS,
+        max_bytes: Optional[int] = LOG_REQUESTS_MAX_BYTES,
+        sample: int = LOG_REQUESTS_SAMPLE,
+        logger: logging.Logger = logger,
+    ):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.sample = sample
+        self.logger = logger
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._configured = False
+
+    def _configure(self) -> None:
+        # the log file is only created once there is something to write to it
+        with self._lock:
+            if self._configured:
+                return
+            self._configured = True
+            if not self.logger.handlers:
+                handler = logging.FileHandler(f"{int(time.time())}_request_logs.log")
+                handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+                self.logger.addHandler(handler)
+                self.logger.setLevel(logging.DEBUG)
+
+    def _sampled(self) -> bool:
+        with self._lock:
+            return next(self._counter) % self.sample == 0
+
+    def log(
+        self,
+        request: requests.PreparedRequest,
+        response: Optional[requests.Response] = None,
+        error: Optional[BaseException] = None,
+        seconds: float = 0.0,
+        stream: bool = False,
+    ) -> None:
+        if not self.enabled:
+            return
+        failed = error is not None or response is None or response.status_code >= 400
+        if not failed and not self._sampled():
+            return
+
+        self._configure()
+        level = logging.WARNING if failed else logging.DEBUG
+        if not self.logger.isEnabledFor(level):
+            return
+
+        max_bytes = None if failed else self.max_bytes
+        self.logger.log(level, to_curl(request, max_bytes))
+        if error is not None:
+            self.logger.log(level, "Request failed after %.3fs: %r\n", seconds, error)
+            return
+
+        # reading a streamed body here would load all of it into memory
+        content = "<streamed>" if stream and not failed else _truncate(response.content, max_bytes)
+        self.logger.log(level, "Response %s in %.3fs", response.status_code, seconds)
+        self.logger.log(level, "Response Headers: %s", response.headers)
+        self.logger.log(level, "Response Content: %s\n", content)
+
+
+REQUEST_LOGGER = RequestLogger()
+
+
+def log_request(request: requests.PreparedRequest) -> None:
+    logger.debug(to_curl(request, REQUEST_LOGGER.max_bytes))
+
+
+def log_response(response: requests.Response) -> None:
+    logger.debug("Response Headers: %s", response.headers)
+    logger.debug("Response Content: %s\n", _truncate(response.content, REQUEST_LOGGER.max_bytes))
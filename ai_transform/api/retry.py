@@ -0,0 +1,300 @@
+"""Retry policies for API requests
+
+Each region has a `RetryPolicy` for each class of endpoint: full-jitter
+exponential backoff, `Retry-After` support, an overall deadline for all
+attempts and a circuit breaker that fails fast while that region is down.
+
+```
+    from ai_transform.api.retry import RETRY_SETTINGS, get_retry_policies
+
+    RETRY_SETTINGS["write"]["deadline"] = 600  # for policies created from now on
+    get_retry_policies(api.base_url)["read"].metrics
+```
+"""
+import time
+import random
+import asyncio
+import threading
+import requests
+
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from requests.models import Response
+
+from ai_transform.api.wrappers import OrgEntitlementError
+from ai_transform.errors import CircuitOpenError
+from ai_transform.logger import format_logging_info, ic
+
+
+RETRY_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, ConnectionResetError)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` failures in a row. While open every call
+    fails fast, after `reset_timeout` seconds a single trial call is let
+    through and its outcome closes or reopens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = time.monotonic if clock is None else clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                return True
+            # open, or half open with the trial call still in flight
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class RetryPolicy:
+    """
+    Calls a request function until it succeeds, the response isn't worth
+    retrying, `max_retries` is reached or the `deadline` (in seconds, across
+    all attempts) would be passed.
+
+    Retryable failures are connection errors, timeouts and `retry_statuses`.
+    Waits are drawn uniformly from `[0, min(max_delay, base_delay * 2**attempt)]`
+    unless the server asks for longer with `Retry-After`.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        deadline: float = 120.0,
+        retry_statuses: Sequence[int] = RETRY_STATUSES,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_statuses = frozenset(retry_statuses)
+        self.circuit_breaker = CircuitBreaker() if circuit_breaker is None else circuit_breaker
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._metrics = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0, "circuit_open": 0}
+
+    @property
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._metrics)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._metrics[name] += 1
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    @staticmethod
+    def retry_after(response: Response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _is_failure(self, response: Response) -> bool:
+        # throttling is the backend working as intended, not an outage
+        return response.status_code >= 500
+
+    def _before_attempt(self) -> None:
+        if not self.circuit_breaker.allow():
+            self._count("circuit_open")
+            raise CircuitOpenError(f"Circuit for {self.name} requests is open, the API looks unavailable")
+        self._count("attempts")
+
+    def _retry_exception(self, e: Exception, attempt: int, start: float) -> bool:
+        self.circuit_breaker.record_failure()
+        ic(f"{self.name} request failed: {e!r}")
+        if not self._can_retry(attempt, start, 0.0):
+            self._count("failures")
+            return False
+        return True
+
+    def _retry_response(self, response: Response, attempt: int, start: float) -> Tuple[bool, Optional[float]]:
+        """
+        Returns whether to retry and how long the server asked to wait, if at all.
+        """
+        # works for both requests and httpx responses
+        if response.status_code < 400:
+            self.circuit_breaker.record_success()
+            return False, None
+
+        if self._is_failure(response):
+            self.circuit_breaker.record_failure()
+        else:
+            # the request got through and was answered
+            self.circuit_breaker.record_success()
+
+        content = response.content.decode(errors="replace")
+        to_log = format_logging_info({"message": content, "status_code": response.status_code})
+        ic(to_log)
+        if response.status_code == 400 and "Organization Entitlement setting documents" in content:
+            raise OrgEntitlementError(to_log)
+
+        if response.status_code not in self.retry_statuses:
+            self._count("failures")
+            return False, None
+
+        retry_after = self.retry_after(response)
+        if not self._can_retry(attempt, start, retry_after or 0.0):
+            self._count("failures")
+            return False, None
+        return True, retry_after
+
+    def _delay(self, attempt: int, start: float, retry_after: Optional[float]) -> float:
+        backoff = self.backoff(attempt)
+        delay = backoff if retry_after is None else max(retry_after, backoff)
+        self._count("retries")
+        # never sleep past the deadline
+        return min(delay, max(0.0, self.deadline - (self._clock() - start)))
+
+    def call(self, fn: Callable[..., Response], *args, **kwargs) -> Response:
+        """
+        Returns the first good response, or the last response once retrying is
+        no longer worth it. Exceptions are raised once retries run out.
+        """
+        self._count("calls")
+        start = self._clock()
+        attempt = 0
+        while True:
+            self._before_attempt()
+            try:
+                response = fn(*args, **kwargs)
+            except RETRY_EXCEPTIONS as e:
+                if not self._retry_exception(e, attempt, start):
+                    raise
+                retry_after = None
+            except BaseException:
+                # a trial call must not leave the circuit half open, whatever it raised
+                self.circuit_breaker.record_failure()
+                raise
+            else:
+                retry, retry_after = self._retry_response(response, attempt, start)
+                if not retry:
+                    return response
+
+            self._sleep(self._delay(attempt, start, retry_after))
+            attempt += 1
+
+    async def call_async(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        `call` for coroutine functions, waiting with `asyncio.sleep`.
+        """
+        self._count("calls")
+        start = self._clock()
+        attempt = 0
+        while True:
+            self._before_attempt()
+            try:
+                response = await fn(*args, **kwargs)
+            except RETRY_EXCEPTIONS as e:
+                if not self._retry_exception(e, attempt, start):
+                    raise
+                retry_after = None
+            except BaseException:
+                # a trial call must not leave the circuit half open, whatever it raised
+                self.circuit_breaker.record_failure()
+                raise
+            else:
+                retry, retry_after = self._retry_response(response, attempt, start)
+                if not retry:
+                    return response
+
+            await asyncio.sleep(self._delay(attempt, start, retry_after))
+            attempt += 1
+
+    def _can_retry(self, attempt: int, start: float, delay: float) -> bool:
+        return attempt < self.max_retries and self._clock() - start + delay < self.deadline
+
+
+RETRY_SETTINGS: Dict[str, Dict[str, Any]] = {
+    # get_where and other reads are cheap to repeat
+    "read": {"max_retries": 5, "base_delay": 1.0, "deadline": 120.0},
+    # bulk inserts and updates are large, give the backend longer to recover
+    "write": {"max_retries": 5, "base_delay": 2.0, "max_delay": 60.0, "deadline": 300.0},
+    # status and progress updates shouldn't hold up a workflow
+    "status": {"max_retries": 3, "base_delay": 0.5, "max_delay": 5.0, "deadline": 30.0},
+    "default": {},
+}
+
+
+def endpoint_class(suffix: str) -> str:
+    """
+    Returns which of `RETRY_SETTINGS` applies to an API path.
+    """
+    if suffix.endswith(("/get_where", "/get", "/list", "/schema", "/monitor/health")):
+        return "read"
+    if suffix.endswith(("/bulk_update", "/bulk_insert")):
+        return "write"
+    if suffix.startswith("/workflows/"):
+        return "status"
+    return "default"
+
+
+_LOCK = threading.Lock()
+_POLICIES: Dict[str, Dict[str, RetryPolicy]] = {}
+
+
+def get_retry_policies(base_url: str) -> Dict[str, RetryPolicy]:
+    """
+    Returns the policies shared by every API talking to `base_url`, so that an
+    outage in one region doesn't open the circuit for the others.
+    """
+    with _LOCK:
+        if base_url not in _POLICIES:
+            _POLICIES[base_url] = {
+                name: RetryPolicy(name=name, **settings) for name, settings in RETRY_SETTINGS.items()
+            }
+        return _POLICIES[base_url]
+
+
+def get_retry_policy(base_url: str, suffix: str) -> RetryPolicy:
+    return get_retry_policies(base_url)[endpoint_class(suffix)]
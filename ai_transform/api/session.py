@@ -0,0 +1,128 @@
+"""Shared HTTP sessions
+
+Every `API` with the same credentials and region shares one pooled
+`requests.Session`, so connections (and their TLS handshakes) are reused
+across every Dataset, Client and engine in the process.
+
+```
+    from ai_transform.api.session import configure_session_pool
+
+    # i.e. before running an engine with 16 threads
+    configure_session_pool(pool_maxsize=16)
+```
+"""
+import os
+import threading
+import requests
+
+from typing import Dict, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+
+from ai_transform.types import Credentials
+
+
+DEFAULT_POOL_CONNECTIONS = int(os.getenv("AI_TRANSFORM_POOL_CONNECTIONS", 10))
+DEFAULT_POOL_MAXSIZE = int(os.getenv("AI_TRANSFORM_POOL_MAXSIZE", 10))
+
+SessionKey = Tuple[int, str, str, str]
+
+
+class SessionRegistry:
+    """
+    Hands out one `requests.Session` per credentials and region.
+
+    Sessions are keyed by process id as well, so a forked worker never reuses
+    its parent's sockets.
+    """
+
+    def __init__(self, pool_connections: int = DEFAULT_POOL_CONNECTIONS, pool_maxsize: int = DEFAULT_POOL_MAXSIZE):
+        self._lock = threading.Lock()
+        self._sessions: Dict[SessionKey, requests.Session] = {}
+        self._pool_sizes: Dict[SessionKey, int] = {}
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+
+    @staticmethod
+    def _key(credentials: Credentials) -> SessionKey:
+        return (os.getpid(), credentials.project, credentials.api_key, credentials.region)
+
+    def _mount(self, session: requests.Session, pool_maxsize: int) -> None:
+        replaced = {session.adapters.get("https://"), session.adapters.get("http://")}
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        # requests still using the old pools finish normally, their connections
+        # are closed rather than returned once they are done
+        for old_adapter in replaced:
+            if old_adapter is not None:
+                old_adapter.close()
+
+    def get(self, credentials: Credentials) -> requests.Session:
+        key = self._key(credentials)
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                self._mount(session, self.pool_maxsize)
+                self._sessions[key] = session
+                self._pool_sizes[key] = self.pool_maxsize
+            return session
+
+    def reserve(self, credentials: Credentials, concurrency: int) -> None:
+        """
+        Makes sure the pool for `credentials` keeps at least `concurrency`
+        connections alive. Pools only ever grow.
+        """
+        key = self._key(credentials)
+        session = self.get(credentials)
+        with self._lock:
+            if self._pool_sizes.get(key, 0) < concurrency:
+                self._mount(session, concurrency)
+                self._pool_sizes[key] = concurrency
+
+    def configure(self, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None) -> None:
+        """
+        Sets the pool sizes for sessions created from now on and grows the
+        pools of existing sessions.
+        """
+        with self._lock:
+            if pool_connections is not None:
+                self.pool_connections = pool_connections
+            if pool_maxsize is not None:
+                self.pool_maxsize = pool_maxsize
+
+            for key, session in self._sessions.items():
+                if self._pool_sizes[key] < self.pool_maxsize:
+                    self._mount(session, self.pool_maxsize)
+                    self._pool_sizes[key] = self.pool_maxsize
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._pool_sizes.clear()
+
+
+_REGISTRY = SessionRegistry()
+
+
+def get_session(credentials: Credentials) -> requests.Session:
+    return _REGISTRY.get(credentials)
+
+
+def reserve_connections(credentials: Credentials, concurrency: int) -> None:
+    _REGISTRY.reserve(credentials, concurrency)
+
+
+def configure_session_pool(pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None) -> None:
+    _REGISTRY.configure(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+
+def close_sessions() -> None:
+    _REGISTRY.close()
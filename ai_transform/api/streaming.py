@@ -0,0 +1,164 @@
+"""Streaming get_where responses
+
+Parses the documents of a get_where response while it is still downloading,
+instead of buffering and decoding the whole page at once.
+
+```
+    stream = dataset.stream_documents(page_size=3000)
+    for batch in stream.batches(20):
+        ...
+    after_id = stream.after_id
+```
+
+Everything besides `documents` (i.e. `after_id` and `count`) is only known
+once the stream has been read to the end.
+"""
+import re
+import json
+import codecs
+
+from json import JSONDecodeError
+from typing import Any, Dict, Iterator, List, Optional
+
+from requests.models import Response
+
+from ai_transform.utils.document import Document
+from ai_transform.utils.document_list import DocumentList
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class DocumentStream:
+    """
+    Iterates over the documents of a get_where response as they arrive. Can
+    only be iterated once.
+    """
+
+    def __init__(self, response: Response, chunk_size: int = 64 * 1024):
+        self._response = response
+        self._chunks = response.iter_content(chunk_size=chunk_size)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+        self._started = False
+        self.metadata: Dict[str, Any] = {}
+
+    @property
+    def after_id(self) -> Optional[List[Any]]:
+        return self.metadata.get("after_id")
+
+    @property
+    def count(self) -> Optional[int]:
+        return self.metadata.get("count")
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+
+        # drop what has already been parsed before growing the buffer
+        if self._position:
+            self._buffer = self._buffer[self._position :]
+            self._position = 0
+
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._buffer += self._text.decode(b"", final=True)
+            return False
+
+        self._buffer += self._text.decode(chunk)
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            self._position = _WHITESPACE.match(self._buffer, self._position).end()
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                raise JSONDecodeError("Unexpected end of response", self._buffer, self._position)
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise JSONDecodeError(f"Expecting {char!r}", self._buffer, self._position)
+        self._position += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._position)
+            except JSONDecodeError:
+                # the value is most likely cut off, read at least as much again
+                # as is pending so that large values aren't parsed many times
+                pending = len(self._buffer) - self._position
+                while len(self._buffer) - self._position < 2 * pending and self._fill():
+                    pass
+                if len(self._buffer) - self._position == pending:
+                    raise
+                continue
+
+            if end == len(self._buffer) and self._fill():
+                # a number or literal could carry on in the next chunk
+                continue
+
+            self._position = end
+            return value
+
+    def _documents(self) -> Iterator[Document]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._position += 1
+            return
+
+        while True:
+            yield Document(self._value())
+            char = self._peek()
+            self._position += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise JSONDecodeError("Expecting ',' delimiter", self._buffer, self._position - 1)
+
+    def __iter__(self) -> Iterator[Document]:
+        if self._started:
+            raise RuntimeError("A DocumentStream can only be iterated once")
+        self._started = True
+
+        try:
+            self._expect("{")
+            if self._peek() == "}":
+                return
+
+            while True:
+                key = self._value()
+                self._expect(":")
+                if key == "documents":
+                    yield from self._documents()
+                else:
+                    self.metadata[key] = self._value()
+
+                char = self._peek()
+                self._position += 1
+                if char == "}":
+                    return
+                if char != ",":
+                    raise JSONDecodeError("Expecting ',' delimiter", self._buffer, self._position - 1)
+        finally:
+            self._response.close()
+
+    def batches(self, batch_size: int) -> Iterator[DocumentList]:
+        """
+        Yields the documents in batches of `batch_size` as soon as each one has arrived.
+        """
+        batch = []
+        for document in self:
+            batch.append(document)
+            if len(batch) == batch_size:
+                yield DocumentList(batch)
+                batch = []
+        if batch:
+            yield DocumentList(batch)
@@ -5,11 +5,11 @@ import traceback
 
 from json import JSONDecodeError
 from ai_transform.logger import format_logging_info, ic
+from ai_transform.utils.codec import get_codec
 from requests.models import Response
 from typing import Union, Sequence, Mapping, Callable, Any
 
 logger = logging.getLogger(__file__)
-logging.basicConfig()
 
 
 class ManualRetryError(Exception):
@@ -30,7 +30,7 @@ def is_response_bad(
     output_to_stdout: bool = False,  # support output to stdout to ensure logging is working
 ):
     try:
-        json_response = result.json()
+        json_response = get_codec().decode(result.content)
         if key_for_error in json_response:
             raise KeyError
 
@@ -0,0 +1,9 @@
+"""Benchmarks for ai_transform
+
+`python -m ai_transform.bench` runs the engine throughput suite, see
+`ai_transform.bench.engines`. Each module can also be run on its own, i.e.
+
+```
+    python -m ai_transform.bench.encoder
+```
+"""
@@ -0,0 +1,6 @@
+import sys
+
+from ai_transform.bench.engines import main
+
+
+sys.exit(main())
@@ -0,0 +1,70 @@
+"""Benchmark for the JSON codecs
+
+Encodes and decodes the mock documents from `ai_transform.utils.example_documents`
+with every installed codec, and checks they all produce the same bytes.
+
+```
+    python -m ai_transform.bench.codec --num-documents 3000
+```
+"""
+import math
+import time
+import argparse
+
+from typing import Any, Callable, Dict, List
+
+from ai_transform.utils.codec import CODECS
+from ai_transform.utils.example_documents import mock_documents
+
+
+def _time(func: Callable[[], Any], repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(num_documents: int = 3000, repeat: int = 3) -> List[Dict[str, Any]]:
+    documents = {"documents": mock_documents(num_documents)}
+    expected = None
+
+    results = []
+    for name, codec_type in CODECS.items():
+        try:
+            codec = codec_type()
+        except ImportError:
+            continue
+
+        encoded = codec.encode(documents)
+        if expected is None:
+            expected = encoded
+        results.append(
+            {
+                "name": name,
+                "bytes": len(encoded),
+                "identical": encoded == expected,
+                "encode_seconds": _time(lambda: codec.encode(documents), repeat),
+                "decode_seconds": _time(lambda: codec.decode(encoded), repeat),
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-documents", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for result in run(num_documents=args.num_documents, repeat=args.repeat):
+        print(
+            f"{result['name']:<8} encode {result['encode_seconds'] * 1000:>8.1f} ms "
+            f"decode {result['decode_seconds'] * 1000:>8.1f} ms "
+            f"{result['bytes'] / 1e6:>6.2f} MB identical={result['identical']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
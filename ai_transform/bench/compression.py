@@ -0,0 +1,62 @@
+"""Benchmark for request body compression
+
+Reports the CPU cost of each compression level against the bytes it saves on
+a bulk_update payload of vector documents.
+
+```
+    python -m ai_transform.bench.compression --num-documents 500 --vector-dim 768
+```
+"""
+import time
+import argparse
+
+from typing import Callable, Dict, List
+
+from ai_transform.api.compression import gzip_compress, zstd_compress, _zstd_available
+from ai_transform.bench.encoder import vector_documents
+from ai_transform.utils.serializer import serialize
+
+
+def run(num_documents: int = 500, vector_dim: int = 768) -> List[Dict[str, float]]:
+    body = serialize({"updates": vector_documents(num_documents, vector_dim)})
+
+    compressors: Dict[str, Callable[[bytes], bytes]] = {}
+    for level in (1, 3, 6, 9):
+        compressors[f"gzip-{level}"] = lambda data, level=level: gzip_compress(data, level=level)
+    if _zstd_available():
+        for level in (1, 3, 9):
+            compressors[f"zstd-{level}"] = lambda data, level=level: zstd_compress(data, level=level)
+
+    results = []
+    for name, compress in compressors.items():
+        start = time.perf_counter()
+        compressed = compress(body)
+        seconds = time.perf_counter() - start
+        results.append(
+            {
+                "name": name,
+                "bytes": len(body),
+                "compressed_bytes": len(compressed),
+                "ratio": len(body) / len(compressed),
+                "seconds": seconds,
+                "mb_per_second": len(body) / seconds / 1e6,
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-documents", type=int, default=500)
+    parser.add_argument("--vector-dim", type=int, default=768)
+    args = parser.parse_args()
+
+    for result in run(num_documents=args.num_documents, vector_dim=args.vector_dim):
+        print(
+            f"{result['name']:<8} {result['bytes'] / 1e6:>8.2f} MB -> {result['compressed_bytes'] / 1e6:>8.2f} MB "
+            f"{result['ratio']:>5.2f}x {result['seconds'] * 1000:>8.1f} ms {result['mb_per_second']:>7.1f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
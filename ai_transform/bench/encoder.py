@@ -0,0 +1,119 @@
+"""Benchmark for json_encoder on vector-heavy documents
+
+Compares the dispatch based `json_encoder` against the isinstance chain it
+replaced. The legacy encoder can't handle NumPy, so it is given documents whose
+vectors were already converted with `.tolist()`, which is what operators had
+to do before.
+
+```
+    python -m ai_transform.bench.encoder --num-documents 1000 --vector-dim 768
+```
+"""
+import math
+import time
+import argparse
+import dataclasses
+import collections
+
+import numpy as np
+
+from enum import Enum
+from pathlib import PurePath
+from types import GeneratorType
+from typing import Any, Callable, Dict, List
+
+from ai_transform.utils.document_list import DocumentList
+from ai_transform.utils.json_encoder import ENCODERS_BY_TYPE, json_encoder
+
+
+def legacy_json_encoder(obj: Any, force_string: bool = False):
+    """The isinstance based json_encoder, kept as the benchmark baseline"""
+    from ai_transform.utils import Document
+
+    if isinstance(obj, (list, set, frozenset, GeneratorType, tuple, collections.deque)):
+        return [legacy_json_encoder(item, force_string=force_string) for item in obj]
+    if isinstance(obj, dict):
+        encoded_dict = {}
+        for key, value in obj.items():
+            encoded_key = legacy_json_encoder(key, force_string=force_string)
+            encoded_dict[encoded_key] = legacy_json_encoder(value, force_string=force_string)
+        return encoded_dict
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, PurePath):
+        return str(obj)
+    if isinstance(obj, (str, int, type(None))):
+        return obj
+    if isinstance(obj, float):
+        if math.isnan(obj):
+            return None
+        return obj
+    if isinstance(obj, (Document, DocumentList)):
+        return obj.to_json()
+    if type(obj) in ENCODERS_BY_TYPE:
+        return ENCODERS_BY_TYPE[type(obj)](obj)
+    if force_string:
+        return repr(obj)
+    raise ValueError(f"{obj} ({type(obj)}) cannot be converted to JSON format")
+
+
+def vector_documents(num_documents: int, vector_dim: int, num_vectors: int = 2, seed: int = 0) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    documents = []
+    for index in range(num_documents):
+        document = {"_id": str(index), "text": f"document {index}", "score": float(rng.random())}
+        for vector_index in range(num_vectors):
+            vector = rng.random(vector_dim, dtype=np.float32)
+            if index % 10 == 0:
+                vector[0] = np.nan
+            document[f"sample_{vector_index}_vector_"] = vector
+        documents.append(document)
+    return documents
+
+
+def _time(func: Callable[[], Any], repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(num_documents: int = 1000, vector_dim: int = 768, repeat: int = 3) -> Dict[str, float]:
+    """
+    Returns the best time in seconds for each way of encoding the same documents
+    """
+    documents = vector_documents(num_documents, vector_dim)
+
+    def to_lists(documents: List[Dict]) -> List[Dict]:
+        return [
+            {key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in document.items()}
+            for document in documents
+        ]
+
+    list_documents = to_lists(documents)
+    return {
+        "legacy": _time(lambda: legacy_json_encoder(to_lists(documents)), repeat),
+        "dispatch_lists": _time(lambda: json_encoder(list_documents), repeat),
+        "dispatch_ndarray": _time(lambda: json_encoder(documents), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-documents", type=int, default=1000)
+    parser.add_argument("--vector-dim", type=int, default=768)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(num_documents=args.num_documents, vector_dim=args.vector_dim, repeat=args.repeat)
+    baseline = results["legacy"]
+    for name, seconds in results.items():
+        print(f"{name:<20} {seconds * 1000:>10.1f} ms {baseline / seconds:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
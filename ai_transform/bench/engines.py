@@ -0,0 +1,297 @@
+"""Engine throughput benchmark
+
+Runs every engine against the in-process API emulator on a synthetic dataset
+and reports documents per second, bytes moved, request counts, peak RSS and
+the time spent pulling, transforming and pushing documents. Each engine runs
+in its own process so that peak RSS is its own.
+
+```
+    python -m ai_transform.bench --num-documents 10000 --vector-dim 768 --chunk-depth 4
+    python -m ai_transform.bench --json results.json --baseline baseline.json
+    python -m ai_transform.bench --fault-rate 0.05  # goodput with 5% of requests throttled or failing
+```
+
+With `--baseline`, any engine whose docs/sec falls below `--threshold` of the
+baseline is reported and the command exits with status 1.
+"""
+import sys
+import json
+import time
+import argparse
+import resource
+import contextlib
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ai_transform.api.api import API
+from ai_transform.api.emulator import EmulatorAdapter, mount_emulator
+from ai_transform.api.faults import Faults, inject_faults
+from ai_transform.dataset.dataset import Dataset
+from ai_transform.engine.dense_output_engine import DenseOutputEngine
+from ai_transform.engine.in_memory_engine import InMemoryEngine
+from ai_transform.engine.multipass_engine import MultiPassEngine
+from ai_transform.engine.small_batch_stable_engine import SmallBatchStableEngine
+from ai_transform.engine.stable_engine import StableEngine
+from ai_transform.logger import ic
+from ai_transform.operator.abstract_operator import AbstractOperator
+from ai_transform.operator.dense_operator import DenseOperator
+from ai_transform.types import Credentials
+from ai_transform.utils.document_list import DocumentList
+from ai_transform.utils.synthetic import SyntheticDocuments
+
+
+DATASET_ID = "bench_dataset"
+DENSE_DATASET_ID = "bench_dataset_dense"
+
+ENGINES = ["stable", "small_batch_stable", "multipass", "in_memory", "dense_output"]
+
+# the fields of `SyntheticDocuments` the operators read
+TEXT_FIELD = "text_0"
+CHUNK_FIELD = "_chunk_"
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.seconds: Dict[str, float] = {"pull": 0.0, "transform": 0.0, "push": 0.0}
+
+    @contextlib.contextmanager
+    def time(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[phase] += time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def instrument_api(timer: PhaseTimer) -> Iterator[None]:
+    """
+    Times every API call by phase, including those made from datasets the
+    engine creates itself.
+    """
+    phases = {"_get_where": "pull", "_bulk_update": "push", "_bulk_insert": "push"}
+    originals = {name: getattr(API, name) for name in phases}
+
+    def timed(name: str, method: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            with timer.time(phases[name]):
+                return method(*args, **kwargs)
+
+        return wrapper
+
+    for name, method in originals.items():
+        setattr(API, name, timed(name, method))
+    try:
+        yield
+    finally:
+        for name, method in originals.items():
+            setattr(API, name, method)
+
+
+class BenchOperator(AbstractOperator):
+    def __init__(self, timer: PhaseTimer, output_field: str = "_bench_.text_length"):
+        self.timer = timer
+        self.output_field = output_field
+        super().__init__(input_fields=[TEXT_FIELD], output_fields=[output_field])
+
+    def __call__(self, old_documents: DocumentList) -> DocumentList:
+        # includes postprocessing, i.e. diffing the documents before the upsert
+        with self.timer.time("transform"):
+            return super().__call__(old_documents)
+
+    def transform(self, documents: DocumentList) -> DocumentList:
+        for document in documents:
+            document[self.output_field] = len(document[TEXT_FIELD])
+            for chunk in document.get(CHUNK_FIELD) or []:
+                chunk["length"] = len(chunk["text"])
+        return documents
+
+
+class BenchDenseOperator(DenseOperator):
+    def __init__(self, timer: PhaseTimer):
+        self.timer = timer
+        super().__init__(input_fields=[TEXT_FIELD])
+
+    def __call__(self, old_documents: DocumentList) -> Dict[str, List[Dict[str, Any]]]:
+        with self.timer.time("transform"):
+            return super().__call__(old_documents)
+
+    def transform(self, documents: DocumentList) -> Dict[str, List[Dict[str, Any]]]:
+        return {
+            DENSE_DATASET_ID: [{"text": word} for document in documents for word in document[TEXT_FIELD].split()[:2]]
+        }
+
+
+def _make_engine(name: str, dataset: Dataset, timer: PhaseTimer, pull_chunksize: int):
+    kwargs = dict(dataset=dataset, select_fields=[TEXT_FIELD], pull_chunksize=pull_chunksize)
+    if name == "stable":
+        return StableEngine(operator=BenchOperator(timer), show_progress_bar=False, **kwargs)
+    if name == "small_batch_stable":
+        return SmallBatchStableEngine(operator=BenchOperator(timer), **kwargs)
+    if name == "multipass":
+        operators = [BenchOperator(timer), BenchOperator(timer, output_field="_bench_.second_pass")]
+        return MultiPassEngine(operators=operators, show_progress_bar=False, **kwargs)
+    if name == "in_memory":
+        return InMemoryEngine(operator=BenchOperator(timer), show_progress_bar=False, **kwargs)
+    if name == "dense_output":
+        return DenseOutputEngine(operator=BenchDenseOperator(timer), show_progress_bar=False, **kwargs)
+    raise ValueError(f"Unknown engine {name}, should be one of {ENGINES}")
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_engine(
+    name: str,
+    num_documents: int = 1000,
+    vector_dim: int = 128,
+    chunk_depth: int = 2,
+    pull_chunksize: int = 500,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    bytes_per_second: Optional[float] = None,
+    fault_rate: float = 0.0,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Runs a single engine over a fresh emulated dataset and returns its measurements.
+    `fault_rate` of requests answer 429, 502 or 503 instead.
+    """
+    credentials = Credentials(f"bench_{name}", "api_key", "bench", "firebase_uid")
+    adapter = EmulatorAdapter(latency=latency, jitter=jitter, bytes_per_second=bytes_per_second, seed=seed)
+    mount_emulator(credentials, adapter)
+    faults = None
+    if fault_rate:
+        statuses = {429: fault_rate / 3, 502: fault_rate / 3, 503: fault_rate / 3}
+        faults = inject_faults(credentials, Faults(statuses=statuses), seed=seed)
+    synthetic = SyntheticDocuments(
+        num_documents, seed=seed, vector_dim=vector_dim, chunk_length=(chunk_depth, chunk_depth)
+    )
+    adapter.add_dataset(DATASET_ID, list(synthetic))
+
+    timer = PhaseTimer()
+    dataset = Dataset(API(credentials), DATASET_ID)
+
+    ic.disable()
+    try:
+        with instrument_api(timer):
+            start = time.perf_counter()
+            engine = _make_engine(name, dataset, timer, pull_chunksize)
+            engine.apply()
+            seconds = time.perf_counter() - start
+    finally:
+        ic.enable()
+
+    phases = dict(timer.seconds)
+    phases["other"] = max(0.0, seconds - sum(phases.values()))
+    return {
+        "engine": name,
+        "documents": num_documents,
+        "seconds": seconds,
+        "docs_per_sec": num_documents / seconds,
+        "requests": adapter.requests,
+        "faults": 0 if faults is None else sum(faults.injected.values()),
+        "bytes_sent": adapter.bytes_received,
+        "bytes_received": adapter.bytes_sent,
+        "peak_rss_mb": _peak_rss_mb(),
+        "phases": phases,
+    }
+
+
+def run(engines: List[str] = None, isolate: bool = True, **kwargs) -> List[Dict[str, Any]]:
+    results = []
+    for name in ENGINES if engines is None else engines:
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(run_engine, name, **kwargs).result())
+        else:
+            results.append(run_engine(name, **kwargs))
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float) -> List[str]:
+    """
+    Returns the engines whose docs/sec fell below `threshold` times their baseline.
+    """
+    baseline_by_engine = {result["engine"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_engine.get(result["engine"])
+        if previous is None:
+            continue
+        result["baseline_ratio"] = result["docs_per_sec"] / previous["docs_per_sec"]
+        if result["baseline_ratio"] < threshold:
+            regressions.append(result["engine"])
+    return regressions
+
+
+def _print(results: List[Dict[str, Any]]) -> None:
+    header = f"{'engine':<20} {'docs/sec':>10} {'requests':>9} {'MB sent':>9} {'MB recv':>9} {'RSS MB':>8}"
+    print(header + "  pull / transform / push / other (s)" + "  vs baseline")
+    for result in results:
+        phases = " / ".join(f"{result['phases'][phase]:.2f}" for phase in ["pull", "transform", "push", "other"])
+        ratio = f"{result['baseline_ratio']:.2f}x" if "baseline_ratio" in result else ""
+        print(
+            f"{result['engine']:<20} {result['docs_per_sec']:>10.0f} {result['requests']:>9} "
+            f"{result['bytes_sent'] / 1e6:>9.1f} {result['bytes_received'] / 1e6:>9.1f} "
+            f"{result['peak_rss_mb']:>8.0f}  {phases}  {ratio}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--num-documents", type=int, default=1000)
+    parser.add_argument("--vector-dim", type=int, default=128)
+    parser.add_argument("--chunk-depth", type=int, default=2)
+    parser.add_argument("--pull-chunksize", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="sigma of the log-normal latency factor")
+    parser.add_argument("--bytes-per-second", type=float, default=None)
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="fraction of requests to fail with 429/502/503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-isolate", action="store_true", help="run every engine in this process")
+    parser.add_argument("--json", help="write the results as JSON to this path, or - for stdout")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args(argv)
+
+    results = run(
+        engines=args.engines,
+        isolate=not args.no_isolate,
+        num_documents=args.num_documents,
+        vector_dim=args.vector_dim,
+        chunk_depth=args.chunk_depth,
+        pull_chunksize=args.pull_chunksize,
+        latency=args.latency,
+        jitter=args.jitter,
+        bytes_per_second=args.bytes_per_second,
+        fault_rate=args.fault_rate,
+        seed=args.seed,
+    )
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+
+    if args.json == "-":
+        json.dump({"config": vars(args), "results": results}, sys.stdout, indent=2)
+    else:
+        _print(results)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+    if regressions:
+        print(f"Regressed past {args.threshold:.0%} of baseline: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Benchmark for import time
+
+Imports each entry point in a fresh interpreter under `python -X importtime`
+and reports its cumulative import time, the slowest modules it pulled in and
+which of the heavy dependencies (pandas, NumPy, icecream, tqdm, pydantic) were
+loaded. Those are imported on first use, so none should be loaded by importing
+ai_transform alone.
+
+```
+    python -m ai_transform.bench.imports
+    python -m ai_transform.bench.imports --check               # exit 1 if one loads a heavy dependency
+    python -m ai_transform.bench.imports --check --max-ms 400  # or takes longer than 400ms
+```
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ENTRY_POINTS = [
+    "ai_transform",
+    "ai_transform.utils",
+    "ai_transform.api.client",
+    "ai_transform.workflow",
+    "ai_transform.engine.stable_engine",
+    "ai_transform.operator.abstract_operator",
+]
+
+HEAVY_MODULES = ["pandas", "numpy", "icecream", "tqdm", "pydantic"]
+
+# so that the subprocesses import this tree rather than an installed copy
+_ROOT = str(Path(__file__).resolve().parents[2])
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    `(module, cumulative microseconds, depth)` for each line of `-X importtime`
+    output. Modules come after their dependencies, at a lower depth.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(cumulative), depth))
+    return imports
+
+
+def _dependencies(imports: List[Tuple[str, int, int]], module: str) -> Dict[str, int]:
+    # the lines right before the module's own, until the previous top level import
+    index = max(i for i, (name, _, depth) in enumerate(imports) if name == module and depth == 0)
+    dependencies = {}
+    for name, cumulative, depth in reversed(imports[:index]):
+        if depth == 0:
+            break
+        dependencies[name] = cumulative
+    return dependencies
+
+
+def measure(module: str, python: str = sys.executable) -> Dict[str, Any]:
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [_ROOT, os.getenv("PYTHONPATH")]))}
+    process = subprocess.run(
+        [python, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+    imports = parse_importtime(process.stderr)
+    dependencies = _dependencies(imports, module)
+    slowest = sorted(dependencies, key=dependencies.get, reverse=True)[:5]
+    return {
+        "seconds": next(cumulative for name, cumulative, depth in reversed(imports) if name == module) / 1e6,
+        "heavy": process.stdout.split(),
+        "slowest": {name: dependencies[name] / 1e6 for name in slowest},
+    }
+
+
+def run(modules: List[str] = ENTRY_POINTS, repeat: int = 5) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for module in modules:
+        # the fastest run is the one least disturbed by the rest of the machine
+        runs = [measure(module) for _ in range(repeat)]
+        results[module] = min(runs, key=lambda result: result["seconds"])
+    return results
+
+
+def check(results: Dict[str, Dict[str, Any]], max_seconds: Optional[float] = None) -> List[str]:
+    failures = []
+    for module, result in results.items():
+        if result["heavy"]:
+            failures.append(f"{module}: imports {', '.join(result['heavy'])}")
+        if max_seconds is not None and result["seconds"] > max_seconds:
+            failures.append(f"{module}: {result['seconds'] * 1e3:.0f}ms > {max_seconds * 1e3:.0f}ms")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", action="append", help="entry point to import, can be repeated")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="exit 1 if an entry point imports a heavy dependency")
+    parser.add_argument("--max-ms", type=float, help="with --check, also fail past this import time")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.module or ENTRY_POINTS, repeat=args.repeat)
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+    else:
+        print(f"{'module':<42} {'ms':>8}  slowest dependencies")
+        for module, result in results.items():
+            slowest = ", ".join(
+                f"{name} {seconds * 1e3:.0f}ms" for name, seconds in list(result["slowest"].items())[:3]
+            )
+            print(f"{module:<42} {result['seconds'] * 1e3:>8.1f}  {slowest}")
+            if result["heavy"]:
+                print(f"{'':<42} {'':>8}  loads {', '.join(result['heavy'])}")
+
+    if args.check:
+        failures = check(results, None if args.max_ms is None else args.max_ms / 1e3)
+        if failures:
+            print("Import time check failed:", file=sys.stderr)
+            for failure in failures:
+                print(f"    {failure}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""Micro-benchmarks for the Document hot paths
+
+Measures operations per second and peak memory allocated per operation for
+`Document` indexing and keys, `DocumentList.set_chunk_values`,
+`get_document_diff`, `json_encoder` and `Document.to_json`. Each one runs on
+flat, nested, chunked, vector-heavy and tag-heavy documents.
+
+```
+    python -m ai_transform.bench.micro
+    python -m ai_transform.bench.micro --check            # exit 1 on a regression
+    python -m ai_transform.bench.micro --update-baseline  # after an intended change
+```
+
+`--check` compares against `micro_baseline.json` next to this file. Speed is
+compared relative to a reference operation of plain Python dict and list work
+timed in turns with each case, so that the baseline holds on a slower or faster
+machine. A case regresses when its speed relative to the reference drops, or
+its peak allocation grows, by more than `--threshold`. The ratios still shift
+a little between Python versions and CPUs, refresh the baseline when moving
+the check to a different Python.
+"""
+import sys
+import json
+import timeit
+import argparse
+import platform
+import tracemalloc
+
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ai_transform.operator.abstract_operator import get_document_diff
+from ai_transform.utils.document import Document
+from ai_transform.utils.document_list import DocumentList
+from ai_transform.utils.json_encoder import json_encoder
+
+
+BASELINE_PATH = Path(__file__).with_name("micro_baseline.json")
+
+
+def flat_document() -> Dict[str, Any]:
+    document = {"_id": "flat"}
+    for index in range(20):
+        document[f"field_{index}"] = f"value {index}" if index % 2 else index
+    return document
+
+
+def nested_document() -> Dict[str, Any]:
+    return {
+        "_id": "nested",
+        **{
+            f"level_{i}": {f"level_{j}": {f"value_{k}": i * j * k for k in range(4)} for j in range(3)}
+            for i in range(3)
+        },
+    }
+
+
+def chunked_document() -> Dict[str, Any]:
+    chunks = [{"text": f"sentence {index}", "label": "label", "_order_": index} for index in range(20)]
+    return {"_id": "chunked", "text": "document", "text_chunk_": chunks}
+
+
+def vector_document() -> Dict[str, Any]:
+    document = {"_id": "vector", "text": "document"}
+    for index in range(4):
+        document[f"vector_{index}_vector_"] = [(index + dim) / 768 for dim in range(768)]
+    return document
+
+
+def tag_document() -> Dict[str, Any]:
+    tags = [{"label": f"tag {index}", "value": index / 30} for index in range(30)]
+    return {"_id": "tags", "text": "document", "_surveytag_": {"text": tags}}
+
+
+SHAPES: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "flat": flat_document,
+    "nested": nested_document,
+    "chunked": chunked_document,
+    "vector": vector_document,
+    "tags": tag_document,
+}
+
+# the field each shape is read by
+READ_FIELDS = {
+    "flat": "field_10",
+    "nested": "level_2.level_1.value_3",
+    "chunked": "text_chunk_",
+    "vector": "vector_0_vector_",
+    "tags": "_surveytag_.text",
+}
+
+
+def reference() -> List[str]:
+    # plain Python work that no change to this package can speed up or slow down
+    document = {f"field_{index}": index for index in range(20)}
+    return sorted(key for key, value in document.items() if value % 2)
+
+
+def cases() -> Dict[str, Callable[[], Any]]:
+    """
+    Returns a zero argument callable per `primitive/shape`.
+    """
+    benchmarks = {}
+    for shape, make_document in SHAPES.items():
+        raw = make_document()
+        document = Document(deepcopy(raw))
+        transformed = Document(deepcopy(raw))
+        transformed["_bench_.output"] = 1
+        field = READ_FIELDS[shape]
+
+        benchmarks[f"getitem/{shape}"] = lambda document=document, field=field: document[field]
+        benchmarks[f"setitem/{shape}"] = lambda document=document: document.__setitem__("_bench_.output", 1)
+        benchmarks[f"keys/{shape}"] = lambda raw=raw: Document(raw).keys()
+        benchmarks[f"diff/{shape}"] = lambda old=document, new=transformed: get_document_diff(old, new)
+        benchmarks[f"json_encoder/{shape}"] = lambda document=document: json_encoder(document)
+        benchmarks[f"to_json/{shape}"] = lambda document=document: document.to_json()
+
+    documents = DocumentList([chunked_document() for _ in range(20)])
+    labels = [[f"label {index}" for index in range(20)] for _ in range(20)]
+    benchmarks["set_chunk_values/chunked"] = lambda: documents.set_chunk_values("text_chunk_", "label", labels)
+    return benchmarks
+
+
+def _ops_per_sec(func: Callable[[], Any], repeat: int) -> Tuple[float, float]:
+    """
+    Returns the ops/sec of `func` and of `reference`, timed in turns so that
+    both see the same load on the machine.
+    """
+    timers = [timeit.Timer(func), timeit.Timer(reference)]
+    numbers = [timer.autorange()[0] for timer in timers]
+    best = [float("inf"), float("inf")]
+    for _ in range(repeat):
+        for index, timer in enumerate(timers):
+            best[index] = min(best[index], timer.timeit(numbers[index]) / numbers[index])
+    return 1 / best[0], 1 / best[1]
+
+
+def _peak_bytes(func: Callable[[], Any]) -> int:
+    func()
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - start)
+
+
+def run(filter: Optional[str] = None, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, func in cases().items():
+        if filter is not None and filter not in name:
+            continue
+        ops_per_sec, reference_ops_per_sec = _ops_per_sec(func, repeat)
+        results[name] = {
+            "ops_per_sec": ops_per_sec,
+            "relative": ops_per_sec / reference_ops_per_sec,
+            "peak_bytes": _peak_bytes(func),
+        }
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """
+    Returns a description of every case that regressed past `threshold`.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result["relative"] < previous["relative"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {result['relative']:.4f}x the reference op's speed, was {previous['relative']:.4f}x"
+            )
+        # a little slack so that tiny allocations don't flap
+        if result["peak_bytes"] > previous["peak_bytes"] * (1 + threshold) + 256:
+            regressions.append(f"{name}: {result['peak_bytes']} bytes peak, was {previous['peak_bytes']}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", help="only run cases containing this string, e.g. diff/ or /chunked")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--check", action="store_true", help="exit 1 if any case regressed past the baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(filter=args.filter, repeat=args.repeat)
+
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    if args.json:
+        json.dump({"python": platform.python_version(), "results": results}, sys.stdout, indent=2)
+    else:
+        print(f"{'case':<28} {'ops/sec':>12} {'peak bytes':>11} {'vs baseline':>12}")
+        for name, result in results.items():
+            ratio = ""
+            if name in baseline:
+                ratio = f"{result['relative'] / baseline[name]['relative']:.2f}x"
+            print(f"{name:<28} {result['ops_per_sec']:>12.0f} {result['peak_bytes']:>11} {ratio:>12}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "results": {**baseline, **results}}, f, indent=2)
+            f.write("\n")
+
+    if args.check:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressed past {args.threshold:.0%} of baseline:", file=sys.stderr)
+            for regression in regressions:
+                print(f"    {regression}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
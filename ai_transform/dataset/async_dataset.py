@@ -0,0 +1,108 @@
+import asyncio
+
+from typing import Any, Dict, List, Optional, Union
+
+from ai_transform.api.async_api import AsyncAPI
+from ai_transform.api.helpers import process_token
+from ai_transform.api.payload import merge_results
+from ai_transform.types import Filter, Schema
+from ai_transform.utils.document import Document
+from ai_transform.utils.document_list import DocumentList
+
+
+class AsyncDataset:
+    """
+    `Dataset` for `AsyncAPI`, every request is a coroutine.
+
+    ```
+        async with AsyncAPI(credentials) as api:
+            dataset = AsyncDataset(api, dataset_id)
+            await dataset.bulk_insert(documents, max_in_flight=50)
+    ```
+    """
+
+    def __init__(self, api: AsyncAPI, dataset_id: str):
+        self._api = api
+        self._dataset_id = dataset_id
+
+    @property
+    def api(self) -> AsyncAPI:
+        return self._api
+
+    @classmethod
+    def from_details(cls: "AsyncDataset", dataset_id: str, token: str) -> "AsyncDataset":
+        return cls(AsyncAPI(process_token(token)), dataset_id)
+
+    @property
+    def dataset_id(self) -> str:
+        return self._dataset_id
+
+    async def schema(self) -> Schema:
+        return await self.api._get_schema(self._dataset_id)
+
+    async def health(self) -> Dict[str, Any]:
+        return await self.api._get_health(self._dataset_id)
+
+    async def bulk_insert(
+        self,
+        documents: Union[List[Document], DocumentList],
+        insert_chunksize: int = 20,
+        max_in_flight: int = 10,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def insert_chunk(chunk: List[Document]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.insert_documents(chunk, **kwargs)
+
+        chunks = [documents[i : i + insert_chunksize] for i in range(0, len(documents), insert_chunksize)]
+        results = await asyncio.gather(*[insert_chunk(chunk) for chunk in chunks])
+        return merge_results([{"inserted": 0, "failed_documents": []}, *results])
+
+    async def insert_documents(self, documents: Union[List[Document], DocumentList], *args, **kwargs) -> Dict[str, Any]:
+        return await self.api._bulk_insert(dataset_id=self._dataset_id, documents=documents, *args, **kwargs)
+
+    async def update_documents(
+        self,
+        documents: Union[List[Document], DocumentList],
+        insert_date: bool = True,
+        ingest_in_background: bool = True,
+        update_schema: bool = True,
+        target_payload_bytes: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        return await self.api._bulk_update(
+            dataset_id=self._dataset_id,
+            documents=documents,
+            insert_date=insert_date,
+            ingest_in_background=ingest_in_background,
+            update_schema=update_schema,
+            target_payload_bytes=target_payload_bytes,
+        )
+
+    async def get_documents(
+        self,
+        page_size: int,
+        filters: Optional[List[Filter]] = None,
+        sort: Optional[list] = None,
+        select_fields: Optional[List[str]] = None,
+        include_vector: bool = True,
+        random_state: int = 0,
+        is_random: bool = False,
+        after_id: Optional[List] = None,
+        worker_number: int = 0,
+    ) -> Dict[str, Any]:
+        res = await self.api._get_where(
+            dataset_id=self._dataset_id,
+            page_size=page_size,
+            filters=filters,
+            sort=sort,
+            select_fields=select_fields,
+            include_vector=include_vector,
+            random_state=random_state,
+            is_random=is_random,
+            after_id=after_id,
+            worker_number=worker_number,
+        )
+        res["documents"] = DocumentList(res["documents"])
+        return res
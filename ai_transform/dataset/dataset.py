@@ -6,6 +6,9 @@ from typing import Any, Dict, List, Optional, Union
 
 from ai_transform.api.api import API
 from ai_transform.api.helpers import process_token
+from ai_transform.api.payload import merge_results
+from ai_transform.api.session import reserve_connections
+from ai_transform.api.streaming import DocumentStream
 from ai_transform.types import Filter, Schema, GroupBy, Metric
 from ai_transform.errors import MaxRetriesError
 from ai_transform.dataset.field import Field, KeyphraseField, ClusterField
@@ -15,8 +18,7 @@ from ai_transform.logger import ic
 from concurrent.futures import ThreadPoolExecutor
 
 
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
 
 
 class Dataset:
@@ -74,24 +76,14 @@ class Dataset:
             for i in range(len(documents) // insert_chunksize + 1):
                 yield {"documents": documents[i * insert_chunksize : (i + 1) * insert_chunksize], **kwargs}
 
-        results = {}
+        reserve_connections(self.api.credentials, max_workers)
+
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = executor.map(lambda kw: self.insert_documents(**kw), chunk_documents_with_kwargs(documents))
 
-        results = {"inserted": 0, "failed_documents": []}
-        for result in futures:
-            results["inserted"] += result["inserted"]
-            results["failed_documents"] += result["failed_documents"]
-
-        return results
+        return merge_results([{"inserted": 0, "failed_documents": []}, *futures])
 
     def insert_documents(self, documents: Union[List[Document], DocumentList], *args, **kwargs) -> Dict[str, Any]:
-        if hasattr(documents, "to_json"):
-            documents = documents.to_json()
-        else:
-            for index in range(len(documents)):
-                if hasattr(documents[index], "to_json"):
-                    documents[index] = documents[index].to_json()
         return self.api._bulk_insert(dataset_id=self._dataset_id, documents=documents, *args, **kwargs)
 
     def update_documents(
@@ -100,19 +92,19 @@ class Dataset:
         insert_date: bool = True,
         ingest_in_background: bool = True,
         update_schema: bool = True,
+        target_payload_bytes: Optional[int] = None,
     ) -> Dict[str, Any]:
-        if hasattr(documents, "to_json"):
-            documents = documents.to_json()
-        else:
-            for index in range(len(documents)):
-                if hasattr(documents[index], "to_json"):
-                    documents[index] = documents[index].to_json()
+        """
+        Sent in as many requests as it takes to keep each one around
+        `target_payload_bytes` once encoded, the results are merged.
+        """
         return self.api._bulk_update(
             dataset_id=self._dataset_id,
             documents=documents,
             insert_date=insert_date,
             ingest_in_background=ingest_in_background,
             update_schema=update_schema,
+            target_payload_bytes=target_payload_bytes,
         )
 
     def get_documents(
@@ -142,6 +134,36 @@ class Dataset:
         res["documents"] = DocumentList(res["documents"])
         return res
 
+    def stream_documents(
+        self,
+        page_size: int,
+        filters: Optional[List[Filter]] = None,
+        sort: Optional[list] = None,
+        select_fields: Optional[List[str]] = None,
+        include_vector: bool = True,
+        random_state: int = 0,
+        is_random: bool = False,
+        after_id: Optional[List] = None,
+        worker_number: int = 0,
+    ) -> DocumentStream:
+        """
+        Like `get_documents`, but yields the documents while the page is still
+        downloading. `after_id` and `count` are set on the stream once it is exhausted.
+        """
+        return self.api._get_where(
+            dataset_id=self._dataset_id,
+            page_size=page_size,
+            filters=filters,
+            sort=sort,
+            select_fields=select_fields,
+            include_vector=include_vector,
+            random_state=random_state,
+            is_random=is_random,
+            after_id=after_id,
+            worker_number=worker_number,
+            stream=True,
+        )
+
     def delete_documents(self, filters: Optional[List[Filter]]) -> Dict[str, Any]:
         res = self.api._delete_where(dataset_id=self._dataset_id, filters=filters)
         return res
@@ -1,5 +1,4 @@
 import uuid
-import numpy as np
 
 from typing import Dict, Any, List, Optional, Union
 
@@ -265,6 +264,8 @@ class ClusterField(Field):
         )
 
     def create_centroid_documents(self):
+        import numpy as np
+
         documents = self._dataset.get_all_documents(select_fields=[self._cluster_field, self._field])
         documents = documents["documents"]
 
@@ -5,14 +5,14 @@ from json import JSONDecodeError
 from typing import Any, List, Optional, Sequence, Iterator
 from abc import ABC, abstractmethod
 
-from tqdm.auto import tqdm
-
 from ai_transform.logger import ic
+from ai_transform.metrics import record_documents
+from ai_transform.tracing import span
 from ai_transform.types import Filter
 from ai_transform.dataset.dataset import Dataset
 from ai_transform.operator.abstract_operator import AbstractOperator
 
-from ai_transform.utils.document import Document
+from ai_transform.utils.document import Document, has_multiple_keys
 from ai_transform.utils.document_list import DocumentList
 
 from ai_transform.errors import MaxRetriesError
@@ -187,7 +187,8 @@ class AbstractEngine(ABC):
 
     def __call__(self) -> Any:
         if self.size != 0:
-            self.apply()
+            with span(type(self).__name__, cat="engine", documents=self.size):
+                self.apply()
         self.set_success_ratio()
 
     def _operate(self, mini_batch):
@@ -197,12 +198,14 @@ class AbstractEngine(ABC):
         except Exception as e:
             ic(e)
             ic({"chunk_ids": self._get_chunks_ids(mini_batch)})
+            record_documents(self, "failed", len(mini_batch))
         else:
             # if there is no exception then this block will be executed
             # we only update schema on the first chunk
             # otherwise it breaks down how the backend handles
             # schema updates
             self._successful_documents += len(mini_batch)
+            record_documents(self, "transformed", len(mini_batch))
             return transformed_batch
 
     def _get_refresh_filter(self):
@@ -283,17 +286,18 @@ class AbstractEngine(ABC):
                 else:
                     pull_chunksize = self.limit_documents - documents_processed
 
-                chunk = self._dataset.get_documents(
-                    page_size=pull_chunksize,
-                    filters=filters,
-                    select_fields=select_fields,
-                    after_id=self._after_id,
-                    worker_number=self.worker_number,
-                    sort=sort,
-                    include_vector=include_vector,
-                    random_state=random_state,
-                    is_random=is_random,
-                )
+                with span("pull", cat="engine", page_size=pull_chunksize):
+                    chunk = self._dataset.get_documents(
+                        page_size=pull_chunksize,
+                        filters=filters,
+                        select_fields=select_fields,
+                        after_id=self._after_id,
+                        worker_number=self.worker_number,
+                        sort=sort,
+                        include_vector=include_vector,
+                        random_state=random_state,
+                        is_random=is_random,
+                    )
             except (ConnectionError, JSONDecodeError) as e:
                 ic(e)
                 retry_count += 1
@@ -305,6 +309,7 @@ class AbstractEngine(ABC):
                 self._after_id = chunk["after_id"]
                 if not chunk["documents"]:
                     break
+                record_documents(self, "pulled", len(chunk["documents"]))
 
                 documents = chunk["documents"]
                 documents = self._filter_for_non_empty_list(documents)
@@ -329,9 +334,12 @@ class AbstractEngine(ABC):
 
     def update_chunk(self, chunk: List[Document], ingest_in_background: bool = True, update_schema: bool = False):
         if chunk:
-            return self._dataset.update_documents(
-                documents=chunk, ingest_in_background=ingest_in_background, update_schema=update_schema
-            )
+            with span("upload", cat="engine", documents=len(chunk)):
+                result = self._dataset.update_documents(
+                    documents=chunk, ingest_in_background=ingest_in_background, update_schema=update_schema
+                )
+            record_documents(self, "upserted", len(chunk))
+            return result
 
     def api_progress(
         self,
@@ -353,6 +361,8 @@ class AbstractEngine(ABC):
 
         desc = " -> ".join([repr(operator) for operator in self.operators])
 
+        from tqdm.auto import tqdm
+
         tqdm_bar = tqdm(range(total), desc=desc, disable=(not show_progress_bar), total=total)
         tqdm_bar.update(inital_value)
 
@@ -402,7 +412,10 @@ class AbstractEngine(ABC):
         # if there are more keys than just _id in each document
         # then return that as a list of Documents
         # length of a dictionary is just 1 if there is only 1 key
-        return DocumentList([document for document in documents if len(document.keys()) > 1])
+        if isinstance(documents, DocumentList):
+            # check the raw documents so that the page isn't wrapped just to be filtered
+            documents = documents.data
+        return DocumentList([document for document in documents if has_multiple_keys(document)])
 
     @staticmethod
     def _get_chunks_ids(documents: List[Document]) -> List[Document]:
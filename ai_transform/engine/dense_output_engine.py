@@ -18,6 +18,8 @@ from ai_transform.operator.dense_operator import DenseOperator
 from ai_transform.engine.abstract_engine import AbstractEngine
 from ai_transform.types import Filter
 from ai_transform.logger import ic
+from ai_transform.metrics import record_documents
+from ai_transform.tracing import span
 
 
 class DenseOutputEngine(AbstractEngine):
@@ -78,7 +80,9 @@ class DenseOutputEngine(AbstractEngine):
                 for dataset_id, documents in document_mapping.items():
                     output_dataset_ids.append(dataset_id)
                     dataset = Dataset.from_details(dataset_id, self.token)
-                    result = dataset.bulk_insert(documents)
+                    with span("upload", cat="engine", documents=len(documents)):
+                        result = dataset.bulk_insert(documents)
+                    record_documents(self, "upserted", len(documents))
                     ic({"dataset_id": dataset_id, "result": result})
 
         self.operator.post_hooks(self._dataset)
@@ -2,7 +2,8 @@ import logging
 
 from typing import Optional, Sequence, List
 
-from ai_transform.logger import format_logging_info, ic
+from ai_transform.logger import format_logging_info, ic, summarize
+from ai_transform.metrics import record_documents
 from ai_transform.dataset.dataset import Dataset
 from ai_transform.operator.abstract_operator import AbstractOperator
 from ai_transform.engine.abstract_engine import AbstractEngine
@@ -72,7 +73,8 @@ class MultiPassEngine(AbstractEngine):
                 update_schema=batch_index < self.MAX_SCHEMA_UPDATE_LIMITER,
                 ingest_in_background=ingest_in_background,
             )
-            ic(result)
+            if ic.enabled:
+                ic(summarize(result))
 
     def _operate(self, operator: AbstractOperator, mini_batch: List[Document]):
         try:
@@ -81,12 +83,14 @@ class MultiPassEngine(AbstractEngine):
         except Exception as e:
             ic(e)
             ic({"chunk_ids": self._get_chunks_ids(mini_batch)})
+            record_documents(self, "failed", len(mini_batch))
         else:
             # if there is no exception then this block will be executed
             # we only update schema on the first chunk
             # otherwise it breaks down how the backend handles
             # schema updates
             self._successful_documents += len(mini_batch)
+            record_documents(self, "transformed", len(mini_batch))
             return transformed_batch
 
     def apply(self) -> None:
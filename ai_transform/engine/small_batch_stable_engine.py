@@ -10,7 +10,7 @@
 
 """
 from typing import List
-from ai_transform.logger import format_logging_info, ic
+from ai_transform.logger import format_logging_info, ic, summarize
 from ai_transform.operator.abstract_operator import AbstractOperator
 from ai_transform.dataset.dataset import Dataset
 from ai_transform.engine.abstract_engine import AbstractEngine
@@ -55,7 +55,8 @@ class SmallBatchStableEngine(AbstractEngine):
             update_schema=chunk_counter < self.MAX_SCHEMA_UPDATE_LIMITER,
             ingest_in_background=ingest_in_background,
         )
-        ic(result)
+        if ic.enabled:
+            ic(summarize(result))
 
     def _transform_and_upsert(self, batch_index: int, batch: List[Document]):
         batch_to_insert = []
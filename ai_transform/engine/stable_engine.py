@@ -13,7 +13,7 @@ import logging
 
 from typing import Optional, List
 
-from ai_transform.logger import ic, format_logging_info
+from ai_transform.logger import ic, format_logging_info, summarize
 from ai_transform.dataset.dataset import Dataset
 from ai_transform.operator.abstract_operator import AbstractOperator
 from ai_transform.engine.abstract_engine import AbstractEngine
@@ -77,7 +77,8 @@ class StableEngine(AbstractEngine):
                 update_schema=batch_index < self.MAX_SCHEMA_UPDATE_LIMITER,
                 ingest_in_background=ingest_in_background,
             )
-            ic(result)
+            if ic.enabled:
+                ic(summarize(result))
 
     def apply(self) -> None:
         """
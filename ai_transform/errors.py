@@ -10,6 +10,14 @@ class WorkflowFailedError(Exception):
     pass
 
 
+class CircuitOpenError(ConnectionError):
+    """Raised without calling the API while it looks unavailable"""
+
+
+class PayloadTooLargeError(ValueError):
+    """Raised when a single document is over the request size limit"""
+
+
 class UserFacingError(Exception):
     """This error is shown to the user"""
 
@@ -1,7 +1,6 @@
 import pprint
 import logging
 import datetime
-from icecream import ic
 from typing import Dict, Any, List
 from ai_transform.utils.document import Document
 from ai_transform.utils.document_list import DocumentList
@@ -11,6 +10,35 @@ def format_logging_info(info: Dict[str, Any], indent=4, width=80, depth=None, co
     return "\n" + pprint.pformat(info, indent=indent, width=width, depth=depth, compact=compact, sort_dicts=sort_dicts)
 
 
+def summarize(obj: Any, max_items: int = 10, max_chars: int = 200, depth: int = 4) -> Any:
+    """
+    A bounded copy of `obj` for logging, so that an upsert result or a status
+    payload doesn't format every document. Long lists and strings are cut,
+    lists of numbers (vectors) are replaced by their length.
+    """
+    if isinstance(obj, str):
+        return obj if len(obj) <= max_chars else f"{obj[:max_chars]}... [{len(obj) - max_chars} more chars]"
+    if isinstance(obj, dict):
+        if depth <= 0:
+            return f"<dict of {len(obj)} keys>"
+        summary = {
+            key: summarize(value, max_items, max_chars, depth - 1) for key, value in list(obj.items())[:max_items]
+        }
+        if len(obj) > max_items:
+            summary["..."] = f"{len(obj) - max_items} more keys"
+        return summary
+    if isinstance(obj, (list, tuple)):
+        if obj and len(obj) > max_items and all(isinstance(value, (int, float)) for value in obj[:max_items]):
+            return f"<vector of {len(obj)}>"
+        if depth <= 0:
+            return f"<list of {len(obj)}>"
+        summary = [summarize(value, max_items, max_chars, depth - 1) for value in obj[:max_items]]
+        if len(obj) > max_items:
+            summary.append(f"... {len(obj) - max_items} more items")
+        return summary
+    return obj
+
+
 class Logger:
     def __init__(self):
         self._logger = logging.getLogger("WORKFLOW")
@@ -40,5 +68,32 @@ def time_format():
     return f"{timestamp} | "
 
 
-ic.configureOutput(prefix=time_format, includeContext=True)
+class _LazyIceCream:
+    """
+    icecream's `ic`, only imported the first time it is used.
+    """
+
+    def _debugger(self):
+        debugger = self.__dict__.get("_ic")
+        if debugger is None:
+            from icecream import ic as debugger
+
+            debugger.configureOutput(prefix=time_format, includeContext=True)
+            self.__dict__["_ic"] = debugger
+        return debugger
+
+    @property
+    def __call__(self):
+        # `ic(x)` calls the debugger itself rather than a method of this proxy,
+        # so icecream reads the source and context from the caller's frame
+        return self._debugger()
+
+    def __getattr__(self, name):
+        return getattr(self._debugger(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._debugger(), name, value)
+
+
+ic = _LazyIceCream()
 # Change all printing statements
@@ -0,0 +1,281 @@
+"""In-process metrics
+
+Every `API` request and every engine records into `REGISTRY`:
+
+- `ai_transform_api_requests_total` by method, endpoint and status code
+  (or exception name)
+- `ai_transform_api_request_seconds`, a latency histogram including retries
+- `ai_transform_api_request_bytes_total` and `ai_transform_api_response_bytes_total`
+- `ai_transform_api_retries_total`
+- `ai_transform_engine_documents_total` by engine and stage, which is one of
+  pulled, transformed, failed and upserted
+
+Endpoints are API paths with their ids replaced, i.e.
+`/datasets/{dataset_id}/documents/get_where`.
+
+```
+    from ai_transform.metrics import REGISTRY, serve_metrics
+
+    serve_metrics(port=9100)  # Prometheus text format on /metrics
+    ...
+    REGISTRY.to_json()
+```
+
+Set `AI_TRANSFORM_METRICS_PATH` to dump the registry as JSON when a workflow ends.
+"""
+import os
+import re
+import json
+import bisect
+import threading
+
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+METRICS_PATH = os.getenv("AI_TRANSFORM_METRICS_PATH")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes the labels {self.labelnames}, not {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    @abstractmethod
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        """
+        `(name, labels, value)` for each line of the Prometheus exposition.
+        """
+
+    @abstractmethod
+    def to_json(self) -> List[Dict[str, Any]]:
+        """
+        The metric's values as a list of JSON serialisable dicts.
+        """
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+    def to_json(self) -> List[Dict[str, Any]]:
+        return [{"labels": labels, "value": value} for _, labels, value in self.samples()]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def _snapshot(self) -> Dict[LabelValues, Tuple[List[int], float]]:
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        for key, (counts, total) in self._snapshot().items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+    def to_json(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "labels": dict(zip(self.labelnames, key)),
+                "buckets": dict(zip([_format_value(bound) for bound in self.buckets + (float("inf"),)], counts)),
+                "sum": total,
+                "count": sum(counts),
+            }
+            for key, (counts, total) in self._snapshot().items()
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def reset(self) -> None:
+        """
+        Zeroes every metric, i.e. between benchmark runs.
+        """
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            name: {"type": metric.type, "help": metric.documentation, "samples": metric.to_json()}
+            for name, metric in list(self._metrics.items())
+        }
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for name, metric in list(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+
+REGISTRY = MetricsRegistry()
+
+API_REQUESTS = REGISTRY.counter(
+    "ai_transform_api_requests_total", "API requests by final status", ["method", "endpoint", "status"]
+)
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "ai_transform_api_request_seconds", "API request latency including retries", ["method", "endpoint"]
+)
+API_REQUEST_BYTES = REGISTRY.counter("ai_transform_api_request_bytes_total", "API request body bytes", ["endpoint"])
+API_RESPONSE_BYTES = REGISTRY.counter("ai_transform_api_response_bytes_total", "API response body bytes", ["endpoint"])
+API_RETRIES = REGISTRY.counter("ai_transform_api_retries_total", "API request attempts after the first", ["endpoint"])
+ENGINE_DOCUMENTS = REGISTRY.counter(
+    "ai_transform_engine_documents_total", "Documents handled by engines", ["engine", "stage"]
+)
+
+_ENDPOINT_IDS = [
+    (re.compile(r"^/datasets/(?!list$|create$)[^/]+"), "/datasets/{dataset_id}"),
+    (re.compile(r"^/workflows/[^/]+"), "/workflows/{job_id}"),
+    (re.compile(r"/field_children/(?!list$)[^/]+"), "/field_children/{fieldchildren_id}"),
+]
+
+
+def endpoint_name(suffix: str) -> str:
+    """
+    Replaces the ids in an API path so that endpoints have few distinct names.
+    """
+    endpoint = suffix.split("?", 1)[0]
+    for pattern, replacement in _ENDPOINT_IDS:
+        endpoint = pattern.sub(replacement, endpoint, count=1)
+    return endpoint
+
+
+def record_request(
+    method: str, suffix: str, status: str, seconds: float, attempts: int, request_bytes: int, response_bytes: int
+) -> None:
+    endpoint = endpoint_name(suffix)
+    API_REQUESTS.inc(method=method, endpoint=endpoint, status=status)
+    API_REQUEST_SECONDS.observe(seconds, method=method, endpoint=endpoint)
+    API_REQUEST_BYTES.inc(request_bytes, endpoint=endpoint)
+    API_RESPONSE_BYTES.inc(response_bytes, endpoint=endpoint)
+    if attempts > 1:
+        API_RETRIES.inc(attempts - 1, endpoint=endpoint)
+
+
+def record_documents(engine: Any, stage: str, count: int) -> None:
+    ENGINE_DOCUMENTS.inc(count, engine=type(engine).__name__, stage=stage)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.to_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int = 9100, host: str = "0.0.0.0", registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serves `registry` in Prometheus text format from a daemon thread.
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="ai_transform_metrics", daemon=True).start()
+    return server
@@ -1,7 +1,6 @@
 import json
 import logging
 import warnings
-import numpy as np
 
 from copy import deepcopy
 from abc import ABC, abstractmethod
@@ -11,11 +10,14 @@ from typing import Any, Dict, List, Optional, Union
 from ai_transform.dataset.dataset import Dataset
 from ai_transform.utils.document import Document
 from ai_transform.utils.document_list import DocumentList
+from ai_transform.tracing import span
 
 logger = logging.getLogger(__file__)
 
 
 def are_vectors_similar(vector_1, vector_2):
+    import numpy as np
+
     element_wise_diff = abs(np.array(vector_1)) - abs(np.array(vector_2))
     sums = np.sum(element_wise_diff)
     return sums > 0
@@ -45,7 +47,7 @@ def is_different(field: str, value1: Any, value2: Any) -> bool:
 def get_document_diff(old_document: Document, new_document: Document) -> Document:
     pp_document = Document()
     new_fields = new_document.keys()
-    old_fields = old_document.keys()
+    old_fields = set(old_document.keys())
     for field in new_fields:
         old_value = old_document.get(field, None)
         new_value = new_document.get(field, None)
@@ -59,9 +61,7 @@ def get_document_diff(old_document: Document, new_document: Document) -> Documen
 
         is_chunk_field = is_list and contains_chunks
 
-        if (
-            field not in old_fields or value_diff or field == "_id" or is_chunk_field
-        ) and field not in pp_document.keys():
+        if (field not in old_fields or value_diff or field == "_id" or is_chunk_field) and field not in pp_document:
             pp_document[field] = new_value
 
     if len(pp_document.keys()) > 1:
@@ -130,10 +130,14 @@ class AbstractOperator(ABC):
         return str(type(self).__name__)
 
     def __call__(self, old_documents: DocumentList) -> DocumentList:
-        new_documents = deepcopy(old_documents)
-        new_documents = self.transform(new_documents)
-        if new_documents is not None and self._enable_postprocess:
-            new_documents = self.postprocess(new_documents, old_documents)
+        with span(type(self).__name__, cat="operator", documents=len(old_documents)):
+            with span("deepcopy", cat="operator"):
+                new_documents = deepcopy(old_documents)
+            with span("transform", cat="operator"):
+                new_documents = self.transform(new_documents)
+            if new_documents is not None and self._enable_postprocess:
+                with span("diff", cat="operator"):
+                    new_documents = self.postprocess(new_documents, old_documents)
         return new_documents
 
     @staticmethod
@@ -167,7 +171,8 @@ class AbstractOperator(ABC):
         """
         Transform and upload an object
         """
-        from ai_transform.api.client import Client
+        from ai_transform.api.api import API
+        from ai_transform.api.helpers import process_token
 
         output = self.transform(documents=documents)
         if hasattr(documents, "to_json"):
@@ -176,8 +181,9 @@ class AbstractOperator(ABC):
             for index in range(len(output)):
                 if hasattr(output[index], "to_json"):
                     output[index] = output[index].to_json()
-        client = Client(authorization_token)
-        return client.api._set_workflow_status(
+        # no need to authenticate with a whole Client just to send the status
+        api = API(process_token(authorization_token))
+        return api._set_workflow_status(
             job_id=job_id,
             workflow_name=workflow_name,
             additional_information=additional_information,
@@ -7,6 +7,7 @@ from typing import Dict, Sequence
 from ai_transform.operator.abstract_operator import AbstractOperator
 from ai_transform.utils.document import Document
 from ai_transform.utils.document_list import DocumentList
+from ai_transform.tracing import span
 
 logger = logging.getLogger(__file__)
 
@@ -22,7 +23,8 @@ BAD_OPERATOR_MESSAGE = (
 
 class DenseOperator(AbstractOperator):
     def __call__(self, old_documents: DocumentList) -> DenseOperatorOutput:
-        datum = self.transform(old_documents)
+        with span(type(self).__name__, cat="operator", documents=len(old_documents)):
+            datum = self.transform(old_documents)
         if not isinstance(datum, dict):
             raise ValueError(BAD_OPERATOR_MESSAGE)
         for _, documents in datum.items():
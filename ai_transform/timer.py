@@ -1,8 +1,15 @@
 import os
 import time
 
+from ai_transform.tracing import TRACER
+
 
 class Timer:
+    """
+    Times the whole workflow, across processes, through environment variables.
+    The time is also recorded as the `workflow` span when tracing.
+    """
+
     def start(self) -> None:
         if "_WORKFLOW_START_TIME" not in os.environ:
             os.environ["_WORKFLOW_START_TIME"] = str(time.time())
@@ -14,4 +21,5 @@ class Timer:
             _WORKFLOW_START_TIME = float(os.getenv("_WORKFLOW_START_TIME"))
             _WORKFLOW_FINISH_TIME = float(os.getenv("_WORKFLOW_FINISH_TIME"))
 
+            TRACER.complete("workflow", _WORKFLOW_START_TIME, _WORKFLOW_FINISH_TIME)
             return _WORKFLOW_FINISH_TIME - _WORKFLOW_START_TIME
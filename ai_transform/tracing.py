@@ -0,0 +1,182 @@
+"""Span tracing
+
+A lightweight tracer for where a workflow spends its time: pulling,
+transforming, diffing, serializing and uploading, on every thread. Set
+`AI_TRANSFORM_TRACE_PATH` and the timeline is written as a Chrome trace-event
+JSON file when the workflow ends (or the process exits), open it in
+https://ui.perfetto.dev or chrome://tracing. `{pid}` in the path is replaced
+with the process id, i.e. for engines run in worker processes.
+
+```
+    AI_TRANSFORM_TRACE_PATH=trace.json python main.py
+```
+
+Spans can be added anywhere, they cost next to nothing while tracing is off:
+
+```
+    from ai_transform.tracing import span
+
+    with span("tokenize", batch_size=len(documents)):
+        ...
+```
+"""
+import os
+import json
+import time
+import atexit
+import threading
+
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+
+TRACE_PATH = os.getenv("AI_TRANSFORM_TRACE_PATH")
+
+# spans past this are dropped so that a long job can't run out of memory
+MAX_EVENTS = int(os.getenv("AI_TRANSFORM_TRACE_MAX_EVENTS", 1_000_000))
+
+# perf_counter for precise durations, offset to wall clock time so that spans
+# line up with timestamps from other processes
+_EPOCH = time.time() - time.perf_counter()
+
+
+def _now() -> float:
+    return _EPOCH + time.perf_counter()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = _now()
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.end()
+
+    def end(self) -> None:
+        self.tracer.complete(self.name, self.start, _now(), cat=self.cat, **self.args)
+
+
+class _NullSpan(Span):
+    __slots__ = ()
+
+    def __init__(self):
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(self, enabled: bool = False, max_events: int = MAX_EVENTS):
+        self.enabled = enabled
+        self.max_events = max_events
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+
+    def span(self, name: str, cat: str = "ai_transform", **args) -> Span:
+        """
+        Times the enclosed block, or until `end()` is called on the span.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, cat, args)
+
+    def complete(self, name: str, start: float, end: float, cat: str = "ai_transform", **args) -> None:
+        """
+        Records a span from `start` to `end`, in seconds since the epoch.
+        """
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+            self._threads.clear()
+            self.dropped = 0
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms", "otherData": {"dropped": self.dropped}}
+
+    def write(self, path: Optional[str] = None) -> Optional[str]:
+        path = TRACE_PATH if path is None else path
+        if not path:
+            return None
+        path = path.replace("{pid}", str(os.getpid()))
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+
+TRACER = Tracer(enabled=bool(TRACE_PATH))
+
+
+def span(name: str, cat: str = "ai_transform", **args) -> Span:
+    return TRACER.span(name, cat, **args)
+
+
+def traced(name: Optional[str] = None, cat: str = "ai_transform") -> Callable:
+    """
+    Records a span for every call of the decorated function.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = func.__qualname__ if name is None else name
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(span_name, cat):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def write_trace(path: Optional[str] = None) -> Optional[str]:
+    return TRACER.write(path)
+
+
+if TRACE_PATH:
+    atexit.register(write_trace)
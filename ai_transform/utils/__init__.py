@@ -3,3 +3,21 @@ from ai_transform.utils.document import *
 from ai_transform.utils.example_documents import *
 from ai_transform.utils.json_encoder import *
 from ai_transform.utils.encode_parameters import *
+
+# these need NumPy, so they are only imported once used
+_LAZY = {
+    "CategoricalColumn": "ai_transform.utils.columnar",
+    "Column": "ai_transform.utils.columnar",
+    "ColumnarDocumentList": "ai_transform.utils.columnar",
+    "NumericColumn": "ai_transform.utils.columnar",
+    "SyntheticDocuments": "ai_transform.utils.synthetic",
+    "BLOCK_SIZE": "ai_transform.utils.synthetic",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,130 @@
+"""JSON codecs
+
+Encodes request bodies and decodes responses with the fastest JSON library
+available: orjson, then msgspec, then the standard library. Every codec
+produces the same bytes for the same object.
+
+```
+    from ai_transform.utils.codec import get_codec
+
+    codec = get_codec()
+    body = codec.encode({"documents": documents})
+    response = codec.decode(body)
+```
+
+Set `AI_TRANSFORM_JSON_CODEC` to one of `orjson`, `msgspec` or `json` to
+pick one explicitly.
+"""
+import os
+import json
+
+from typing import Any, Dict, Optional, Type, Union
+
+from ai_transform.utils.serializer import convert, format_key, serialize
+
+
+class JSONCodec:
+    """
+    The standard library codec, always available.
+    """
+
+    name = "json"
+
+    def encode(self, obj: Any) -> bytes:
+        return serialize(obj)
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._orjson = orjson
+        # NumPy is left to `convert` so that float32 values are written exactly
+        # as the standard library codec writes them
+        self._option = orjson.OPT_NON_STR_KEYS
+
+    def encode(self, obj: Any) -> bytes:
+        try:
+            return self._orjson.dumps(obj, default=convert, option=self._option)
+        except (self._orjson.JSONEncodeError, ValueError):
+            # i.e. integers over 64 bits or very deep nesting
+            return super().encode(obj)
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            # i.e. NaN, which orjson doesn't accept
+            return super().decode(data)
+
+
+class MsgspecCodec(JSONCodec):
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+
+        self._msgspec = msgspec
+        self._encoder = msgspec.json.Encoder(enc_hook=self._convert)
+        self._decoder = msgspec.json.Decoder()
+
+    @staticmethod
+    def _convert(obj: Any) -> Any:
+        if obj is None or type(obj) is bool:
+            # msgspec writes these itself as values, so they can only be dict keys
+            return format_key(obj)
+        return convert(obj)
+
+    def encode(self, obj: Any) -> bytes:
+        try:
+            return self._encoder.encode(obj)
+        except (TypeError, ValueError, OverflowError, RecursionError):
+            # i.e. integers over 64 bits or very deep nesting
+            return super().encode(obj)
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._msgspec.DecodeError:
+            return super().decode(data)
+
+
+CODECS: Dict[str, Type[JSONCodec]] = {"orjson": OrjsonCodec, "msgspec": MsgspecCodec, "json": JSONCodec}
+
+_CODEC: Optional[JSONCodec] = None
+
+
+def _load_codec(name: Optional[str] = None) -> JSONCodec:
+    if name is not None:
+        return CODECS[name]()
+
+    for codec in CODECS.values():
+        try:
+            return codec()
+        except ImportError:
+            continue
+    return JSONCodec()
+
+
+def get_codec() -> JSONCodec:
+    """
+    Returns the codec used by the API layer.
+    """
+    global _CODEC
+    if _CODEC is None:
+        _CODEC = _load_codec(os.getenv("AI_TRANSFORM_JSON_CODEC"))
+    return _CODEC
+
+
+def set_codec(name: str) -> JSONCodec:
+    """
+    Switches the codec used by the API layer, i.e. `set_codec("json")`.
+    """
+    global _CODEC
+    _CODEC = _load_codec(name)
+    return _CODEC
@@ -0,0 +1,488 @@
+"""
+Columnar storage for DocumentList.
+
+Vector heavy pages are expensive to hold as nested dictionaries of Python
+floats. `ColumnarDocumentList` keeps selected fields as NumPy columns instead:
+
+- vectors and numerics are stored as NumPy arrays
+- repeated labels (i.e. cluster ids or tags) are dictionary encoded
+
+.. code-block::
+
+    from ai_transform.utils import mock_documents
+
+    documents = mock_documents(100).to_columnar(["sample_1_vector_", "sample_1_label"])
+    vectors = documents.column("sample_1_vector_")  # (100, 5) float32 view
+    codes = documents.column("sample_1_label")  # (100,) int32 view
+    labels = documents.categories("sample_1_label")
+
+Documents can still be accessed one at a time with `documents[i]`. The first
+access materializes a regular `Document` and from then on that `Document` is
+the source of truth for its row, any changes made to it are folded back into
+the columns when `column` is called.
+"""
+import numpy as np
+
+from abc import ABC, abstractmethod
+from copy import deepcopy
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from ai_transform.utils.document import Document
+from ai_transform.utils.document_list import DocumentList
+from ai_transform.utils.json_encoder import json_encoder
+
+_MISSING = object()
+
+
+class Column(ABC):
+    """
+    The values of a single field across every document of a ColumnarDocumentList.
+    """
+
+    def __init__(self, values: np.ndarray, present: Optional[np.ndarray] = None):
+        self.values = values
+        # `None` means the field is present in every document
+        self.present = present
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def is_present(self, index: int) -> bool:
+        return self.present is None or bool(self.present[index])
+
+    def set_present(self, index: int, present: bool) -> None:
+        if self.present is None:
+            if present:
+                return
+            self.present = np.ones(len(self.values), dtype=bool)
+        self.present[index] = present
+
+    @abstractmethod
+    def take(self, key: slice) -> "Column":
+        """
+        The rows in `key` as a new column, sharing memory where possible.
+        """
+
+    @abstractmethod
+    def get(self, index: int) -> Any:
+        """
+        The value at `index`, or `_MISSING` if the document doesn't have the field.
+        """
+
+    @abstractmethod
+    def set(self, index: int, value: Any) -> None:
+        """
+        Sets the value at `index`, `_MISSING` removes it.
+        """
+
+    @abstractmethod
+    def to_list(self) -> List[Any]:
+        """
+        Every value as a plain Python object, `_MISSING` where absent.
+        """
+
+
+class NumericColumn(Column):
+    """
+    Numbers are stored as a 1d array, vectors as a 2d array.
+    """
+
+    def take(self, key: slice) -> "NumericColumn":
+        return NumericColumn(self.values[key], None if self.present is None else self.present[key])
+
+    def get(self, index: int) -> Any:
+        if not self.is_present(index):
+            return _MISSING
+        value = self.values[index]
+        if self.values.ndim > 1:
+            return value.tolist()
+        return value.item()
+
+    def set(self, index: int, value: Any) -> None:
+        if value is _MISSING:
+            self.set_present(index, False)
+        else:
+            if self.values.ndim > 1 and len(value) != self.values.shape[1]:
+                raise ValueError(f"Expected a vector of length {self.values.shape[1]}, got {len(value)}")
+            self.values[index] = value
+            self.set_present(index, True)
+
+    def to_list(self) -> List[Any]:
+        values = self.values.tolist()
+        if self.values.dtype.kind == "f":
+            if self.values.ndim > 1:
+                nan_rows = np.flatnonzero(np.isnan(self.values).any(axis=1))
+                for index in nan_rows.tolist():
+                    values[index] = json_encoder(values[index])
+            else:
+                for index in np.flatnonzero(np.isnan(self.values)).tolist():
+                    values[index] = None
+        if self.present is not None:
+            for index in np.flatnonzero(~self.present).tolist():
+                values[index] = _MISSING
+        return values
+
+
+class CategoricalColumn(Column):
+    """
+    Labels are stored as integer codes into a shared list of categories.
+    A code of -1 marks a missing value.
+    """
+
+    def __init__(self, values: np.ndarray, categories: List[Any], lookup: Optional[Dict[Any, int]] = None):
+        super().__init__(values)
+        self.categories = categories
+        self.lookup = {category: code for code, category in enumerate(categories)} if lookup is None else lookup
+
+    @classmethod
+    def from_values(cls, values: Sequence[Any]) -> "CategoricalColumn":
+        column = cls(np.empty(len(values), dtype=np.int32), [])
+        column.values[:] = [column._encode(value) for value in values]
+        return column
+
+    def _encode(self, value: Any) -> int:
+        if value is _MISSING:
+            return -1
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.categories)
+            self.categories.append(value)
+        return code
+
+    def is_present(self, index: int) -> bool:
+        return bool(self.values[index] >= 0)
+
+    def take(self, key: slice) -> "CategoricalColumn":
+        # slices share their categories so codes stay comparable
+        return CategoricalColumn(self.values[key], self.categories, self.lookup)
+
+    def get(self, index: int) -> Any:
+        code = int(self.values[index])
+        return _MISSING if code < 0 else self.categories[code]
+
+    def set(self, index: int, value: Any) -> None:
+        self.values[index] = self._encode(value)
+
+    def to_list(self) -> List[Any]:
+        categories = self.categories
+        return [_MISSING if code < 0 else categories[code] for code in self.values.tolist()]
+
+
+def _pop_path(row: Dict[str, Any], path: str) -> Any:
+    """
+    Removes `path` from `row`, copying every dictionary along the way so the
+    original document is left untouched.
+    """
+    fields = path.split(".")
+    obj = row
+    for field in fields[:-1]:
+        child = obj.get(field)
+        if not isinstance(child, dict):
+            return _MISSING
+        obj[field] = child = dict(child)
+        obj = child
+    return obj.pop(fields[-1], _MISSING)
+
+
+def _put_path(row: Dict[str, Any], path: str, value: Any) -> None:
+    """
+    Sets `path` in `row`, copying every dictionary along the way so that rows
+    sharing nested dictionaries are not affected.
+    """
+    fields = path.split(".")
+    obj = row
+    for field in fields[:-1]:
+        child = obj.get(field)
+        obj[field] = child = {} if not isinstance(child, dict) else dict(child)
+        obj = child
+    obj[fields[-1]] = value
+
+
+def _build_column(values: List[Any], vector_dtype: Any, repeated_only: bool = False) -> Optional[Column]:
+    present = [value for value in values if value is not _MISSING]
+    if not present or len({type(value) for value in present}) > 1:
+        return None
+
+    sample = present[0]
+    if isinstance(sample, str):
+        if repeated_only and len(set(present)) > len(present) // 2:
+            return None
+        return CategoricalColumn.from_values(values)
+
+    if isinstance(sample, (bool, int, float)):
+        array = np.asarray(present)
+    elif isinstance(sample, list) and sample and isinstance(sample[0], (int, float)):
+        try:
+            array = np.asarray(present)
+        except ValueError:
+            # ragged vectors
+            return None
+        if array.ndim != 2:
+            return None
+        array = array.astype(vector_dtype, copy=False)
+    else:
+        return None
+
+    if array.dtype.kind not in "biuf":
+        return None
+
+    if len(present) == len(values):
+        return NumericColumn(array)
+
+    mask = np.array([value is not _MISSING for value in values], dtype=bool)
+    filled = np.zeros((len(values),) + array.shape[1:], dtype=array.dtype)
+    filled[mask] = array
+    return NumericColumn(filled, mask)
+
+
+class ColumnarDocumentList(DocumentList):
+    """
+    A DocumentList that keeps selected fields as columns.
+
+    Parameters
+    ------------
+    initlist: list
+        The documents to store
+    columns: list
+        The fields (dotted paths are supported for nested dictionaries) to store as
+        columns. When not set, top level vectors, numerics and repeated labels are
+        detected from the documents.
+    vector_dtype:
+        The dtype that vectors are stored as
+    """
+
+    def __init__(self, initlist=None, columns: Optional[Sequence[str]] = None, vector_dtype: Any = np.float32):
+        super().__init__()
+        self._columns: Dict[str, Column] = {}
+        # slices are views into the columns of the list they were taken from
+        self._base: Optional[Tuple["ColumnarDocumentList", int]] = None
+
+        if initlist is None:
+            return
+
+        if isinstance(initlist, ColumnarDocumentList):
+            if columns is None:
+                columns = initlist.columns
+            initlist = initlist.to_rows()
+
+        documents = initlist.data if isinstance(initlist, DocumentList) else list(initlist)
+        rows = [dict(document) for document in documents]
+
+        repeated_only = columns is None
+        columns = [] if columns is None else list(columns)
+        if repeated_only:
+            for row in rows:
+                for field in row:
+                    if field != "_id" and field not in columns:
+                        columns.append(field)
+
+        for path in columns:
+            values = [_pop_path(row, path) for row in rows]
+            column = _build_column(values, vector_dtype=vector_dtype, repeated_only=repeated_only)
+            if column is None:
+                # not columnar, put the values back where they were
+                for row, value in zip(rows, values):
+                    if value is not _MISSING:
+                        _put_path(row, path, value)
+            else:
+                self._columns[path] = column
+
+        self.data = rows
+
+    @classmethod
+    def _from_parts(cls, rows: List[Any], columns: Dict[str, Column]) -> "ColumnarDocumentList":
+        documents = cls()
+        documents.data = rows
+        documents._columns = columns
+        return documents
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def _document(self, index: int) -> Document:
+        row = self.data[index]
+        if isinstance(row, Document):
+            return row
+
+        if self._base is not None:
+            # materialize through the parent so both lists share the document
+            base, start = self._base
+            document = base._document(start + (index % len(self.data)))
+        else:
+            document = Document(row)
+            for path, column in self._columns.items():
+                value = column.get(index)
+                if value is not _MISSING:
+                    _put_path(document, path, value)
+        self.data[index] = document
+        return document
+
+    def _sync(self, path: str) -> None:
+        # materialized documents own their values, write them back to the column
+        column = self._columns[path]
+        for index, row in enumerate(self.data):
+            if isinstance(row, Document):
+                column.set(index, row[path] if path in row else _MISSING)
+
+    def column(self, path: str) -> np.ndarray:
+        """
+        Returns the values of `path` as a NumPy array without copying them.
+        Labels are returned as their integer codes, see `categories`.
+        Missing values are zeros (or -1 for labels).
+        """
+        if path not in self._columns:
+            return super().column(path)
+        self._sync(path)
+        return self._columns[path].values
+
+    def categories(self, path: str) -> List[Any]:
+        """
+        The values that the codes returned by `column` index into.
+        """
+        column = self._columns[path]
+        if not isinstance(column, CategoricalColumn):
+            raise ValueError(f"`{path}` is not a label column")
+        return column.categories
+
+    def set_column(self, path: str, values: Union[np.ndarray, Sequence[Any]]) -> None:
+        """
+        Sets `path` for every document. NumPy arrays are stored without copying.
+        """
+        if len(values) != len(self.data):
+            raise ValueError("The length of your values should be the same as your documents")
+
+        if isinstance(values, np.ndarray) and values.dtype.kind in "biuf":
+            column = NumericColumn(values)
+        else:
+            column = _build_column(list(values), vector_dtype=np.float32)
+            if column is None:
+                self[path] = list(values)
+                return
+
+        if self._base is not None:
+            # rows are shared with the parent list, so write through the documents
+            for index, value in enumerate(column.to_list()):
+                self._document(index)[path] = value
+            return
+
+        self._columns[path] = column
+        for index, row in enumerate(self.data):
+            if isinstance(row, Document):
+                row[path] = column.get(index)
+            else:
+                # the column now owns this field
+                _pop_path(row, path)
+
+    def _to_rows(self) -> None:
+        # Structural changes (inserting, sorting, ...) drop back to row storage
+        for index in range(len(self.data)):
+            self._document(index)
+        self._columns = {}
+        self._base = None
+
+    def __getitem__(self, key: Union[str, int, slice]) -> Document:
+        if isinstance(key, slice):
+            start, _, step = key.indices(len(self.data))
+            if step != 1:
+                return self.to_rows()[key]
+            rows = self.data[key]
+            columns = {path: column.take(key) for path, column in self._columns.items()}
+            documents = self._from_parts(rows, columns)
+            documents._base = (self, start) if self._base is None else (self._base[0], self._base[1] + start)
+            return documents
+        if isinstance(key, str) and key in self._columns:
+            self._sync(key)
+            values = self._columns[key].to_list()
+            if all(value is not _MISSING for value in values):
+                return values
+        return super().__getitem__(key)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "ColumnarDocumentList":
+        columns = {}
+        for path, column in self._columns.items():
+            column = deepcopy(column, memo)
+            # slices hold views, copy only the rows that belong to this list
+            column.values = column.values.copy()
+            columns[path] = column
+        return self._from_parts(deepcopy(self.data, memo), columns)
+
+    def __add__(self, other):
+        return self.to_rows() + other
+
+    def __radd__(self, other):
+        return DocumentList(other) + self.to_rows()
+
+    def __mul__(self, n: int):
+        return self.to_rows() * n
+
+    __rmul__ = __mul__
+
+    def __setitem__(self, key: Union[str, int], value: Any):
+        if isinstance(key, str) and key in self._columns and isinstance(value, (list, np.ndarray)):
+            return self.set_column(key, value)
+        if not isinstance(key, str):
+            self._to_rows()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._to_rows()
+        super().__delitem__(key)
+
+    def __iadd__(self, other):
+        self._to_rows()
+        return super().__iadd__(other)
+
+    def append(self, item):
+        self._to_rows()
+        super().append(item)
+
+    def insert(self, index, item):
+        self._to_rows()
+        super().insert(index, item)
+
+    def extend(self, other):
+        self._to_rows()
+        super().extend(other)
+
+    def pop(self, index: int = -1) -> Document:
+        self._to_rows()
+        return super().pop(index)
+
+    def remove(self, item):
+        self._to_rows()
+        super().remove(item)
+
+    def clear(self):
+        self._to_rows()
+        super().clear()
+
+    def reverse(self):
+        self._to_rows()
+        super().reverse()
+
+    def sort(self, *args, **kwargs):
+        self._to_rows()
+        super().sort(*args, **kwargs)
+
+    def to_rows(self) -> DocumentList:
+        """
+        Returns a regular DocumentList of the same documents.
+        """
+        return DocumentList([self._document(index) for index in range(len(self.data))])
+
+    def to_json(self):
+        columns = {path: column.to_list() for path, column in self._columns.items()}
+
+        documents = []
+        for index, row in enumerate(self.data):
+            if isinstance(row, Document):
+                documents.append(row.to_json())
+                continue
+
+            document = Document(json_encoder(row))
+            for path, values in columns.items():
+                if values[index] is not _MISSING:
+                    document[path] = values[index]
+            documents.append(dict(document))
+        return documents
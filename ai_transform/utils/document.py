@@ -2,92 +2,196 @@ import re
 import uuid
 import pprint
 
-from typing import Dict, Any
 from copy import deepcopy
-from typing import Any, Optional
-from collections import UserDict
+from typing import Any, Dict, List, Optional
 
 from ai_transform.utils.json_encoder import json_encoder
 
 
-class Document(UserDict):
-    def __repr__(self):
-        return pprint.pformat(self.to_json(), indent=4, width=40)
-
-    def __setitem__(self, key: Any, value: Any) -> None:
-        try:
-            fields = key.split(".")
-        except:
-            super().__setitem__(key, value)
+_MISSING = object()
+
+
+def _has_path(obj: Any, fields: List[str]) -> bool:
+    # Walks the same paths that `Document.keys` would list, so that a
+    # membership check costs O(depth) instead of flattening the document.
+    for field in fields:
+        if isinstance(obj, dict):
+            if not dict.__contains__(obj, field):
+                return False
+            obj = dict.__getitem__(obj, field)
+        elif isinstance(obj, list):
+            if not field.isdigit() or int(field) >= len(obj):
+                return False
+            obj = obj[int(field)]
+            # list indices are only keys when they hold nested documents
+            if not isinstance(obj, dict):
+                return False
         else:
-            obj = self.data
-            for level, (curr_field, next_field) in enumerate(zip(fields, fields[1:])):
-                if curr_field.isdigit() and level >= 1:
-                    curr_field = int(curr_field)
-
-                if (isinstance(obj, dict) and (curr_field not in obj)) or (
-                    isinstance(obj, list) and (curr_field >= len(obj))
-                ):
-                    if next_field.isdigit():
-                        obj[curr_field] = [{}]
-                    else:
-                        if isinstance(curr_field, int):
-                            curr_field = min(len(obj) - 1, int(curr_field))
-                            if next_field not in obj[curr_field]:
-                                obj[curr_field] = {}
-                        else:
-                            obj[curr_field] = {}
-
-                try:
-                    obj = obj[curr_field]
-                except IndexError:
-                    obj = obj[0]
-                except KeyError:
-                    obj = obj[curr_field]
-
-            if fields[-1].isdigit() and (len(fields) > 1):
-                field = min(len(obj) - 1, int(fields[-1]))
-            else:
-                field = fields[-1]
-            obj[field] = value
+            return False
+    return True
 
-    def __getitem__(self, key: Any) -> Any:
-        try:
-            fields = key.split(".")
-        except:
-            return super().__getitem__(key)
-        else:
-            obj = self.data
-            for level, field in enumerate(fields[:-1]):
-                if field.isdigit() and level >= 1:
-                    field = int(field)
 
-                obj = obj[field]
+def _get_path(obj: Any, fields: List[str]) -> Any:
+    # `fields` are everything below the top level of the document
+    for field in fields[:-1]:
+        if field.isdigit():
+            field = int(field)
+        obj = obj[field]
+
+    field = fields[-1]
+    if field.isdigit():
+        field = min(len(obj) - 1, int(field))
+    return obj[field]
 
-            if fields[-1].isdigit() and len(fields) > 1:
-                field = min(len(obj) - 1, int(fields[-1]))
+
+def _set_path(obj: Any, fields: List[str], value: Any) -> None:
+    for curr_field, next_field in zip(fields, fields[1:]):
+        if curr_field.isdigit():
+            curr_field = int(curr_field)
+
+        if (isinstance(obj, dict) and (curr_field not in obj)) or (isinstance(obj, list) and (curr_field >= len(obj))):
+            if next_field.isdigit():
+                obj[curr_field] = [{}]
             else:
-                field = fields[-1]
-            return obj[field]
+                if isinstance(curr_field, int):
+                    curr_field = min(len(obj) - 1, int(curr_field))
+                    if next_field not in obj[curr_field]:
+                        obj[curr_field] = {}
+                else:
+                    obj[curr_field] = {}
 
-    def __delitem__(self, key):
         try:
-            fields = key.split(".")
-        except:
-            return super().__getitem__(key)
-        else:
-            obj = self.data
-            for field in fields[:-1]:
-                if field.isdigit():
-                    field = int(field)
+            obj = obj[curr_field]
+        except IndexError:
+            obj = obj[0]
+
+    field = fields[-1]
+    if field.isdigit():
+        field = min(len(obj) - 1, int(field))
+    obj[field] = value
+
+
+def _del_path(obj: Any, fields: List[str]) -> None:
+    for field in fields[:-1]:
+        if field.isdigit():
+            field = int(field)
+        obj = obj[field]
+
+    field = fields[-1]
+    if field.isdigit():
+        field = min(len(obj) - 1, int(field))
+    del obj[field]
+
+
+def _get_fields(document: Dict[str, Any], fields: List[str]) -> Any:
+    # The first field is always a key of the document, even if it is all digits
+    value = dict.__getitem__(document, fields[0])
+    if len(fields) == 1:
+        return value
+    return _get_path(value, fields[1:])
+
+
+def _set_fields(document: Dict[str, Any], fields: List[str], value: Any) -> None:
+    if len(fields) == 1:
+        return dict.__setitem__(document, fields[0], value)
+    if not dict.__contains__(document, fields[0]):
+        dict.__setitem__(document, fields[0], [{}] if fields[1].isdigit() else {})
+    _set_path(dict.__getitem__(document, fields[0]), fields[1:], value)
+
+
+def has_multiple_keys(document: Dict[str, Any]) -> bool:
+    """
+    Equivalent to `len(Document(document).keys()) > 1` without flattening the document.
+    """
+    if len(document) > 1:
+        return True
+    for value in dict.values(document):
+        if isinstance(value, dict):
+            return len(value) > 0
+        if isinstance(value, list):
+            return any(isinstance(item, dict) for item in value)
+    return False
+
+
+class Document(dict):
+    """
+    A dictionary that supports dotted paths, i.e. `document["a.b.0.c"]`.
+
+    Only top level keys are stored on the object itself, nested values are
+    plain dictionaries and lists.
+    """
+
+    # `_keys` is a lazily built index of `keys()`, dropped on every write. Once
+    # a nested dict or list has been handed out (by indexing, `get`, `items()`,
+    # `values()`, a copy and so on) whoever holds it can change the document
+    # without it knowing, so `_keys` is set to False and never built again.
+    __slots__ = ("_keys",)
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+        super().__init__()
+        self._keys = None
+        if data is not None:
+            self.update(data)
+        if kwargs:
+            self.update(kwargs)
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        # Kept for compatibility with code written against the `UserDict` Document
+        return self
+
+    def __repr__(self):
+        return pprint.pformat(self.to_json(), indent=4, width=40)
 
-                obj = obj[field]
+    def __copy__(self) -> "Document":
+        document = self.__class__()
+        dict.update(document, self)
+        # the copy shares its nested values with this document
+        self._keys = document._keys = False
+        return document
 
-            if fields[-1].isdigit():
-                field = min(len(obj) - 1, int(fields[-1]))
-            else:
-                field = fields[-1]
-            del obj[field]
+    copy = __copy__
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Document":
+        document = self.__class__()
+        memo[id(self)] = document
+        for key, value in dict.items(self):
+            dict.__setitem__(document, key, deepcopy(value, memo))
+        return document
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def _invalidate(self) -> None:
+        if self._keys is not False:
+            self._keys = None
+
+    def _lookup(self, key: Any) -> Any:
+        if not isinstance(key, str) or "." not in key:
+            return dict.__getitem__(self, key)
+        return _get_fields(self, key.split("."))
+
+    def _hand_out(self, value: Any) -> Any:
+        if isinstance(value, (dict, list)):
+            self._keys = False
+        return value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._invalidate()
+        if not isinstance(key, str) or "." not in key:
+            return dict.__setitem__(self, key, value)
+        _set_fields(self, key.split("."), value)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._hand_out(self._lookup(key))
+
+    def __delitem__(self, key: Any) -> None:
+        self._invalidate()
+        if not isinstance(key, str) or "." not in key:
+            return dict.__delitem__(self, key)
+
+        fields = key.split(".")
+        _del_path(dict.__getitem__(self, fields[0]), fields[1:])
 
     def get(self, key: Any, default: Optional[Any] = None) -> Any:
         try:
@@ -95,43 +199,99 @@ class Document(UserDict):
         except:
             return default
 
+    def pop(self, key: Any, default: Any = _MISSING) -> Any:
+        try:
+            # the popped value is no longer part of the document
+            value = self._lookup(key)
+        except KeyError:
+            if default is _MISSING:
+                raise
+            return default
+        del self[key]
+        return value
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            self[key] = default
+        return self._hand_out(default)
+
+    def update(self, *args, **kwargs) -> None:
+        self._invalidate()
+        if len(args) == 1 and not kwargs and isinstance(args[0], dict):
+            items = args[0]
+        else:
+            items = dict(*args, **kwargs)
+
+        for key in items:
+            if isinstance(key, str) and "." in key:
+                # dotted keys are expanded into nested dictionaries
+                for key, value in items.items():
+                    self[key] = value
+                return
+        dict.update(self, items)
+
+    def popitem(self) -> Any:
+        self._invalidate()
+        return dict.popitem(self)
+
+    def clear(self) -> None:
+        self._invalidate()
+        dict.clear(self)
+
+    def items(self):
+        self._keys = False
+        return dict.items(self)
+
+    def values(self):
+        self._keys = False
+        return dict.values(self)
+
     def set(self, key: Any, value: Any) -> None:
         self.__setitem__(key, value)
 
-    def keys(self):
-        def get_keys(dictionary: Dict[str, Any], prefix=""):
-            keys = []
-            for key, value in dictionary.items():
+    def keys(self) -> List[str]:
+        if self._keys:
+            return list(self._keys)
+        keys = self._build_keys()
+        if self._keys is None:
+            self._keys = keys
+        return list(keys)
+
+    def _build_keys(self) -> List[str]:
+        keys = set()
+
+        def add_keys(dictionary: Dict[str, Any], prefix: str = "") -> None:
+            for key, value in dict.items(dictionary):
                 current_key = prefix + "." + key if prefix else key
+                keys.add(current_key)
+                if "." in key:
+                    # a dotted key is also listed under each of its parts
+                    subkeys = current_key.split(".")
+                    keys.update(".".join(subkeys[:i]) for i in range(1, len(subkeys)))
                 if isinstance(value, dict):
-                    keys.extend(get_keys(value, current_key))
+                    add_keys(value, current_key)
                 elif isinstance(value, list):
                     for i, item in enumerate(value):
                         if isinstance(item, dict):
-                            keys.extend(get_keys(item, current_key + "." + str(i)))
-                    keys.append(current_key)
-                else:
-                    keys.append(current_key)
-            if prefix:
-                keys.append(prefix)
-            return keys
-
-        keys = set(get_keys(self.data))
+                            keys.add(current_key + "." + str(i))
+                            add_keys(item, current_key + "." + str(i))
 
-        keys_to_add = set()
-        for key in keys:
-            subkeys = key.split(".")
-            for i in range(1, len(subkeys)):
-                keys_to_add.add(".".join(subkeys[:i]))
-        keys.update(keys_to_add)
-
-        return list(sorted(keys))
+        add_keys(self)
+        return sorted(keys)
 
     def __contains__(self, key) -> bool:
-        return key in self.keys()
+        if not isinstance(key, str) or "." not in key:
+            return dict.__contains__(self, key)
+        return _has_path(self, key.split("."))
+
+    def has_multiple_keys(self) -> bool:
+        return has_multiple_keys(self)
 
     def to_json(self):
-        return json_encoder(deepcopy(self.data))
+        # json_encoder builds new containers, so there's no need to copy first
+        return json_encoder(self)
 
     def list_chunks(self):
         """
@@ -155,29 +315,51 @@ class Document(UserDict):
             docs = [{field: values[i], "_order_": i} for i in range(len(values))]
         return DocumentList(docs)
 
+    def _fuzzy_offset(self, text_to_find: str, string: str) -> List[Dict[str, int]]:
+        from fuzzysearch import find_near_matches
+
+        matches = find_near_matches(text_to_find, string, max_l_dist=2)
+        return [{"start": m.start, "end": m.end} for m in matches]
+
     def _calculate_offset(self, text_to_find, string):
         try:
             result = [{"start": m.start(), "end": m.end()} for m in re.finditer(text_to_find, string)]
-        except Exception as e:
-            import traceback
-
-            traceback.print_exc()
-            # this is the error this exception aims to solve
-            #     for m in re.finditer(text_to_find, string)
-            #     return _compile(pattern, flags).finditer(string)
-            #     p = sre_compile.compile(pattern, flags)
-            #     p = sre_parse.parse(p, flags)
-            #     p = _parse_sub(source, state, flags & SRE_FLAG_VERBOSE, 0)
-            #     itemsappend(_parse(source, state, verbose, nested + 1,
-            #     raise source.error("nothing to repeat",
-            # re.error: nothing to repeat at position 0
-            # instead, we will use fuzzysearch
-            from fuzzysearch import find_near_matches
-
-            matches = find_near_matches(text_to_find, string, max_l_dist=2)
-            result = [{"start": m.start, "end": m.end} for m in matches]
+        except re.error:
+            # `text_to_find` isn't a valid pattern (i.e. "* item"), look for it
+            # literally and only fall back to fuzzysearch if it isn't there
+            result = []
+            start = string.find(text_to_find)
+            while start >= 0:
+                result.append({"start": start, "end": start + len(text_to_find)})
+                start = string.find(text_to_find, start + max(len(text_to_find), 1))
+            if not result:
+                result = self._fuzzy_offset(text_to_find, string)
         return result
 
+    def _find_offsets(self, values: List[str], string: str) -> List[List[Dict[str, int]]]:
+        """
+        Finds each value in `string` with a cursor that only moves forward, so
+        that a whole split is linear in the length of `string`.
+        """
+        offsets = []
+        cursor = 0
+        for value in values:
+            start = string.find(value, cursor)
+            if start < 0:
+                # the splitter may have reordered the values
+                start = string.find(value)
+
+            if start >= 0:
+                offsets.append([{"start": start, "end": start + len(value)}])
+                cursor = start + 1
+            else:
+                # the splitter may have normalised the text
+                fuzzy_offsets = self._fuzzy_offset(value, string)
+                if fuzzy_offsets:
+                    cursor = fuzzy_offsets[0]["start"] + 1
+                offsets.append(fuzzy_offsets)
+        return offsets
+
     def set_chunk(self, chunk_field: str, field: str, values: list, generate_id: bool = False):
         """
         doc.list_chunks()
@@ -201,22 +383,42 @@ class Document(UserDict):
         default: Any = None,
         include_offsets: bool = True,
         generate_id: bool = False,
+        offset_mode: str = "regex",
     ):
         """
         The split operation is as follows:
 
         The split operation returns to us a list of possible values.
         The chunk documents are then created automatically for you.
+
+        Offsets are found with `offset_mode`:
+            "regex": every match of each value, treated as a pattern
+            "find": the next exact occurrence of each value, in linear time
+
+        If the split operation returns `(value, start, end)` spans instead of
+        values, the spans are used as the offsets directly.
         """
         if default is None:
             default = []
         value = self.get(field, default)
         split_values = split_operation(value)
+
+        spans = None
+        if split_values and isinstance(split_values[0], tuple) and len(split_values[0]) == 3:
+            spans = [[{"start": start, "end": end}] for _, start, end in split_values]
+            split_values = [split_value for split_value, _, _ in split_values]
+
         chunk_documents = self._create_chunk_documents(field=field, values=split_values, generate_id=generate_id)
 
         if include_offsets:
-            for i, d in enumerate(chunk_documents):
-                offsets = self._calculate_offset(d[field], value)
+            if spans is None:
+                if offset_mode == "find":
+                    spans = self._find_offsets(split_values, value)
+                elif offset_mode == "regex":
+                    spans = [self._calculate_offset(split_value, value) for split_value in split_values]
+                else:
+                    raise ValueError(f"Unknown offset_mode {offset_mode}, expected 'regex' or 'find'")
+            for d, offsets in zip(chunk_documents.data, spans):
                 d["_offsets_"] = offsets
 
         self.set(chunk_field, chunk_documents)
@@ -3,76 +3,182 @@ import warnings
 import itertools
 
 from collections import UserList
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterator, List, Union
 
-from ai_transform.utils.document import Document
+from ai_transform.utils.document import Document, _get_fields, _set_fields
 
 
-class DocumentList(UserList):
-    data: List[Document]
+def _get(obj: Any, fields: List[str], default: Any = None) -> Any:
+    try:
+        return _get_fields(obj, fields)
+    except (KeyError, IndexError, TypeError):
+        return default
+
 
-    def __init__(self, initlist=None):
-        if initlist is not None:
-            for index, document in enumerate(initlist):
-                if not isinstance(document, Document):
-                    initlist[index] = Document(document)
-        super().__init__(initlist)
+class DocumentList(UserList):
+    # Raw dictionaries (i.e. from a get_where response) are stored as they are
+    # and only wrapped in a `Document` the first time they are accessed.
+    data: List[Union[Document, Dict[str, Any]]]
 
     def __repr__(self):
         return pprint.pformat(self.to_json(), indent=4, width=40)
 
+    def _document(self, index: int) -> Document:
+        document = self.data[index]
+        if not isinstance(document, Document):
+            document = self.data[index] = Document(document)
+        return document
+
+    def __iter__(self) -> Iterator[Document]:
+        for index in range(len(self.data)):
+            yield self._document(index)
+
     def __getitem__(self, key: Union[str, int]) -> Document:
         if isinstance(key, str):
-            return [document[key] for document in self.data]
+            return [document[key] for document in self]
         elif isinstance(key, slice):
+            # wrap first so that the slice and this list share the same documents
+            for index in range(*key.indices(len(self.data))):
+                self._document(index)
             return self.__class__(self.data[key])
         elif isinstance(key, int):
-            return self.data[key]
+            return self._document(key)
 
     def __setitem__(self, key: Union[str, int], value: Union[Any, List[Any]]):
         if isinstance(key, str):
             if isinstance(value, list):
-                for document, value in zip(self.data, value):
+                for document, value in zip(self, value):
                     document[key] = value
             else:
-                for document in self.data:
+                for document in self:
                     document[key] = value
         elif isinstance(key, int):
             self.data[key] = value
 
+    def pop(self, index: int = -1) -> Document:
+        document = self._document(index)
+        del self.data[index]
+        return document
+
     def to_json(self):
-        return [document.to_json() for document in self.data]
+        return [document.to_json() for document in self]
+
+    def column(self, path: str):
+        """
+        Returns the values of `path` across all documents as a NumPy array.
+        """
+        import numpy as np
+
+        return np.array(self[path])
+
+    def to_columnar(self, columns: List[str] = None, **kwargs):
+        """
+        Returns the same documents with `columns` stored as NumPy arrays.
+        See `ai_transform.utils.columnar.ColumnarDocumentList`.
+        """
+        from ai_transform.utils.columnar import ColumnarDocumentList
+
+        return ColumnarDocumentList(self, columns=columns, **kwargs)
 
     def _flatten_list(self, list_of_lists):
         flat_list = itertools.chain(*list_of_lists)
         return list(flat_list)
 
+    def _chunks(self, chunk_field: str) -> Iterator[List[Dict[str, Any]]]:
+        # Reads chunks straight from the stored dictionaries, without wrapping them
+        chunk_fields = chunk_field.split(".")
+        for document in self.data:
+            chunks = _get(document, chunk_fields)
+            yield chunks if isinstance(chunks, list) else []
+
+    def chunk_offsets(self, chunk_field: str):
+        """
+        Returns a CSR style offsets array of length `len(self) + 1`, the chunks
+        of document `i` are `offsets[i]:offsets[i + 1]` of the flattened chunks.
+        """
+        import numpy as np
+
+        offsets = np.zeros(len(self.data) + 1, dtype=np.int64)
+        np.cumsum([len(chunks) for chunks in self._chunks(chunk_field)], out=offsets[1:])
+        return offsets
+
+    def flatten_chunks(self, chunk_field: str, field: str, default: Any = None, dtype: Any = None):
+        """
+        Returns the values of `field` across every chunk of every document, along
+        with the offsets from `chunk_offsets`.
+
+        Vectors (and any values when `dtype` is given) are returned as a single
+        NumPy array, everything else as a list.
+        """
+        import numpy as np
+
+        fields = field.split(".")
+        lengths = []
+        values = []
+        for chunks in self._chunks(chunk_field):
+            lengths.append(len(chunks))
+            values.extend(_get(chunk, fields, default) for chunk in chunks)
+
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        if dtype is not None or (values and isinstance(values[0], (list, np.ndarray))):
+            try:
+                array = np.asarray(values, dtype=dtype)
+            except ValueError:
+                # ragged or mixed values
+                pass
+            else:
+                if array.dtype != object:
+                    return array, offsets
+        return values, offsets
+
+    def unflatten_chunks(self, chunk_field: str, field: str, values: Any, offsets: Any = None) -> None:
+        """
+        Writes flat `values` (i.e. from `flatten_chunks`) back into `field` of
+        each chunk, in place and in a single pass. There must be exactly one
+        value per chunk, documents without chunks are left as they are.
+        """
+        if offsets is None:
+            offsets = self.chunk_offsets(chunk_field)
+        if int(offsets[-1]) != len(values):
+            raise ValueError("Number of chunks do not match with number of values - check logic.")
+        if hasattr(values, "tolist"):
+            values = values.tolist()
+
+        fields = field.split(".")
+        for index, document in enumerate(self):
+            start, end = int(offsets[index]), int(offsets[index + 1])
+            if start == end:
+                continue
+            for chunk, value in zip(document[chunk_field], values[start:end]):
+                _set_fields(chunk, fields, value)
+
     def set_chunk_values(self, chunk_field: str, output_field: str, chunk_values: List[List[Any]], sortby: str = None):
         if sortby is None:
-            if any("_order_" in key for key in self.data[0].keys()):
+            if any("_order_" in key for key in self[0].keys()):
                 sortby = "_order_"
 
         assert len(chunk_values) == len(
             self.data
         ), "The length of your values array should be the same as your documents"
 
-        for document, chunk_labels in zip(self.data, chunk_values):
+        fields = output_field.split(".")
+        for document, chunk_labels in zip(self, chunk_values):
             if chunk_field not in document:
                 document[chunk_field] = []
 
             chunk = document[chunk_field]
 
             if chunk:
-                if sortby is not None:
-                    chunk = list(sorted(chunk, key=lambda x: x[sortby]))
                 assert len(chunk) == len(
                     chunk_labels
                 ), "The length of your `chunk` array should be the same as your `chunk_values`"
-                for chunk_index in range(len(chunk_labels)):
-                    subchunk = Document(chunk[chunk_index])
-                    label = chunk_labels[chunk_index]
-                    subchunk[output_field] = label
-                    chunk[chunk_index] = subchunk.to_json()
+                if sortby is not None:
+                    # labels are in `sortby` order, the chunks keep their own order
+                    chunk = sorted(chunk, key=lambda x: x[sortby])
+                for subchunk, label in zip(chunk, chunk_labels):
+                    _set_fields(subchunk, fields, label)
             else:
                 document[chunk_field] = chunk_labels
 
@@ -81,42 +187,33 @@ class DocumentList(UserList):
         Set chunks from a flat list.
         Note that this is only possible if there is pre-existing
         chunk documents.
+
+        Unlike `unflatten_chunks`, values past the last chunk are ignored and
+        documents without `chunk_field` are given an empty one.
         """
-        # general logic for this is that we assume that the number of values equals
-        # to the number of chunk values
-        chunk_counter = 0
-        for i, doc in enumerate(self.data):
-            chunk_docs = []
-            for j, chunk_doc in enumerate(doc.get(chunk_field, [])):
-                # chunk_doc = Document(chunk_doc)
-                chunk_doc = Document(chunk_doc)
-                chunk_doc.set(field, values[chunk_counter])
-                chunk_docs.append(chunk_doc)
-                chunk_counter += 1
-            doc.set(chunk_field, chunk_docs)
-
-        if chunk_counter > len(values):
+        offsets = self.chunk_offsets(chunk_field)
+        if int(offsets[-1]) > len(values):
             raise ValueError("Number of chunks do not match with number of values - check logic.")
+        for document in self:
+            if chunk_field not in document:
+                document[chunk_field] = []
+        self.unflatten_chunks(chunk_field, field, values[: int(offsets[-1])], offsets)
 
     def get_chunks_as_flat(self, chunk_field: str, field: str, default=None):
         """
-        Set chunks from a flat list.
-        Note that this is only possible if there is pre-existing
-        chunk documents.
+        Get the values of a field across all chunks as a flat list.
         """
-        docs = DocumentList(self._flatten_list([d.get(chunk_field) for d in self.data]))
-        return [d.get(field, default=default) for d in docs.data]
+        fields = field.split(".")
+        return [_get(chunk, fields, default) for chunks in self._chunks(chunk_field) for chunk in chunks]
 
     def split_by_chunk(self, chunk_field: str, values: list):
         """
         Split a list of values based on the number of documents
         within a specific chunk field
         """
-        counter = 0
-        for d in self.data:
-            chunk_field_len = len(d.get(chunk_field, []))
-            yield values[counter : counter + chunk_field_len]
-            counter += len(d.get(chunk_field, []))
+        offsets = self.chunk_offsets(chunk_field).tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield values[start:end]
 
     def remove_tag(self, field: str, value: str) -> None:
         warnings.warn("This behaviour is experimental and is subject to change")
@@ -124,7 +221,7 @@ class DocumentList(UserList):
         *tag_fields, remove_field = field.split(".")
         tag_field = ".".join(tag_fields)
 
-        for document in self.data:
+        for document in self:
             new_tags = []
 
             old_tags = document.get(tag_field, [])
@@ -138,10 +235,10 @@ class DocumentList(UserList):
         warnings.warn("This behaviour is experimental and is subject to change")
 
         if isinstance(value, list):
-            for document, tag in zip(self.data, value):
+            for document, tag in zip(self, value):
                 document[field].append(tag)
         else:
-            for document in self.data:
+            for document in self:
                 document[field].append(value)
 
     def sort_tags(self, field: str, reverse: bool = False) -> None:
@@ -150,7 +247,7 @@ class DocumentList(UserList):
         *tag_fields, sort_field = field.split(".")
         tag_field = ".".join(tag_fields)
 
-        for document in self.data:
+        for document in self:
             tags = document.get(tag_field)
 
             if tags is not None:
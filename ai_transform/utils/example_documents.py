@@ -96,7 +96,7 @@ def mock_documents(n: int = 100, vector_length: int = 5) -> DocumentList:
 
 
 def incomplete_documents(n: int = 100, vector_length: int = 5) -> DocumentList:
-    documents = [vector_document(vector_length).data for _ in range(n)]
+    documents = [dict(vector_document(vector_length)) for _ in range(n)]
     for document in documents:
         for key in random.sample(document.keys(), 3):
             document.pop(key)
@@ -7,11 +7,11 @@ To invoke JSON encoder:
 ```
 
 """
+import sys
 import math
 import datetime
 import dataclasses
 import collections
-import pandas as pd
 
 from ipaddress import IPv4Address, IPv4Interface, IPv4Network, IPv6Address, IPv6Interface, IPv6Network
 
@@ -19,11 +19,12 @@ from enum import Enum
 from types import GeneratorType
 from uuid import UUID
 from collections import deque
+from decimal import Decimal
 from pathlib import Path
 from pathlib import PurePath
 from types import GeneratorType
 from enum import Enum
-from typing import Any
+from typing import Any, Callable, Dict, List, Optional
 
 # Taken from pydanitc.json
 ENCODERS_BY_TYPE = {
@@ -32,6 +33,7 @@ ENCODERS_BY_TYPE = {
     datetime.datetime: lambda o: o.isoformat(),
     datetime.time: lambda o: o.isoformat(),
     datetime.timedelta: lambda td: td.total_seconds(),
+    Decimal: float,
     Enum: lambda o: o.value,
     frozenset: list,
     deque: list,
@@ -48,6 +50,144 @@ ENCODERS_BY_TYPE = {
 }
 
 
+def _encode_iterable(obj: Any, force_string: bool) -> List[Any]:
+    return [json_encoder(item, force_string=force_string) for item in obj]
+
+
+def _encode_dict(obj: Dict[Any, Any], force_string: bool) -> Dict[Any, Any]:
+    encoded_dict = {}
+    for key, value in obj.items():
+        encoded_key = json_encoder(key, force_string=force_string)
+        encoded_value = json_encoder(value, force_string=force_string)
+        encoded_dict[encoded_key] = encoded_value
+    return encoded_dict
+
+
+def _encode_float(obj: float, force_string: bool) -> Optional[float]:
+    # NaN and infinity aren't valid JSON
+    if not math.isfinite(obj):
+        return None
+    return float(obj)
+
+
+def _encode_ndarray(obj: Any, force_string: bool) -> Any:
+    import numpy as np
+
+    kind = obj.dtype.kind
+    if kind == "f":
+        nan_mask = ~np.isfinite(obj)
+        if nan_mask.any():
+            masked = obj.astype(object)
+            masked[nan_mask] = None
+            return masked.tolist()
+        return obj.tolist()
+    if kind in "biu":
+        return obj.tolist()
+    # object, string and other arrays may hold anything, so encode each item
+    return json_encoder(obj.tolist(), force_string=force_string)
+
+
+def _encode_numpy_scalar(obj: Any, force_string: bool) -> Any:
+    return json_encoder(obj.item(), force_string=force_string)
+
+
+def _encode_with_to_json(obj: Any, force_string: bool) -> Any:
+    return obj.to_json()
+
+
+def _identity(obj: Any, force_string: bool) -> Any:
+    return obj
+
+
+def _repr(obj: Any, force_string: bool) -> str:
+    return repr(obj)
+
+
+def _encode_unknown(obj: Any, force_string: bool) -> str:
+    if force_string:
+        return repr(obj)
+    raise ValueError(f"{obj} ({type(obj)}) cannot be converted to JSON format")
+
+
+def _wrap(encoder: Callable[[Any], Any]) -> Callable[[Any, bool], Any]:
+    return lambda obj, force_string: encoder(obj)
+
+
+# Encoders looked up by exact type. Subclasses are resolved by `_resolve_encoder`
+# the first time they are seen and then cached here.
+_DISPATCH: Dict[type, Callable[[Any, bool], Any]] = {
+    obj_type: _wrap(encoder) for obj_type, encoder in ENCODERS_BY_TYPE.items()
+}
+_DISPATCH.update(
+    {
+        str: _identity,
+        int: _identity,
+        bool: _identity,
+        type(None): _identity,
+        float: _encode_float,
+        dict: _encode_dict,
+        list: _encode_iterable,
+        tuple: _encode_iterable,
+        set: _encode_iterable,
+        frozenset: _encode_iterable,
+        deque: _encode_iterable,
+        GeneratorType: _encode_iterable,
+    }
+)
+
+
+def _resolve_third_party_encoder(obj: Any) -> Optional[Callable[[Any, bool], Any]]:
+    # NumPy and pandas objects can only exist once those are imported, so they
+    # are looked up in sys.modules rather than imported with this module
+    np = sys.modules.get("numpy")
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return _encode_ndarray
+        if isinstance(obj, np.floating):
+            return _encode_float
+        if isinstance(obj, np.generic):
+            return _encode_numpy_scalar
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(obj, pd.Timestamp):
+        return _repr
+    return None
+
+
+def _resolve_encoder(obj: Any) -> Callable[[Any, bool], Any]:
+    from ai_transform.utils import DocumentList, Document
+
+    obj_type = type(obj)
+
+    # Same precedence as the isinstance checks this table replaces
+    if isinstance(obj, (list, set, frozenset, GeneratorType, tuple, collections.deque)):
+        encoder = _encode_iterable
+    elif isinstance(obj, dict):
+        encoder = _encode_dict
+    elif dataclasses.is_dataclass(obj):
+        encoder = _wrap(dataclasses.asdict)
+    elif isinstance(obj, Enum):
+        encoder = _wrap(lambda o: o.value)
+    elif isinstance(obj, PurePath):
+        encoder = _wrap(str)
+    elif isinstance(obj, (str, int)):
+        encoder = _identity
+    elif isinstance(obj, float):
+        encoder = _encode_float
+    elif isinstance(obj, (Document, DocumentList)):
+        encoder = _encode_with_to_json
+    elif obj_type in ENCODERS_BY_TYPE:
+        encoder = _wrap(ENCODERS_BY_TYPE[obj_type])
+    else:
+        encoder = _resolve_third_party_encoder(obj)
+        if encoder is None:
+            # not cached, so that mappings added to ENCODERS_BY_TYPE later are still picked up
+            return _encode_unknown
+
+    if not isinstance(obj, type):
+        _DISPATCH[obj_type] = encoder
+    return encoder
+
+
 def json_encoder(obj: Any, force_string: bool = False):
     """Converts object so it is json serializable
     If you want to add your own mapping,
@@ -68,51 +208,15 @@ def json_encoder(obj: Any, force_string: bool = False):
     >>> documents = [{"value": np.nan}]
     >>> client.json_encoder(documents)
 
+    NumPy arrays and scalars are converted in bulk, NaN and infinity become None.
+    >>> client.json_encoder({"vector": np.zeros(768, dtype=np.float32)})
+
     If you want to use FastAPI's json encoder, do this:
     >>> from fastapi import jsonable_encoder
     >>> client.json_encoder = jsonable_encoder
 
     """
-    from ai_transform.utils import DocumentList, Document
-
-    # Loop through iterators and convert
-    if isinstance(obj, (list, set, frozenset, GeneratorType, tuple, collections.deque)):
-        encoded_list = []
-        for item in obj:
-            encoded_list.append(json_encoder(item, force_string=force_string))
-        return encoded_list
-
-    # Loop through dictionaries and convert
-    if isinstance(obj, dict):
-        encoded_dict = {}
-        for key, value in obj.items():
-            encoded_key = json_encoder(key, force_string=force_string)
-            encoded_value = json_encoder(value, force_string=force_string)
-            encoded_dict[encoded_key] = encoded_value
-        return encoded_dict
-
-    # Custom conversions
-    if dataclasses.is_dataclass(obj):
-        return dataclasses.asdict(obj)
-    if isinstance(obj, Enum):
-        return obj.value
-    if isinstance(obj, PurePath):
-        return str(obj)
-    if isinstance(obj, (str, int, type(None))):
-        return obj
-    if isinstance(obj, float):
-        if math.isnan(obj):
-            return None
-        return obj
-    if isinstance(obj, (Document, DocumentList)):
-        return obj.to_json()
-    if type(obj) in ENCODERS_BY_TYPE:
-        return ENCODERS_BY_TYPE[type(obj)](obj)  # type: ignore
-
-    if force_string:
-        return repr(obj)
-
-    if isinstance(obj, pd.Timestamp):
-        return repr(obj)
-
-    raise ValueError(f"{obj} ({type(obj)}) cannot be converted to JSON format")
+    encoder = _DISPATCH.get(type(obj))
+    if encoder is None:
+        encoder = _resolve_encoder(obj)
+    return encoder(obj, force_string)
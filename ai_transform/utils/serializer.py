@@ -0,0 +1,206 @@
+"""JSON serializer for request bodies
+
+Serializes documents straight to JSON bytes without first building a copy
+with `to_json`.
+
+```
+    from ai_transform.utils.serializer import serialize
+
+    body = serialize({"documents": documents})
+```
+
+A single pass writer walks the payload, strings are escaped by the stdlib C
+escaper and lists of floats, i.e. vectors, are written in bulk. Other types
+are converted with the same dispatch as `json_encoder`, so the bytes match
+`to_json()`.
+
+Floats are written the way orjson and msgspec write them (i.e. `0.00001` and
+`1e16` rather than `1e-05` and `1e+16`), so the output is byte for byte the
+same whichever codec in `ai_transform.utils.codec` is used. The stdlib C
+encoder can't be told how to write floats, which is why it isn't used.
+"""
+import math
+
+from typing import Any, Callable, Dict, Iterator, List
+
+from json.encoder import encode_basestring
+
+from ai_transform.utils.document import Document
+from ai_transform.utils.document_list import DocumentList
+from ai_transform.utils.json_encoder import json_encoder
+
+
+def convert(obj: Any) -> Any:
+    """
+    Converts `obj` into a type that the JSON encoder understands.
+    """
+    if type(obj) is DocumentList:
+        # the raw documents encode the same as `to_json()`, without copying them
+        return obj.data
+    return json_encoder(obj)
+
+
+def _format_repr(text: str) -> str:
+    if "e" not in text:
+        return text
+    mantissa, exponent = text.split("e")
+    if exponent == "-05":
+        # 1.5e-05 -> 0.000015
+        if mantissa[0] == "-":
+            return "-0.0000" + mantissa[1:].replace(".", "")
+        return "0.0000" + mantissa.replace(".", "")
+    return mantissa + "e" + str(int(exponent))
+
+
+def format_float(value: float) -> str:
+    """
+    Formats a finite float the way orjson and msgspec do.
+    """
+    return _format_repr(float.__repr__(value))
+
+
+def _float_json(text: str) -> str:
+    # `text` is the repr of a float
+    if "n" in text:
+        # nan, inf and -inf
+        return "null"
+    return _format_repr(text)
+
+
+def _write_float(obj: float, parts: List[str]) -> None:
+    parts.append(_float_json(float.__repr__(obj)))
+
+
+def format_key(key: Any) -> str:
+    """
+    The string a dict key that isn't one is written as, i.e. `"null"` for None.
+    """
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, float):
+        return "null" if math.isnan(key) else format_float(key)
+    if isinstance(key, int):
+        return int.__repr__(key)
+    key = convert(key)
+    return key if isinstance(key, str) else format_key(key)
+
+
+def _write_key(key: Any) -> str:
+    if isinstance(key, str):
+        return encode_basestring(key)
+    return encode_basestring(format_key(key))
+
+
+def _write_dict(obj: Dict[Any, Any], parts: List[str]) -> None:
+    if not obj:
+        parts.append("{}")
+        return
+    separator = "{"
+    for key, value in dict.items(obj):
+        parts.append(separator)
+        parts.append(_write_key(key))
+        parts.append(":")
+        _write(value, parts)
+        separator = ","
+    parts.append("}")
+
+
+def _write_list(obj: List[Any], parts: List[str]) -> None:
+    if not obj:
+        parts.append("[]")
+        return
+    if type(obj[0]) is float and all(type(value) is float for value in obj):
+        # vectors, only the values that need it are formatted one by one
+        texts = list(map(float.__repr__, obj))
+        joined = ",".join(texts)
+        if "e" in joined or "n" in joined:
+            joined = ",".join([_float_json(text) for text in texts])
+        parts.append("[" + joined + "]")
+        return
+    separator = "["
+    for value in obj:
+        parts.append(separator)
+        _write(value, parts)
+        separator = ","
+    parts.append("]")
+
+
+WRITERS_BY_TYPE: Dict[type, Callable[[Any, List[str]], None]] = {
+    str: lambda o, parts: parts.append(encode_basestring(o)),
+    int: lambda o, parts: parts.append(int.__repr__(o)),
+    bool: lambda o, parts: parts.append("true" if o else "false"),
+    type(None): lambda o, parts: parts.append("null"),
+    float: _write_float,
+    dict: _write_dict,
+    Document: _write_dict,
+    list: _write_list,
+}
+
+
+def _write(obj: Any, parts: List[str]) -> None:
+    writer = WRITERS_BY_TYPE.get(type(obj))
+    if writer is not None:
+        writer(obj, parts)
+    elif isinstance(obj, str):
+        parts.append(encode_basestring(obj))
+    elif isinstance(obj, bool):
+        parts.append("true" if obj else "false")
+    elif isinstance(obj, int):
+        parts.append(int.__repr__(obj))
+    elif isinstance(obj, float):
+        _write_float(obj, parts)
+    elif isinstance(obj, dict):
+        _write_dict(obj, parts)
+    elif isinstance(obj, list):
+        _write_list(obj, parts)
+    else:
+        _write(convert(obj), parts)
+
+
+def _iter(obj: Any, depth: int) -> Iterator[str]:
+    if depth and obj is not None and not isinstance(obj, (str, int, float, dict, list)):
+        # i.e. a DocumentList
+        obj = convert(obj)
+    if depth == 0 or not obj or not isinstance(obj, (dict, list)) or (isinstance(obj, list) and type(obj[0]) is float):
+        # vectors are written in bulk
+        parts: List[str] = []
+        _write(obj, parts)
+        yield "".join(parts)
+    elif isinstance(obj, dict):
+        separator = "{"
+        for key, value in dict.items(obj):
+            yield separator + _write_key(key) + ":"
+            yield from _iter(value, depth - 1)
+            separator = ","
+        yield "}"
+    else:
+        separator = "["
+        for value in obj:
+            yield separator
+            yield from _iter(value, depth - 1)
+            separator = ","
+        yield "]"
+
+
+def serialize_iter(obj: Any, depth: int = 2) -> Iterator[str]:
+    """
+    Yields the JSON representation of `obj` piece by piece while it is written,
+    one piece for each item `depth` levels down (i.e. each document of a
+    `{"documents": [...]}` payload), so the whole of it is never held at once.
+    NaN and infinity are written as null.
+    """
+    return _iter(obj, depth)
+
+
+def serialize(obj: Any) -> bytes:
+    """
+    Serializes `obj` to compact UTF-8 encoded JSON bytes. NaN and infinity are
+    written as null.
+    """
+    parts: List[str] = []
+    _write(obj, parts)
+    return "".join(parts).encode("utf-8")
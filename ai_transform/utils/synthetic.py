@@ -0,0 +1,241 @@
+"""
+Seeded synthetic datasets for load tests.
+
+`mock_documents` builds one document at a time and its shape is fixed.
+`SyntheticDocuments` generates each block of documents with NumPy, and its
+field counts, vector dimensions, chunk lengths, tag distributions and text
+lengths can all be configured. The same seed always gives the same documents,
+whatever the batch size.
+
+.. code-block::
+
+    from ai_transform.utils.synthetic import SyntheticDocuments
+
+    synthetic = SyntheticDocuments(1_000_000, seed=42, vector_fields=2, vector_dim=768, chunk_length=(1, 8))
+
+    for documents in synthetic.batches(batch_size=10_000):
+        dataset.insert_documents(documents)
+
+    synthetic.to_jsonl("load_test.jsonl")
+    synthetic.to_parquet("load_test.parquet")  # requires pyarrow
+
+The documents look like this, with `_chunk_` and `_surveytag_` only present
+when `chunk_length` and `max_tags` are set:
+
+.. code-block::
+
+    {
+        "_id": "0000042",
+        "text_0": "tupo qelaxi ...",
+        "numeric_0": 0.31,
+        "vector_0_vector_": [0.12, ...],
+        "_chunk_": [{"text": "...", "label": "label_3", "_order_": 0}, ...],
+        "_surveytag_": {"text_0": [{"label": "tag_0", "value": 0.87}, ...]},
+    }
+"""
+import numpy as np
+
+from typing import Any, Dict, Iterator, List, Literal, Tuple
+
+from ai_transform.utils.codec import get_codec
+from ai_transform.utils.document_list import DocumentList
+
+# documents are generated in blocks of this size, each from its own seeded
+# generator, so batch sizes don't change the documents generated
+BLOCK_SIZE = 1024
+
+
+class SyntheticDocuments:
+    """
+    Parameters
+    ------------
+
+    num_documents: int
+        The number of documents to generate
+    seed: int
+        Seeds every random value, including the vocabulary
+    text_fields, numeric_fields, vector_fields: int
+        How many of each field every document has
+    vector_dim: int
+        The length of every vector, stored as float32 before conversion
+    text_length: Tuple[int, int]
+        The lower and upper bound on the number of words in a text field
+    text_length_distribution: str
+        "uniform" between the bounds, or "lognormal" centred on their
+        geometric mean with the bounds at two standard deviations (clipped)
+    chunk_length: Tuple[int, int]
+        The lower and upper bound on the number of chunks in `_chunk_`
+    max_tags: int
+        Every document has between 0 and `max_tags` tags per text field
+    tag_labels: int
+        The number of distinct tag and chunk labels
+    tag_skew: float
+        The Zipf exponent of the label frequencies, 0 for uniform
+    vocabulary_size: int
+        The number of distinct words
+    """
+
+    def __init__(
+        self,
+        num_documents: int,
+        seed: int = 0,
+        text_fields: int = 1,
+        numeric_fields: int = 1,
+        vector_fields: int = 1,
+        vector_dim: int = 128,
+        text_length: Tuple[int, int] = (5, 50),
+        text_length_distribution: Literal["uniform", "lognormal"] = "uniform",
+        chunk_length: Tuple[int, int] = (0, 0),
+        max_tags: int = 0,
+        tag_labels: int = 20,
+        tag_skew: float = 1.0,
+        vocabulary_size: int = 5000,
+    ) -> None:
+        if text_length_distribution not in ("uniform", "lognormal"):
+            raise ValueError(f"text_length_distribution should be uniform or lognormal, not {text_length_distribution}")
+        if text_length[0] < 1 or text_length[0] > text_length[1]:
+            raise ValueError(f"text_length should be increasing bounds of at least 1, not {text_length}")
+        if chunk_length[0] < 0 or chunk_length[0] > chunk_length[1]:
+            raise ValueError(f"chunk_length should be increasing non-negative bounds, not {chunk_length}")
+
+        self.num_documents = num_documents
+        self.seed = seed
+        self.text_fields = [f"text_{index}" for index in range(text_fields)]
+        self.numeric_fields = [f"numeric_{index}" for index in range(numeric_fields)]
+        self.vector_fields = [f"vector_{index}_vector_" for index in range(vector_fields)]
+        self.vector_dim = vector_dim
+        self.text_length = text_length
+        self.text_length_distribution = text_length_distribution
+        self.chunk_length = chunk_length
+        self.max_tags = max_tags
+        self.labels = [f"label_{index}" for index in range(tag_labels)]
+        self.tags = [f"tag_{index}" for index in range(tag_labels)]
+
+        ranks = np.arange(1, tag_labels + 1, dtype=np.float64)
+        weights = ranks**-tag_skew
+        self.label_probabilities = weights / weights.sum()
+
+        self.vocabulary = self._vocabulary(vocabulary_size)
+        self._id_width = len(str(max(num_documents - 1, 0)))
+
+    def _vocabulary(self, size: int) -> List[str]:
+        rng = np.random.default_rng([self.seed, 2**32 - 1])
+        letters = rng.integers(ord("a"), ord("z") + 1, size=(size, 10), dtype=np.uint8)
+        lengths = rng.integers(2, 11, size=size)
+        data = letters.tobytes()
+        return [data[index * 10 : index * 10 + length].decode() for index, length in enumerate(lengths.tolist())]
+
+    def __len__(self) -> int:
+        return self.num_documents
+
+    def _text_lengths(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        low, high = self.text_length
+        if self.text_length_distribution == "uniform":
+            return rng.integers(low, high + 1, size=size)
+        mean = (np.log(low) + np.log(high)) / 2
+        sigma = (np.log(high) - np.log(low)) / 4
+        return np.clip(np.rint(rng.lognormal(mean, sigma, size=size)), low, high).astype(np.int64)
+
+    def _texts(self, rng: np.random.Generator, lengths: np.ndarray) -> List[str]:
+        indices = rng.integers(0, len(self.vocabulary), size=int(lengths.sum())).tolist()
+        words = [self.vocabulary[index] for index in indices]
+        ends = np.cumsum(lengths).tolist()
+        starts = [0] + ends[:-1]
+        return [" ".join(words[start:end]) for start, end in zip(starts, ends)]
+
+    def _labels(self, rng: np.random.Generator, labels: List[str], size: int) -> List[str]:
+        return [labels[index] for index in rng.choice(len(labels), size=size, p=self.label_probabilities).tolist()]
+
+    @staticmethod
+    def _split(values: List[Any], counts: np.ndarray) -> List[List[Any]]:
+        ends = np.cumsum(counts).tolist()
+        starts = [0] + ends[:-1]
+        return [values[start:end] for start, end in zip(starts, ends)]
+
+    def _block(self, block: int) -> List[Dict[str, Any]]:
+        start = block * BLOCK_SIZE
+        size = min(BLOCK_SIZE, self.num_documents - start)
+        rng = np.random.default_rng([self.seed, block])
+
+        columns: Dict[str, List[Any]] = {"_id": [f"{index:0{self._id_width}d}" for index in range(start, start + size)]}
+        for field in self.text_fields:
+            columns[field] = self._texts(rng, self._text_lengths(rng, size))
+        for field in self.numeric_fields:
+            columns[field] = rng.random(size).tolist()
+        for field in self.vector_fields:
+            columns[field] = rng.random((size, self.vector_dim), dtype=np.float32).tolist()
+
+        if self.chunk_length[1] > 0:
+            counts = rng.integers(self.chunk_length[0], self.chunk_length[1] + 1, size=size)
+            total = int(counts.sum())
+            texts = self._texts(rng, rng.integers(3, 13, size=total))
+            labels = self._labels(rng, self.labels, total)
+            orders = (np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)).tolist()
+            chunks = [
+                {"text": text, "label": label, "_order_": order} for text, label, order in zip(texts, labels, orders)
+            ]
+            columns["_chunk_"] = self._split(chunks, counts)
+
+        tags: Dict[str, List[List[Dict[str, Any]]]] = {}
+        if self.max_tags > 0:
+            for field in self.text_fields:
+                counts = rng.integers(0, self.max_tags + 1, size=size)
+                total = int(counts.sum())
+                labels = self._labels(rng, self.tags, total)
+                values = rng.random(total).tolist()
+                tags[field] = self._split(
+                    [{"label": label, "value": value} for label, value in zip(labels, values)], counts
+                )
+
+        fields = list(columns)
+        documents = [dict(zip(fields, row)) for row in zip(*columns.values())]
+        if tags:
+            for index, document in enumerate(documents):
+                document["_surveytag_"] = {field: field_tags[index] for field, field_tags in tags.items()}
+        return documents
+
+    def _documents(self) -> Iterator[List[Dict[str, Any]]]:
+        for block in range((self.num_documents + BLOCK_SIZE - 1) // BLOCK_SIZE):
+            yield self._block(block)
+
+    def batches(self, batch_size: int = 10000) -> Iterator[DocumentList]:
+        """
+        Yields every document, `batch_size` at a time.
+        """
+        batch: List[Dict[str, Any]] = []
+        for documents in self._documents():
+            batch.extend(documents)
+            while len(batch) >= batch_size:
+                yield DocumentList(batch[:batch_size])
+                batch = batch[batch_size:]
+        if batch:
+            yield DocumentList(batch)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for documents in self._documents():
+            yield from documents
+
+    def to_jsonl(self, path: str) -> None:
+        codec = get_codec()
+        with open(path, "wb") as f:
+            for documents in self._documents():
+                f.write(b"".join(codec.encode(document) + b"\n" for document in documents))
+
+    def to_parquet(self, path: str, row_group_size: int = 10000) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet requires pyarrow, `pip install pyarrow`")
+
+        writer = None
+        try:
+            for documents in self.batches(row_group_size):
+                # the first batch fixes the schema so that every row group shares it
+                table = pa.Table.from_pylist(documents.data, schema=None if writer is None else writer.schema)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
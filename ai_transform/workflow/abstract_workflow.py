@@ -9,6 +9,7 @@ from ai_transform.engine.abstract_engine import AbstractEngine
 from ai_transform.workflow.context_manager import WorkflowContextManager
 from ai_transform.operator.abstract_operator import AbstractOperator
 from ai_transform.errors import UserFacingError
+from ai_transform.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -106,7 +107,8 @@ class Workflow:
             dataset=self.dataset,
             output=self._output,
         ):
-            self.engine()
+            with span("Workflow.run", cat="workflow", workflow_name=self.name):
+                self.engine()
 
     def get_status(self):
         return self.api._get_workflow_status(self._job_id)
@@ -8,7 +8,9 @@ from ai_transform.types import Credentials
 from ai_transform.dataset import dataset
 from ai_transform.operator import abstract_operator
 from ai_transform.engine import abstract_engine
-from ai_transform.logger import ic
+from ai_transform.logger import ic, summarize
+from ai_transform.metrics import METRICS_PATH, REGISTRY
+from ai_transform.tracing import TRACER, span
 from ai_transform.api.wrappers import OrgEntitlementError
 
 
@@ -126,13 +128,20 @@ class WorkflowContextManager:
             user_errors=user_errors,
             output=self._get_output_to_status_obj(),
         )
-        ic(result)
+        if ic.enabled:
+            ic(summarize(result))
         return result
 
     def __enter__(self) -> "WorkflowContextManager":
-        if self.operators is not None:
-            self._set_field_children_recursively()
-        self.set_workflow_status(status=self.IN_PROGRESS)
+        self._span = span("WorkflowContextManager", cat="workflow", workflow_name=self.workflow_name)
+        try:
+            if self.operators is not None:
+                self._set_field_children_recursively()
+            self.set_workflow_status(status=self.IN_PROGRESS)
+        except BaseException:
+            # __exit__ isn't called when __enter__ raises
+            self._export_telemetry()
+            raise
         return self
 
     def _handle_workflow_fail(
@@ -146,6 +155,13 @@ class WorkflowContextManager:
         self.set_workflow_status(status=self.COMPLETE)
         return True
 
+    def _export_telemetry(self):
+        self._span.end()
+        if TRACER.enabled:
+            TRACER.write()
+        if METRICS_PATH:
+            REGISTRY.dump(METRICS_PATH)
+
     def _calculate_pricing(self):
         n_processed_pricing = 0
         is_automatic = True
@@ -209,13 +225,18 @@ class WorkflowContextManager:
         if exc_type is not None or user_errors is not None:
             regular_workflow_failed = True
 
-        if regular_workflow_failed:
-            return self._handle_workflow_fail(exc_type, exc_value, traceback, user_errors)
-        else:
-            n_processed_pricing = self._n_processed_pricing or self._calculate_pricing()
-            if n_processed_pricing is not None:
-                self.update_workflow_pricing(n_processed_pricing)
-            return self._handle_workflow_complete()
+        # traces and metrics matter most when the API is down, so they are
+        # written even if the status can't be updated
+        try:
+            if regular_workflow_failed:
+                return self._handle_workflow_fail(exc_type, exc_value, traceback, user_errors)
+            else:
+                n_processed_pricing = self._n_processed_pricing or self._calculate_pricing()
+                if n_processed_pricing is not None:
+                    self.update_workflow_pricing(n_processed_pricing)
+                return self._handle_workflow_complete()
+        finally:
+            self._export_telemetry()
 
     def get_status(self):
         return self.api._get_workflow_status(self.job_id)
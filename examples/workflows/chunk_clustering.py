@@ -6,7 +6,6 @@ In this script, we are looking to perform the following:
 - Cluster based on the chunks
 """
 import random
-import numpy as np
 
 from functools import partial
 from typing import Callable, List, Optional, Union
@@ -35,7 +34,10 @@ class SentenceSplitterOperator(AbstractOperator):
         """
         Split sentences into output chunk fields
         """
-        [d.split(self.split_function, chunk_field=self._output_chunk_field, field=self._field) for d in documents]
+        [
+            d.split(self.split_function, chunk_field=self._output_chunk_field, field=self._field, offset_mode="find")
+            for d in documents
+        ]
         return documents
 
 
@@ -83,8 +85,7 @@ class ChunkClusterOperator(AbstractOperator):
         """
         Main transform function
         """
-        vectors = documents.get_chunks_as_flat(chunk_field=self._chunk_field, field=self._vector_field)
-        vectors = np.array(vectors)
+        vectors, _ = documents.flatten_chunks(chunk_field=self._chunk_field, field=self._vector_field)
         labels = self._model.fit_predict(vectors).tolist()
 
         for i, chunk_labels in enumerate(documents.split_by_chunk(chunk_field=self._chunk_field, values=labels)):
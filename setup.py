@@ -19,6 +19,10 @@ example_test_requirements = core_test_requirements + ["torch", "scikit-learn>=0.
 
 chunk_requirements = ["fuzzysearch==0.7.3"]
 
+fast_json_requirements = ["orjson>=3.8.0"]
+
+async_requirements = ["httpx>=0.23.0"]
+
 setup(
     name="ai_transform",
     version=__version__,
@@ -28,11 +32,13 @@ setup(
     packages=find_packages(),
     setup_requires=["wheel"],
     install_requires=requirements,
-    package_data={"": ["*.ini"]},
+    package_data={"": ["*.ini", "*.json"]},
     extras_require=dict(
         core_tests=core_test_requirements,
         example_tests=example_test_requirements,
         ray=ray_requirements,
         chunk=chunk_requirements,
+        fast_json=fast_json_requirements,
+        **{"async": async_requirements},
     ),
 )
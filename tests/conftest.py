@@ -44,6 +44,25 @@ def test_client(test_token: str) -> Client:
     return Client(test_token)
 
 
+@pytest.fixture(scope="function")
+def isolated_api_state(monkeypatch):
+    """
+    Fresh sessions, compressors, hedgers, cassette writers and retry policies,
+    so that adapters mounted or settings changed by a test don't leak into the
+    others.
+    """
+    from ai_transform.api import cassette, compression, hedging, retry, session
+
+    registry = session.SessionRegistry()
+    monkeypatch.setattr(session, "_REGISTRY", registry)
+    monkeypatch.setattr(compression, "_COMPRESSORS", {})
+    monkeypatch.setattr(hedging, "_HEDGERS", {})
+    monkeypatch.setattr(cassette, "_WRITERS", {})
+    monkeypatch.setattr(retry, "_POLICIES", {})
+    yield
+    registry.close()
+
+
 @pytest.fixture(scope="function")
 def test_dataset_id() -> str:
     salt = "".join(random.choices(string.ascii_lowercase, k=10))
@@ -0,0 +1,37 @@
+import json
+import asyncio
+import pytest
+
+from ai_transform.types import Credentials
+
+httpx = pytest.importorskip("httpx")
+
+from ai_transform.api.async_api import AsyncAPI
+from ai_transform.dataset.async_dataset import AsyncDataset
+
+
+def _handler(request: "httpx.Request") -> "httpx.Response":
+    if request.url.path.endswith("/schema"):
+        return httpx.Response(200, json={"value": "text"})
+    body = json.loads(request.content)
+    return httpx.Response(200, json={"inserted": len(body["documents"]), "failed_documents": []})
+
+
+class TestAsyncAPI:
+    def test_schema(self):
+        async def run():
+            credentials = Credentials("async", "api_key", "region", "firebase_uid")
+            async with AsyncAPI(credentials, transport=httpx.MockTransport(_handler)) as api:
+                return await asyncio.gather(*[api._get_schema(f"dataset_{i}") for i in range(10)])
+
+        assert asyncio.run(run()) == [{"value": "text"}] * 10
+
+    def test_bulk_insert(self):
+        async def run():
+            credentials = Credentials("async", "api_key", "region", "firebase_uid")
+            async with AsyncAPI(credentials, transport=httpx.MockTransport(_handler)) as api:
+                dataset = AsyncDataset(api, "dataset")
+                documents = [{"_id": str(i), "value": i} for i in range(95)]
+                return await dataset.bulk_insert(documents, insert_chunksize=20)
+
+        assert asyncio.run(run()) == {"inserted": 95, "failed_documents": []}
@@ -0,0 +1,60 @@
+import pytest
+
+from ai_transform.api.api import API
+from ai_transform.api.cassette import REDACTED, load_cassette, mount_replay, record_requests
+from ai_transform.api.emulator import mount_emulator
+from ai_transform.dataset.dataset import Dataset
+from ai_transform.types import Credentials
+from ai_transform.utils.example_documents import static_documents
+
+
+def _api(name: str) -> API:
+    return API(Credentials(name, "api_key", "region", "firebase_uid"))
+
+
+@pytest.mark.usefixtures("isolated_api_state")
+class TestCassette:
+    def test_record_and_replay(self, tmp_path):
+        path = str(tmp_path / "cassette.jsonl.gz")
+        api = _api("cassette_record")
+        emulator = mount_emulator(api)
+        record_requests(api, path)
+
+        dataset = Dataset(api, "test_dataset")
+        dataset.create()
+        dataset.insert_documents(static_documents(10))
+        recorded = dataset.get_documents(page_size=5)
+        api._set_workflow_status(job_id="job", workflow_name="workflow", status="inprogress", metadata={"token": "t"})
+        record_requests(api, path).writer.close()
+
+        interactions = load_cassette(path)
+        assert len(interactions) == emulator.requests
+        assert all("Authorization" not in interaction["headers"] for interaction in interactions)
+        assert "request_body" not in interactions[0]
+
+        sleeps = []
+        replay_api = _api("cassette_replay")
+        replay = mount_replay(replay_api, path, latency_scale=2.0, sleep=sleeps.append)
+        replay_dataset = Dataset(replay_api, "test_dataset")
+        replay_dataset.create()
+        replay_dataset.insert_documents(static_documents(10))
+        assert replay_dataset.get_documents(page_size=5) == recorded
+        assert sleeps == [2.0 * interaction["elapsed"] for interaction in interactions[: len(sleeps)]]
+        assert replay.misses == 0
+
+        assert replay_api._get_schema("unknown_dataset") is None
+        assert replay.misses == 1
+
+    def test_redacts_bodies(self, tmp_path):
+        path = str(tmp_path / "cassette.jsonl")
+        api = _api("cassette_redact")
+        mount_emulator(api)
+        record_requests(api, path, record_request_bodies=True)
+
+        api._update_workflow_metadata(job_id="job", metadata={"api_key": "secret", "keep": 1})
+        record_requests(api, path).writer.close()
+
+        [interaction] = load_cassette(path)
+        assert REDACTED in interaction["request_body"]["body"]
+        assert "secret" not in interaction["request_body"]["body"]
+        assert '"keep":1' in interaction["request_body"]["body"].replace(" ", "")
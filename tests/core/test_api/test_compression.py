@@ -0,0 +1,51 @@
+import gzip
+import pytest
+import requests
+
+from requests.adapters import BaseAdapter
+
+from ai_transform.api.api import API
+from ai_transform.api.compression import RequestCompressor, get_compressor
+from ai_transform.types import Credentials
+
+
+class RejectCompressionAdapter(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        self.requests.append(request)
+        response = requests.Response()
+        response.request = request
+        response.status_code = 415 if "Content-Encoding" in request.headers else 200
+        response._content = b"{}"
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.mark.usefixtures("isolated_api_state")
+class TestCompression:
+    def test_threshold(self):
+        compressor = RequestCompressor(threshold=10)
+        assert compressor.compress(b"small") == (b"small", None)
+
+        body, encoding = compressor.compress(b"0" * 100)
+        assert encoding == "gzip"
+        assert gzip.decompress(body) == b"0" * 100
+
+    def test_disabled_on_415(self):
+        credentials = Credentials("compression", "api_key", "region", "firebase_uid")
+        api = API(credentials, compress_requests=True)
+        get_compressor(api.base_url).threshold = 10
+        adapter = RejectCompressionAdapter()
+        api.session.mount("https://", adapter)
+
+        response = api.post("/test", json={"documents": ["0" * 100]})
+        assert response.status_code == 200
+        assert [request.headers.get("Content-Encoding") for request in adapter.requests] == ["gzip", None]
+
+        api.post("/test", json={"documents": ["0" * 100]})
+        assert len(adapter.requests) == 3
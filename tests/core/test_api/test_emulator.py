@@ -0,0 +1,80 @@
+import pytest
+
+from ai_transform.api.api import API
+from ai_transform.api.emulator import mount_emulator
+from ai_transform.dataset.dataset import Dataset
+from ai_transform.engine.stable_engine import StableEngine
+from ai_transform.operator.abstract_operator import AbstractOperator
+from ai_transform.types import Credentials
+from ai_transform.utils.example_documents import mock_documents, static_documents
+
+
+class LabelOperator(AbstractOperator):
+    def transform(self, documents):
+        for document in documents:
+            document["new_label"] = document["sample_1_label"] + "!"
+        return documents
+
+
+def _dataset(name: str) -> Dataset:
+    api = API(Credentials(name, "api_key", "region", "firebase_uid"))
+    mount_emulator(api)
+    dataset = Dataset(api, "test_dataset")
+    dataset.create()
+    return dataset
+
+
+@pytest.mark.usefixtures("isolated_api_state")
+class TestEmulator:
+    def test_get_where(self):
+        dataset = _dataset("emulator_get_where")
+        dataset.insert_documents(static_documents(25))
+        assert len(dataset) == 25
+        assert dataset.schema == {"text_field": "text", "numeric_field": "numeric", "insert_date_": "text"}
+
+        res = dataset.get_all_documents(page_size=10, select_fields=["numeric_field"])
+        assert sorted(document["numeric_field"] for document in res["documents"]) == list(range(25))
+        assert all("text_field" not in document for document in res["documents"])
+
+        res = dataset.get_documents(page_size=100, filters=dataset["numeric_field"] >= 20)
+        assert res["count"] == 5
+
+    def test_match_modulo(self):
+        dataset = _dataset("emulator_modulo")
+        dataset.insert_documents(static_documents(30))
+
+        ids = []
+        for worker_number in range(3):
+            modulo = [{"matchModulo": {"field": "_id", "modulo": 3, "value": worker_number}}]
+            ids += [document["_id"] for document in dataset.get_documents(100, filters=modulo)["documents"]]
+        assert sorted(ids) == sorted(document["_id"] for document in dataset.get_documents(100)["documents"])
+
+    def test_bulk_update(self):
+        dataset = _dataset("emulator_bulk_update")
+        dataset.insert_documents([{"_id": "1", "nested": {"a": 1}}])
+
+        result = dataset.update_documents([{"_id": "1", "nested": {"b": 2}}, {"_id": "2", "value": 1}])
+        assert result["inserted"] == 1
+        assert result["failed_documents"] == ["2"]
+        assert dataset.get_documents(1)["documents"][0]["nested"] == {"a": 1, "b": 2}
+
+    def test_bulk_update_dotted_keys(self):
+        dataset = _dataset("emulator_bulk_update_dotted")
+        dataset.insert_documents([{"_id": "1", "nested": {"a": 1}}])
+
+        dataset.update_documents([{"_id": "1", "nested.b": 2, "value": 3}])
+        document = dataset.get_documents(1)["documents"][0]
+        assert document["nested"] == {"a": 1, "b": 2}
+        assert document["value"] == 3
+
+    def test_engine(self):
+        dataset = _dataset("emulator_engine")
+        dataset.insert_documents(mock_documents(50))
+
+        engine = StableEngine(
+            dataset=dataset, operator=LabelOperator(), pull_chunksize=20, select_fields=["sample_1_label"]
+        )
+        engine.apply()
+
+        res = dataset.get_documents(100, filters=dataset["new_label"].exists())
+        assert res["count"] == 50
@@ -0,0 +1,69 @@
+import pytest
+import requests
+
+from ai_transform.api.emulator import EmulatorAdapter
+from ai_transform.api.faults import FaultInjectionAdapter, Faults
+from ai_transform.api.retry import RetryPolicy
+
+BASE_URL = "https://api-region.stack.tryrelevance.com"
+
+
+def _session(faults, **kwargs):
+    emulator = EmulatorAdapter()
+    emulator.add_dataset("test_dataset", [{"_id": str(i), "value": i} for i in range(10)])
+    adapter = FaultInjectionAdapter(emulator, faults, **kwargs)
+    session = requests.Session()
+    session.mount(BASE_URL, adapter)
+    return session, adapter
+
+
+def _get_where(session, **kwargs):
+    return session.post(BASE_URL + "/latest/datasets/test_dataset/documents/get_where", json={"page_size": 5}, **kwargs)
+
+
+class TestFaultInjection:
+    def test_statuses(self):
+        session, adapter = _session({"/get_where$": Faults(statuses={503: 1.0}, retry_after=2.0)})
+        response = _get_where(session)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2.0"
+        assert session.get(BASE_URL + "/latest/datasets/test_dataset/schema").status_code == 200
+        assert adapter.injected == {"status_503": 1}
+
+    def test_reset_and_hang(self):
+        sleeps = []
+        session, adapter = _session(Faults(reset=1.0))
+        with pytest.raises(requests.ConnectionError):
+            _get_where(session)
+
+        session, adapter = _session(Faults(hang=1.0), sleep=sleeps.append)
+        with pytest.raises(requests.ReadTimeout):
+            _get_where(session, timeout=(1, 7))
+        assert sleeps == [7]
+
+    def test_bodies(self):
+        session, _ = _session(Faults(truncate=1.0))
+        with pytest.raises(ValueError):
+            _get_where(session).json()
+
+        session, _ = _session(Faults(non_json=1.0))
+        response = _get_where(session)
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "text/html"
+
+    def test_rates_are_seeded(self):
+        counts = []
+        for _ in range(2):
+            session, adapter = _session(Faults(statuses={429: 0.2}), seed=1)
+            statuses = [_get_where(session).status_code for _ in range(200)]
+            counts.append(statuses)
+            assert 20 < adapter.injected["status_429"] < 60
+        assert counts[0] == counts[1]
+
+    def test_retries_recover(self):
+        sleeps = []
+        session, adapter = _session(Faults(statuses={502: 0.3, 503: 0.3}), seed=0)
+        policy = RetryPolicy(max_retries=10, sleep=sleeps.append)
+        for _ in range(20):
+            assert policy.call(_get_where, session).status_code == 200
+        assert policy.metrics["retries"] == len(sleeps) == sum(adapter.injected.values())
@@ -0,0 +1,80 @@
+import pytest
+import requests
+import threading
+
+from requests.adapters import BaseAdapter
+
+from ai_transform.api.api import API
+from ai_transform.api.hedging import TIMEOUTS, Hedger
+from ai_transform.types import Credentials
+
+
+class TimeoutAdapter(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.timeouts = []
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        self.timeouts.append(kwargs.get("timeout"))
+        response = requests.Response()
+        response.request = request
+        response.status_code = 200
+        response._content = b"{}"
+        return response
+
+    def close(self):
+        pass
+
+
+def _primary_waits_for(release: threading.Event):
+    # the first call only returns once `release` is set, a duplicate returns at once
+    names = iter(["primary", "hedged"])
+
+    def send() -> requests.Response:
+        name = next(names)
+        if name == "primary":
+            release.wait(timeout=10)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = name.encode()
+        return response
+
+    return send
+
+
+@pytest.mark.usefixtures("isolated_api_state")
+class TestHedging:
+    def test_timeouts(self):
+        credentials = Credentials("hedging", "api_key", "region", "firebase_uid")
+        api = API(credentials)
+        adapter = TimeoutAdapter()
+        api.session.mount("https://", adapter)
+
+        api.post("/datasets/test/documents/bulk_update", json={})
+        api.get("/datasets/test/schema")
+        assert adapter.timeouts == [TIMEOUTS["write"], TIMEOUTS["read"]]
+
+    def test_hedge(self):
+        hedger = Hedger(max_fraction=1.0, min_samples=5)
+        for _ in range(5):
+            hedger.call("/get_where", lambda: requests.Response())
+
+        release = threading.Event()
+        try:
+            response = hedger.call("/get_where", _primary_waits_for(release))
+        finally:
+            release.set()
+        assert response.content == b"hedged"
+        assert hedger.hedged == 1
+
+    def test_hedge_budget(self):
+        hedger = Hedger(max_fraction=0.0, min_samples=5)
+        for _ in range(5):
+            hedger.call("/get_where", lambda: requests.Response())
+
+        release = threading.Event()
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        response = hedger.call("/get_where", _primary_waits_for(release))
+        assert response.content == b"primary"
+        assert hedger.hedged == 0
@@ -0,0 +1,71 @@
+import json
+import pytest
+import requests
+
+from requests.adapters import BaseAdapter
+
+from ai_transform.api.api import API
+from ai_transform.api.payload import join_payload, merge_results, split_payload
+from ai_transform.errors import PayloadTooLargeError
+from ai_transform.types import Credentials
+
+
+class BulkAdapter(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.bodies = []
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        body = json.loads(request.body)
+        self.bodies.append(body)
+        response = requests.Response()
+        response.request = request
+        response.status_code = 200
+        response._content = json.dumps(
+            {"inserted": len(body["updates"]), "failed_documents": [body["updates"][0]["_id"]]}
+        ).encode()
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.mark.usefixtures("isolated_api_state")
+class TestPayload:
+    def test_split_payload(self):
+        parts = [b"x" * 10] * 10
+        ranges = list(split_payload(parts, target_bytes=35, max_bytes=100))
+        assert ranges == [(0, 3), (3, 6), (6, 9), (9, 10)]
+
+        # parts over the target are sent on their own
+        assert list(split_payload([b"x" * 50, b"x"], target_bytes=35, max_bytes=100)) == [(0, 1), (1, 2)]
+
+    def test_document_too_large(self):
+        with pytest.raises(PayloadTooLargeError, match="'big'"):
+            list(split_payload([b"x", b"x" * 200], target_bytes=35, max_bytes=100, ids=["small", "big"]))
+
+    def test_join_payload(self):
+        body = join_payload("updates", [b'{"_id":"1"}', b'{"_id":"2"}'], b'{"insert_date":true}')
+        assert json.loads(body) == {"updates": [{"_id": "1"}, {"_id": "2"}], "insert_date": True}
+        assert json.loads(join_payload("updates", [], b"{}")) == {"updates": []}
+
+    def test_merge_results(self):
+        merged = merge_results(
+            [{"inserted": 2, "failed_documents": ["a"]}, None, {"inserted": 3, "failed_documents": ["b"]}]
+        )
+        assert merged == {"inserted": 5, "failed_documents": ["a", "b"]}
+
+    def test_bulk_update_split(self):
+        credentials = Credentials("payload", "api_key", "region", "firebase_uid")
+        api = API(credentials)
+        adapter = BulkAdapter()
+        api.session.mount("https://", adapter)
+
+        documents = [{"_id": str(i), "value": "x" * 100} for i in range(10)]
+        result = api._bulk_update("test", documents, target_payload_bytes=500)
+
+        assert len(adapter.bodies) > 1
+        assert [document for body in adapter.bodies for document in body["updates"]] == documents
+        assert all(body["update_schema"] for body in adapter.bodies)
+        assert result["inserted"] == 10
+        assert result["failed_documents"] == [body["updates"][0]["_id"] for body in adapter.bodies]
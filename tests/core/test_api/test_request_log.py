@@ -0,0 +1,79 @@
+import logging
+import requests
+
+from ai_transform.api.request_log import RequestLogger, to_curl
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _request_logger(**kwargs):
+    handler = _Records()
+    logger = logging.getLogger(f"test_request_log_{id(handler)}")
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return RequestLogger(logger=logger, **kwargs), handler
+
+
+def _prepared(body: bytes = b"x" * 1000):
+    return requests.Request(
+        "POST", "https://api-region.stack.tryrelevance.com/latest/datasets/d/documents/bulk_update", data=body
+    ).prepare()
+
+
+def _response(status_code: int = 200, content: bytes = b"y" * 1000):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    return response
+
+
+class TestRequestLogger:
+    def test_disabled_does_not_format(self):
+        request_logger, handler = _request_logger(enabled=False)
+        request = _prepared()
+        request.headers = None  # formatting this request would raise
+        request_logger.log(request, _response())
+        assert handler.records == []
+
+    def test_truncates_bodies(self):
+        request_logger, handler = _request_logger(enabled=True, max_bytes=100)
+        request_logger.log(_prepared(), _response())
+        messages = [record.getMessage() for record in handler.records]
+        assert "x" * 100 + "... [900 more bytes]" in messages[0]
+        assert "x" * 101 not in messages[0]
+        assert messages[-1].startswith("Response Content: " + "y" * 100 + "... [900 more bytes]")
+
+    def test_samples_successes(self):
+        request_logger, handler = _request_logger(enabled=True, sample=10)
+        for _ in range(25):
+            request_logger.log(_prepared(), _response())
+        curls = [record for record in handler.records if record.getMessage().startswith("curl")]
+        assert len(curls) == 3
+
+    def test_errors_are_always_logged_in_full(self):
+        request_logger, handler = _request_logger(enabled=True, max_bytes=100, sample=1000)
+        request_logger.log(_prepared(), _response())
+        request_logger.log(_prepared(), _response(500))
+        request_logger.log(_prepared(), error=requests.ConnectionError("reset"))
+        failures = [record for record in handler.records if record.levelno == logging.WARNING]
+        assert sum("x" * 1000 in record.getMessage() for record in failures) == 2
+        assert any("y" * 1000 in record.getMessage() for record in failures)
+        assert any("ConnectionError" in record.getMessage() for record in failures)
+
+    def test_streamed_body_is_not_read(self):
+        request_logger, handler = _request_logger(enabled=True)
+        request_logger.log(_prepared(), _response(), stream=True)
+        assert handler.records[-1].getMessage().startswith("Response Content: <streamed>")
+
+    def test_curl_masks_authorization(self):
+        request = _prepared()
+        request.headers["Authorization"] = "secret"
+        assert "secret" not in to_curl(request)
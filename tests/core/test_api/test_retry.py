@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+import requests
+
+from ai_transform.api.retry import CircuitBreaker, RetryPolicy, endpoint_class, get_retry_policy
+from ai_transform.errors import CircuitOpenError
+
+
+def _response(status_code: int, headers: dict = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = b"{}"
+    return response
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRetryPolicy:
+    def _policy(self, clock: FakeClock, **kwargs) -> RetryPolicy:
+        return RetryPolicy(sleep=clock.sleep, clock=clock, circuit_breaker=CircuitBreaker(clock=clock), **kwargs)
+
+    def test_retry_after(self):
+        clock = FakeClock()
+        policy = self._policy(clock, max_delay=1.0)
+        responses = iter([_response(429, {"Retry-After": "7"}), _response(200)])
+
+        assert policy.call(lambda: next(responses)).status_code == 200
+        assert clock.sleeps == [7.0]
+        assert policy.metrics["retries"] == 1
+
+    def test_full_jitter(self):
+        clock = FakeClock()
+        policy = self._policy(clock, max_retries=3, base_delay=1.0)
+        assert policy.call(lambda: _response(503)).status_code == 503
+        assert len(clock.sleeps) == 3
+        assert all(0 <= delay <= 2**attempt for attempt, delay in enumerate(clock.sleeps))
+
+    def test_not_retryable(self):
+        clock = FakeClock()
+        policy = self._policy(clock)
+        assert policy.call(lambda: _response(404)).status_code == 404
+        assert clock.sleeps == []
+
+    def test_deadline(self):
+        clock = FakeClock()
+        policy = self._policy(clock, max_retries=10, deadline=5.0)
+        assert policy.call(lambda: _response(429, {"Retry-After": "10"})).status_code == 429
+        assert clock.sleeps == []
+
+    def test_connection_error(self):
+        clock = FakeClock()
+        policy = self._policy(clock, max_retries=2)
+
+        def fail():
+            raise requests.ConnectionError("down")
+
+        with pytest.raises(requests.ConnectionError):
+            policy.call(fail)
+        assert policy.metrics["attempts"] == 3
+
+    def test_circuit_breaker(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+        policy = RetryPolicy(max_retries=5, sleep=clock.sleep, clock=clock, circuit_breaker=breaker)
+
+        with pytest.raises(CircuitOpenError):
+            policy.call(lambda: _response(502))
+        assert policy.metrics["attempts"] == 2
+
+        clock.now += 10.0
+        assert policy.call(lambda: _response(200)).status_code == 200
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_trial_call_error_reopens_circuit(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=clock)
+        policy = RetryPolicy(max_retries=0, sleep=clock.sleep, clock=clock, circuit_breaker=breaker)
+        policy.call(lambda: _response(502))
+        assert breaker.state == CircuitBreaker.OPEN
+
+        def fail():
+            raise requests.exceptions.ChunkedEncodingError("truncated")
+
+        clock.now += 10.0
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            policy.call(fail)
+        assert breaker.state == CircuitBreaker.OPEN
+
+        clock.now += 10.0
+        assert policy.call(lambda: _response(200)).status_code == 200
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_policies_per_region(self):
+        suffix = "/datasets/test/documents/bulk_update"
+        us = get_retry_policy("https://api-us-east-1.stack.tryrelevance.com/latest", suffix)
+        assert us is get_retry_policy("https://api-us-east-1.stack.tryrelevance.com/latest", suffix)
+        assert us is not get_retry_policy("https://api-ap-southeast-2.stack.tryrelevance.com/latest", suffix)
+
+    def test_endpoint_class(self):
+        assert endpoint_class("/datasets/test/documents/get_where") == "read"
+        assert endpoint_class("/datasets/test/documents/bulk_update") == "write"
+        assert endpoint_class("/workflows/job/status") == "status"
+        assert endpoint_class("/datasets/create") == "default"
+
+    def test_call_async(self):
+        policy = RetryPolicy(base_delay=0.0, circuit_breaker=CircuitBreaker())
+        responses = iter([_response(503), _response(200)])
+
+        async def send():
+            return next(responses)
+
+        assert asyncio.run(policy.call_async(send)).status_code == 200
+        assert policy.metrics["retries"] == 1
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_transform.api.api import API
+from ai_transform.api.session import SessionRegistry
+from ai_transform.types import Credentials
+
+
+class TestSessionRegistry:
+    credentials = Credentials("project", "api_key", "region", "firebase_uid")
+
+    def test_shared_per_credentials(self):
+        registry = SessionRegistry()
+        session = registry.get(self.credentials)
+        assert registry.get(self.credentials._replace(firebase_uid="other")) is session
+        assert registry.get(self.credentials._replace(region="other")) is not session
+
+    def test_thread_safe(self):
+        registry = SessionRegistry()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            sessions = list(executor.map(lambda _: registry.get(self.credentials), range(64)))
+        assert all(session is sessions[0] for session in sessions)
+
+    def test_reserve(self):
+        registry = SessionRegistry(pool_maxsize=2)
+        session = registry.get(self.credentials)
+        registry.reserve(self.credentials, 8)
+        assert session.get_adapter("https://")._pool_maxsize == 8
+        registry.reserve(self.credentials, 4)
+        assert session.get_adapter("https://")._pool_maxsize == 8
+
+    def test_reserve_closes_replaced_pools(self):
+        registry = SessionRegistry(pool_maxsize=2)
+        session = registry.get(self.credentials)
+        adapter = session.get_adapter("https://")
+        adapter.poolmanager.connection_from_url("https://api-region.stack.tryrelevance.com")
+        assert len(adapter.poolmanager.pools) == 1
+
+        registry.reserve(self.credentials, 8)
+        assert session.get_adapter("https://") is not adapter
+        assert len(adapter.poolmanager.pools) == 0
+
+    def test_api_shares_session(self):
+        assert API(self.credentials).session is API(self.credentials, job_id="job_id").session
@@ -0,0 +1,40 @@
+import io
+import json
+import pytest
+import requests
+
+from ai_transform.api.streaming import DocumentStream
+from ai_transform.utils.document_list import DocumentList
+
+
+def _response(payload: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(payload)
+    return response
+
+
+class TestDocumentStream:
+    def test_stream(self, test_documents: DocumentList):
+        documents = test_documents.to_json()
+        for document in documents:
+            document["text"] = 'ünïcode, "quotes" ] and } 1e-05'
+        payload = json.dumps({"after_id": ["abc"], "documents": documents, "count": 12345}, indent=1).encode()
+
+        # a tiny chunk size splits documents, numbers and multi-byte characters
+        stream = DocumentStream(_response(payload), chunk_size=7)
+        assert stream.after_id is None
+        assert [document.to_json() for document in stream] == documents
+        assert stream.after_id == ["abc"]
+        assert stream.count == 12345
+
+    def test_batches(self):
+        payload = json.dumps({"documents": [{"_id": str(i)} for i in range(5)], "count": 5}).encode()
+        stream = DocumentStream(_response(payload))
+        assert [len(batch) for batch in stream.batches(2)] == [2, 2, 1]
+        assert stream.count == 5
+
+    def test_truncated(self):
+        stream = DocumentStream(_response(b'{"documents": [{"_id": "1"}, {"_id": '), chunk_size=4)
+        with pytest.raises(json.JSONDecodeError):
+            list(stream)
@@ -0,0 +1,17 @@
+from ai_transform.bench.engines import ENGINES, compare, run
+
+
+class TestEngineBench:
+    def test_run(self):
+        results = run(isolate=False, num_documents=50, vector_dim=8, chunk_depth=1, pull_chunksize=20)
+        assert [result["engine"] for result in results] == ENGINES
+        for result in results:
+            assert result["docs_per_sec"] > 0
+            assert result["requests"] > 0
+            assert set(result["phases"]) == {"pull", "transform", "push", "other"}
+
+    def test_compare(self):
+        baseline = [{"engine": "stable", "docs_per_sec": 100.0}, {"engine": "multipass", "docs_per_sec": 100.0}]
+        results = [{"engine": "stable", "docs_per_sec": 90.0}, {"engine": "multipass", "docs_per_sec": 50.0}]
+        assert compare(results, baseline, threshold=0.8) == ["multipass"]
+        assert results[0]["baseline_ratio"] == 0.9
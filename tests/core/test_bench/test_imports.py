@@ -0,0 +1,29 @@
+from ai_transform.bench.imports import HEAVY_MODULES, check, measure, parse_importtime
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 | sys
+import time:       300 |        300 |     base64
+import time:       200 |        500 |   ai_transform.utils.encode_parameters
+import time:       400 |        400 |   ai_transform.utils.document
+import time:       800 |       1700 | ai_transform.utils
+"""
+
+
+class TestImportBench:
+    def test_parse_importtime(self):
+        imports = parse_importtime(IMPORTTIME)
+        assert imports[0] == ("sys", 100, 0)
+        assert imports[1] == ("base64", 300, 2)
+        assert imports[-1] == ("ai_transform.utils", 1700, 0)
+
+    def test_no_heavy_imports(self):
+        result = measure("ai_transform.workflow")
+        assert result["heavy"] == []
+        assert "ai_transform.dataset.dataset" in result["slowest"]
+        assert check({"ai_transform.workflow": result}) == []
+
+    def test_check(self):
+        results = {"a": {"seconds": 0.5, "heavy": ["pandas"]}, "b": {"seconds": 0.1, "heavy": []}}
+        failures = check(results, max_seconds=0.2)
+        assert failures == ["a: imports pandas", "a: 500ms > 200ms"]
+        assert "pandas" in HEAVY_MODULES
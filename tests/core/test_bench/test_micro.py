@@ -0,0 +1,32 @@
+import json
+
+from ai_transform.bench.micro import BASELINE_PATH, SHAPES, cases, compare
+
+
+class TestMicroBench:
+    def test_cases(self):
+        benchmarks = cases()
+        for shape in SHAPES:
+            assert f"diff/{shape}" in benchmarks
+        for func in benchmarks.values():
+            func()
+
+    def test_baseline_covers_cases(self):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)["results"]
+        assert set(baseline) == set(cases())
+        assert all("relative" in result for result in baseline.values())
+
+    def test_compare(self):
+        baseline = {
+            "a": {"ops_per_sec": 100.0, "relative": 0.1, "peak_bytes": 1000},
+            "b": {"ops_per_sec": 100.0, "relative": 0.1, "peak_bytes": 1000},
+        }
+        results = {
+            # slower, but so was the reference op, i.e. a slower machine
+            "a": {"ops_per_sec": 50.0, "relative": 0.1, "peak_bytes": 1200},
+            "b": {"ops_per_sec": 100.0, "relative": 0.05, "peak_bytes": 4000},
+        }
+        regressions = compare(results, baseline, threshold=0.25)
+        assert len(regressions) == 2
+        assert all(regression.startswith("b:") for regression in regressions)
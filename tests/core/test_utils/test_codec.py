@@ -0,0 +1,33 @@
+import pytest
+
+from ai_transform.utils.codec import CODECS, JSONCodec
+from ai_transform.utils.document_list import DocumentList
+
+
+def _codecs():
+    codecs = []
+    for codec_type in CODECS.values():
+        try:
+            codecs.append(codec_type())
+        except ImportError:
+            continue
+    return codecs
+
+
+class TestCodec:
+    @pytest.mark.parametrize("codec", _codecs(), ids=lambda codec: codec.name)
+    def test_identical_bytes(self, codec, test_documents: DocumentList):
+        payload = {
+            "documents": test_documents,
+            "floats": [1e-05, -1.5e-05, 1e16, 1e-07, float("nan")],
+            "text": 'x,1e-05,"[1e+16]"\\',
+            "big": 2**70,
+            "keys": {None: 1, True: 2, False: 3, 1.5: 4, 1e-05: 5, 2: 6},
+        }
+        expected = JSONCodec().encode(payload)
+        assert codec.encode(payload) == expected
+        assert codec.decode(expected) == JSONCodec().decode(expected)
+
+    @pytest.mark.parametrize("codec", _codecs(), ids=lambda codec: codec.name)
+    def test_decode_nan(self, codec):
+        assert codec.decode(b'{"value": NaN}')["value"] != 0
@@ -0,0 +1,85 @@
+import json
+import numpy as np
+
+from copy import deepcopy
+
+from ai_transform.utils.document import Document
+from ai_transform.utils.document_list import DocumentList
+from ai_transform.utils.columnar import ColumnarDocumentList
+
+
+class TestColumnarDocumentList:
+    def test_roundtrip(self, test_documents: DocumentList):
+        expected = test_documents.to_json()
+        documents = test_documents.to_columnar()
+        assert "sample_1_vector_" in documents.columns
+        assert "sample_1_value" in documents.columns
+        assert "_id" not in documents.columns
+
+        # vectors are stored as float32
+        actual = json.loads(json.dumps(documents.to_json()))
+        for old, new in zip(expected, actual):
+            assert old["_id"] == new["_id"]
+            assert old["sample_1_value"] == new["sample_1_value"]
+            assert np.allclose(old["sample_1_vector_"], new["sample_1_vector_"])
+            assert old["_chunk_"] == new["_chunk_"]
+
+    def test_column_is_a_view(self, test_documents: DocumentList):
+        documents = test_documents.to_columnar(["sample_1_vector_"])
+        vectors = documents.column("sample_1_vector_")
+        assert vectors.shape == (len(test_documents), 5)
+        assert vectors.dtype == np.float32
+
+        vectors[0, 0] = 10
+        assert documents[0]["sample_1_vector_"][0] == 10
+        assert documents.column("sample_1_vector_") is vectors
+
+    def test_document_writes(self, test_documents: DocumentList):
+        documents = test_documents.to_columnar(["sample_1_value", "sample_1_label"])
+        document = documents[3]
+        assert isinstance(document, Document)
+
+        document["sample_1_value"] = 1000
+        document["sample_1_label"] = "new_label"
+        assert documents.column("sample_1_value")[3] == 1000
+        codes = documents.column("sample_1_label")
+        assert documents.categories("sample_1_label")[codes[3]] == "new_label"
+
+    def test_nested_and_missing(self):
+        raw = [{"_id": str(i), "_cluster_": {"vec": {"default": f"cluster_{i % 2}"}}} for i in range(4)]
+        raw.append({"_id": "4"})
+        documents = ColumnarDocumentList(raw, columns=["_cluster_.vec.default"])
+
+        codes = documents.column("_cluster_.vec.default")
+        assert codes.tolist() == [0, 1, 0, 1, -1]
+        assert documents.categories("_cluster_.vec.default") == ["cluster_0", "cluster_1"]
+        assert documents.to_json() == raw
+        # the original documents are left untouched
+        assert raw[0]["_cluster_"]["vec"]["default"] == "cluster_0"
+
+    def test_slices(self, test_documents: DocumentList):
+        documents = test_documents.to_columnar(["sample_1_vector_"])
+        batch = documents[10:20]
+        assert isinstance(batch, ColumnarDocumentList)
+        assert np.shares_memory(batch.column("sample_1_vector_"), documents.column("sample_1_vector_"))
+
+        batch[0]["sample_1_label"] = "changed"
+        assert documents[10]["sample_1_label"] == "changed"
+
+        copy = deepcopy(batch)
+        copy.column("sample_1_vector_")[0, 0] = -1
+        assert documents.column("sample_1_vector_")[10, 0] != -1
+
+    def test_set_column(self, test_documents: DocumentList):
+        documents = test_documents.to_columnar([])
+        embeddings = np.random.random((len(documents), 3)).astype(np.float32)
+        documents.set_column("embedding_vector_", embeddings)
+        assert documents.column("embedding_vector_") is embeddings
+        assert np.allclose(documents[0]["embedding_vector_"], embeddings[0])
+
+    def test_structural_changes(self, test_documents: DocumentList):
+        documents = test_documents.to_columnar(["sample_1_value"])
+        values = documents["sample_1_value"]
+        documents.append(Document({"sample_1_value": -1}))
+        assert documents.columns == []
+        assert documents["sample_1_value"] == values + [-1]
@@ -1,4 +1,7 @@
-from copy import deepcopy
+import json
+import pickle
+
+from copy import copy, deepcopy
 
 from ai_transform.utils.document import Document
 
@@ -84,6 +87,22 @@ class TestDocument:
             },
         }
 
+    def test_split_find_offsets(self):
+        doc = Document({"text": "* a. b? * a."})
+        doc.split(lambda text: ["* a.", "b?", "* a."], chunk_field="_chunk_", field="text", offset_mode="find")
+        assert [chunk["_offsets_"] for chunk in doc["_chunk_"]] == [
+            [{"start": 0, "end": 4}],
+            [{"start": 5, "end": 7}],
+            [{"start": 8, "end": 12}],
+        ]
+
+        def split_with_spans(text):
+            return [("* a.", 0, 4), ("b?", 5, 7)]
+
+        doc.split(split_with_spans, chunk_field="_chunk_", field="text")
+        assert doc["_chunk_"]["text"] == ["* a.", "b?"]
+        assert doc["_chunk_.1._offsets_"] == [{"start": 5, "end": 7}]
+
     def test_numeric_keys(self):
         doc = Document()
         doc["123"] = "asdf"
@@ -101,3 +120,84 @@ class TestDocument:
         doc["123.days"] = []
         doc["123.days"].append(0)
         assert doc["123.days.0"] == 0
+
+    def test_contains_nested(self):
+        doc = Document({"a": {"b": [{"c": 1}, 2]}, "d": []})
+        assert "a.b" in doc
+        assert "a.b.0" in doc
+        assert "a.b.0.c" in doc
+        assert "a.b.1" not in doc
+        assert "a.b.2" not in doc
+        assert "a.c" not in doc
+        assert "d.0" not in doc
+        assert all(key in doc for key in doc.keys())
+
+    def test_keys_after_mutation(self):
+        doc = Document({"a": {"b": 1}})
+        assert doc.keys() == ["a", "a.b"]
+
+        doc["c"] = 2
+        assert doc.keys() == ["a", "a.b", "c"]
+
+        doc["a"]["e"] = 3
+        assert doc.keys() == ["a", "a.b", "a.e", "c"]
+
+        del doc["a.b"]
+        assert doc.keys() == ["a", "a.e", "c"]
+
+        for value in doc.values():
+            if isinstance(value, dict):
+                value["f"] = 4
+        assert doc.keys() == ["a", "a.e", "a.f", "c"]
+
+        doc.copy()["a"]["g"] = 5
+        assert "a.g" in doc.keys()
+
+    def test_keys_index(self, monkeypatch):
+        builds = []
+        build_keys = Document._build_keys
+        monkeypatch.setattr(Document, "_build_keys", lambda self: builds.append(self) or build_keys(self))
+
+        doc = Document({"a": {"b": 1}, "c": 2, "d": 3})
+        doc.keys()
+        doc.keys()
+        assert len(builds) == 1
+
+        writes = [
+            lambda: doc.__setitem__("e", 4),
+            lambda: doc.update({"f.g": 5}),
+            lambda: doc.pop("c"),
+            lambda: doc.setdefault("h", 6),
+            lambda: doc.__delitem__("d"),
+        ]
+        for write in writes:
+            write()
+            doc.keys()
+        assert len(builds) == 6
+        assert doc.keys() == ["a", "a.b", "e", "f", "f.g", "h"]
+
+        # a nested dict handed out before keys() may change afterwards
+        nested = doc["a"]
+        doc.keys()
+        nested["i"] = 7
+        assert doc.keys() == ["a", "a.b", "a.i", "e", "f", "f.g", "h"]
+
+    def test_has_multiple_keys(self):
+        for raw in [{}, {"_id": "1"}, {"a": {}}, {"a": []}, {"_id": "1", "b": 2}, {"a": {"b": 1}}, {"a": [{}]}]:
+            doc = Document(raw)
+            assert doc.has_multiple_keys() == (len(doc.keys()) > 1)
+
+    def test_dict_subclass(self, test_document: Document):
+        assert isinstance(test_document, dict)
+        assert json.dumps(test_document) == '{"field1": {"field2": 1}, "field3": 3}'
+        assert pickle.loads(pickle.dumps(test_document)) == test_document
+        assert type(copy(test_document)) is Document
+        assert not hasattr(test_document, "__dict__")
+
+    def test_dotted_init(self):
+        doc = Document({"a.b": 1, "c": 2})
+        assert doc == {"a": {"b": 1}, "c": 2}
+        assert doc.pop("a.b") == 1
+        assert doc.pop("a.b", None) is None
+        assert doc.setdefault("d.e", 3) == 3
+        assert doc["d"] == {"e": 3}
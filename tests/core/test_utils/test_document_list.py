@@ -1,7 +1,9 @@
 import json
+import pytest
 import random
 import string
 from copy import deepcopy
+from ai_transform.utils.document import Document
 from ai_transform.utils.document_list import DocumentList
 
 
@@ -64,3 +66,73 @@ class TestDocumentChunkOperations:
         test_documents.set_chunk_values("_chunk_", "_cluster_id_.default", chunk_values)
         for i, document in enumerate(test_documents):
             assert document["_chunk_.0._cluster_id_.default"] == i
+
+    def test_flatten_chunks(self):
+        documents = DocumentList(
+            [
+                {"_chunk_": [{"vector": [1.0, 2.0]}, {"vector": [3.0, 4.0]}]},
+                {"_chunk_": []},
+                {"_chunk_": [{"vector": [5.0, 6.0]}]},
+            ]
+        )
+        vectors, offsets = documents.flatten_chunks("_chunk_", "vector")
+        assert offsets.tolist() == [0, 2, 2, 3]
+        assert vectors.shape == (3, 2)
+
+        documents.unflatten_chunks("_chunk_", "label.default", vectors[:, 0] * 2, offsets)
+        assert documents[0]["_chunk_.1.label.default"] == 6.0
+        assert documents.get_chunks_as_flat("_chunk_", "label.default") == [2.0, 6.0, 10.0]
+        assert list(documents.split_by_chunk("_chunk_", ["a", "b", "c"])) == [["a", "b"], [], ["c"]]
+
+        with pytest.raises(ValueError):
+            documents.unflatten_chunks("_chunk_", "label", [1])
+
+    def test_set_chunks_from_flat(self):
+        documents = DocumentList([{"_chunk_": [{"text": "a"}, {"text": "b"}]}, {"text": "no chunks"}])
+        # extra values are ignored, as they always were
+        documents.set_chunks_from_flat("_chunk_", "label", ["x", "y", "z"])
+        assert documents.get_chunks_as_flat("_chunk_", "label") == ["x", "y"]
+        assert documents[1]["_chunk_"] == []
+
+        with pytest.raises(ValueError):
+            documents.set_chunks_from_flat("_chunk_", "label", ["x"])
+
+    def test_unflatten_chunks_is_strict(self):
+        documents = DocumentList([{"_chunk_": [{"text": "a"}]}, {"text": "no chunks"}])
+        with pytest.raises(ValueError):
+            documents.unflatten_chunks("_chunk_", "label", ["x", "y"])
+
+        documents.unflatten_chunks("_chunk_", "label", ["x"])
+        assert documents[0]["_chunk_"] == [{"text": "a", "label": "x"}]
+        assert "_chunk_" not in documents[1]
+
+    def test_set_chunk_values_sortby(self):
+        documents = DocumentList([{"_chunk_": [{"_order_": 1}, {"_order_": 0}]}])
+        documents.set_chunk_values("_chunk_", "label", [["first", "second"]])
+        assert documents[0]["_chunk_"] == [{"_order_": 1, "label": "second"}, {"_order_": 0, "label": "first"}]
+
+    def test_lazy_wrapping(self):
+        raw = [{"field1": {"field2": i}} for i in range(3)]
+        documents = DocumentList(raw)
+        assert all(type(document) is dict for document in raw)
+        assert all(type(document) is dict for document in documents.data)
+
+        documents[1]["field3"] = 1
+        assert isinstance(documents.data[1], Document)
+        assert documents[1]["field3"] == 1
+        assert documents["field1.field2"] == [0, 1, 2]
+        assert all(isinstance(document, Document) for document in documents)
+
+    def test_slice_shares_documents(self):
+        documents = DocumentList([{"field1": i} for i in range(4)])
+        documents[1:3][0]["field2"] = 1
+        assert documents[1]["field2"] == 1
+        assert documents[1:3][1] is documents[2]
+
+    def test_numeric_chunk_field(self):
+        documents = DocumentList([{"_chunk_": [{"0": "a", "_order_": 0}, {"0": "b", "_order_": 1}]}])
+        assert documents.get_chunks_as_flat("_chunk_", "0") == ["a", "b"]
+
+        documents.set_chunk_values("_chunk_", "1", [["c", "d"]])
+        assert documents.get_chunks_as_flat("_chunk_", "1") == ["c", "d"]
+        assert [Document(chunk)["1"] for chunk in documents[0]["_chunk_"]] == ["c", "d"]
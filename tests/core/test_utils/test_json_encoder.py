@@ -1,5 +1,11 @@
+import numpy as np
 import pandas as pd
 
+from collections import OrderedDict
+from enum import Enum
+
+from ai_transform.bench.encoder import legacy_json_encoder
+from ai_transform.utils.document_list import DocumentList
 from ai_transform.utils.json_encoder import json_encoder
 
 
@@ -39,3 +45,24 @@ class TestJSONEncoder:
         my_df = pd.read_json(my_json_data)
         json_encoder(my_df.to_dict("records"))
         assert True
+
+    def test_json_encoder_numpy(self):
+        encoded = json_encoder(
+            {"vector": np.array([1.0, np.nan], dtype=np.float32), "count": np.int64(3), "flag": np.bool_(True)}
+        )
+        assert encoded == {"vector": [1.0, None], "count": 3, "flag": True}
+        assert type(encoded["count"]) is int
+        assert json_encoder(np.float32(np.nan)) is None
+        assert json_encoder(np.array([["a", "b"]])) == [["a", "b"]]
+
+    def test_json_encoder_matches_legacy(self, test_documents: DocumentList):
+        assert json_encoder(test_documents) == legacy_json_encoder(test_documents)
+
+    def test_json_encoder_subclass(self):
+        class Label(str, Enum):
+            A = "a"
+
+        assert json_encoder({"label": Label.A, "ordered": OrderedDict(x=(1, 2))}) == {
+            "label": "a",
+            "ordered": {"x": [1, 2]},
+        }
@@ -1,4 +1,4 @@
-from ai_transform.logger import Logger
+from ai_transform.logger import Logger, ic, summarize
 from ai_transform.utils.example_documents import mock_documents
 
 
@@ -13,3 +13,28 @@ class TestLogger:
 
         logger(documents[0])
         logger(documents[0], no_vectors=True)
+
+    def test_summarize(self):
+        result = {
+            "inserted": 500,
+            "failed_documents": [{"_id": str(i), "text_vector_": [0.1] * 768} for i in range(500)],
+            "message": "m" * 1000,
+        }
+        summary = summarize(result)
+        assert summary["inserted"] == 500
+        assert len(summary["failed_documents"]) == 11
+        assert summary["failed_documents"][0]["text_vector_"] == "<vector of 768>"
+        assert summary["failed_documents"][-1] == "... 490 more items"
+        assert len(summary["message"]) < 250
+
+    def test_ic_reports_the_caller(self):
+        outputs = []
+        output_function = ic.outputFunction
+        ic.configureOutput(outputFunction=outputs.append)
+        try:
+            value = 1
+            assert ic(value) == 1
+        finally:
+            ic.configureOutput(outputFunction=output_function)
+        assert "test_logger.py" in outputs[0]
+        assert "value: 1" in outputs[0]
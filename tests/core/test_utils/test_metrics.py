@@ -0,0 +1,76 @@
+import pytest
+
+from ai_transform.api.api import API
+from ai_transform.api.emulator import mount_emulator
+from ai_transform.dataset.dataset import Dataset
+from ai_transform.engine.stable_engine import StableEngine
+from ai_transform.metrics import API_REQUESTS, API_RESPONSE_BYTES, ENGINE_DOCUMENTS, MetricsRegistry, endpoint_name
+from ai_transform.operator.abstract_operator import AbstractOperator
+from ai_transform.types import Credentials
+from ai_transform.utils.example_documents import static_documents
+
+
+class FailingOperator(AbstractOperator):
+    def transform(self, documents):
+        if any(document["numeric_field"] == 0 for document in documents):
+            raise ValueError("bad batch")
+        for document in documents:
+            document["output_field"] = 1
+        return documents
+
+
+class TestMetricsRegistry:
+    def test_counter_and_histogram(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Requests", ["endpoint"])
+        counter.inc(endpoint="/a")
+        counter.inc(2, endpoint='/b"')
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=[0.1, 1.0])
+        for value in [0.05, 0.5, 5.0]:
+            histogram.observe(value)
+
+        assert registry.counter("requests_total", "Requests", ["endpoint"]) is counter
+        assert counter.value(endpoint='/b"') == 2
+
+        exported = registry.to_json()
+        assert exported["latency_seconds"]["samples"] == [
+            {"labels": {}, "buckets": {"0.1": 1, "1": 1, "+Inf": 1}, "sum": 5.55, "count": 3}
+        ]
+
+        text = registry.to_prometheus()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{endpoint="/b\\""} 2' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_count 3" in text
+
+    def test_endpoint_name(self):
+        assert endpoint_name("/datasets/abc/documents/get_where") == "/datasets/{dataset_id}/documents/get_where"
+        assert endpoint_name("/datasets/list") == "/datasets/list"
+        assert endpoint_name("/workflows/job-1/status") == "/workflows/{job_id}/status"
+        assert (
+            endpoint_name("/datasets/abc/field_children/123/update")
+            == "/datasets/{dataset_id}/field_children/{fieldchildren_id}/update"
+        )
+
+
+@pytest.mark.usefixtures("isolated_api_state")
+class TestRecordedMetrics:
+    def test_api_and_engine(self):
+        api = API(Credentials("metrics", "api_key", "region", "firebase_uid"))
+        mount_emulator(api)
+        dataset = Dataset(api, "metrics_dataset")
+        dataset.insert_documents(static_documents(30))
+
+        endpoint = "/datasets/{dataset_id}/documents/get_where"
+        requests_before = API_REQUESTS.value(method="POST", endpoint=endpoint, status="200")
+        bytes_before = API_RESPONSE_BYTES.value(endpoint=endpoint)
+
+        engine = StableEngine(dataset=dataset, operator=FailingOperator(), pull_chunksize=10, show_progress_bar=False)
+        engine.apply()
+
+        assert API_REQUESTS.value(method="POST", endpoint=endpoint, status="200") > requests_before
+        assert API_RESPONSE_BYTES.value(endpoint=endpoint) > bytes_before
+        assert ENGINE_DOCUMENTS.value(engine="StableEngine", stage="pulled") >= 30
+        assert ENGINE_DOCUMENTS.value(engine="StableEngine", stage="failed") >= 1
+        assert ENGINE_DOCUMENTS.value(engine="StableEngine", stage="upserted") >= 1
@@ -0,0 +1,64 @@
+import json
+import uuid
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from ai_transform.utils.document import Document
+from ai_transform.utils.document_list import DocumentList
+from ai_transform.utils.columnar import ColumnarDocumentList
+from ai_transform.utils.json_encoder import json_encoder
+from ai_transform.utils.serializer import serialize, serialize_iter
+
+
+class TestSerializer:
+    def test_matches_to_json(self, test_documents: DocumentList):
+        payload = {"documents": test_documents}
+        assert json.loads(serialize(payload)) == {"documents": test_documents.to_json()}
+
+    def test_nan_to_null(self):
+        document = Document({"value": float("nan"), "vector": [1.0, float("inf")], "nested": {"value": 0.5}})
+        assert serialize(document) == b'{"value":null,"vector":[1.0,null],"nested":{"value":0.5}}'
+
+    def test_non_finite_same_as_json_encoder(self):
+        document = Document(
+            {"values": [float("nan"), float("inf"), -float("inf")], "array": np.array([np.inf, 1.0]), "value": np.inf}
+        )
+        assert json.loads(serialize(document)) == json_encoder(document)
+        assert json_encoder(document) == {"values": [None, None, None], "array": [None, 1.0], "value": None}
+
+    def test_serialize_iter(self, test_documents: DocumentList):
+        payload = {"documents": test_documents, "vector": [0.5, 1e-05], "empty": []}
+        pieces = list(serialize_iter(payload))
+        assert len(pieces) > len(test_documents)
+        assert "".join(pieces).encode("utf-8") == serialize(payload)
+
+    def test_types(self):
+        identifier = uuid.uuid4()
+        date = datetime.datetime(2023, 1, 2, 3, 4, 5)
+        payload = {"id": identifier, "date": date, "tags": {"a"}, identifier: 1, "text": "é"}
+        assert json.loads(serialize(payload)) == {
+            "id": str(identifier),
+            "date": date.isoformat(),
+            "tags": ["a"],
+            str(identifier): 1,
+            "text": "é",
+        }
+
+    def test_numpy(self):
+        payload = {"vector": np.array([1.0, np.nan], dtype=np.float32), "count": np.int64(3)}
+        assert json.loads(serialize(payload)) == {"vector": [1.0, None], "count": 3}
+
+    def test_columnar(self, test_documents: DocumentList):
+        columnar = ColumnarDocumentList(test_documents.to_json())
+        assert json.loads(serialize(columnar)) == columnar.to_json()
+
+    def test_float_format(self):
+        payload = {"floats": [1e-05, -1.5e-05, 1e16, 1e-07, 0.1], "text": "1e-05,1e+16"}
+        assert serialize(payload) == b'{"floats":[0.00001,-0.000015,1e16,1e-7,0.1],"text":"1e-05,1e+16"}'
+        assert serialize({"text": 'a "1e-05" b', "value": 1e-05}) == b'{"text":"a \\"1e-05\\" b","value":0.00001}'
+
+    def test_same_conversions_as_to_json(self):
+        document = Document({"timestamp": pd.Timestamp("2023-01-02"), "nested": {"vector": np.zeros(2)}})
+        assert json.loads(serialize(document)) == document.to_json()
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from ai_transform.utils.document_list import DocumentList
+from ai_transform.utils.synthetic import BLOCK_SIZE, SyntheticDocuments
+
+
+class TestSyntheticDocuments:
+    def test_batches(self):
+        synthetic = SyntheticDocuments(BLOCK_SIZE + 10, vector_dim=4)
+        batches = list(synthetic.batches(batch_size=500))
+        assert [len(batch) for batch in batches] == [500, 500, 34]
+        assert all(isinstance(batch, DocumentList) for batch in batches)
+        assert len(batches[0][0]["vector_0_vector_"]) == 4
+
+    def test_reproducible_across_batch_sizes(self):
+        synthetic = SyntheticDocuments(BLOCK_SIZE + 10, seed=3, chunk_length=(0, 3), max_tags=4)
+        documents = list(synthetic)
+        assert [dict(document) for batch in synthetic.batches(333) for document in batch] == documents
+        assert list(SyntheticDocuments(BLOCK_SIZE + 10, seed=3, chunk_length=(0, 3), max_tags=4)) == documents
+        assert list(SyntheticDocuments(BLOCK_SIZE + 10, seed=4, chunk_length=(0, 3), max_tags=4)) != documents
+
+    def test_shape(self):
+        synthetic = SyntheticDocuments(
+            200,
+            text_fields=2,
+            numeric_fields=3,
+            vector_fields=2,
+            text_length=(2, 6),
+            text_length_distribution="lognormal",
+            chunk_length=(1, 3),
+            max_tags=2,
+        )
+        for document in synthetic:
+            assert {"text_0", "text_1", "numeric_2", "vector_1_vector_"} <= set(document)
+            assert 2 <= len(document["text_0"].split()) <= 6
+            assert 1 <= len(document["_chunk_"]) <= 3
+            assert [chunk["_order_"] for chunk in document["_chunk_"]] == list(range(len(document["_chunk_"])))
+            assert len(document["_surveytag_"]["text_1"]) <= 2
+
+    def test_to_jsonl(self, tmp_path):
+        synthetic = SyntheticDocuments(50, vector_dim=2)
+        synthetic.to_jsonl(tmp_path / "documents.jsonl")
+        with open(tmp_path / "documents.jsonl") as f:
+            assert [json.loads(line)["_id"] for line in f] == [document["_id"] for document in synthetic]
+
+    def test_to_parquet(self, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        synthetic = SyntheticDocuments(50, vector_dim=2, chunk_length=(1, 2))
+        synthetic.to_parquet(tmp_path / "documents.parquet", row_group_size=20)
+        assert pq.read_table(tmp_path / "documents.parquet").num_rows == 50
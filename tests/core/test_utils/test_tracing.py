@@ -0,0 +1,100 @@
+import json
+import pytest
+import requests
+
+from ai_transform.api.api import API
+from ai_transform.api.emulator import mount_emulator
+from ai_transform.dataset.dataset import Dataset
+from ai_transform.engine.stable_engine import StableEngine
+from ai_transform.operator.abstract_operator import AbstractOperator
+from ai_transform.timer import Timer
+from ai_transform.tracing import TRACER, Tracer
+from ai_transform.types import Credentials
+from ai_transform.utils.example_documents import static_documents
+from ai_transform.workflow.context_manager import WorkflowContextManager
+
+
+class CopyOperator(AbstractOperator):
+    def transform(self, documents):
+        for document in documents:
+            document["copied_field"] = document["text_field"]
+        return documents
+
+
+@pytest.mark.usefixtures("isolated_api_state")
+class TestTracer:
+    def test_disabled(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span("outer"):
+            pass
+        tracer.complete("manual", 0.0, 1.0)
+        assert tracer.to_chrome_trace()["traceEvents"] == []
+
+    def test_chrome_trace(self, tmp_path):
+        tracer = Tracer(enabled=True, max_events=2)
+        with tracer.span("outer", cat="test", size=3):
+            with tracer.span("inner"):
+                pass
+        tracer.complete("dropped", 0.0, 1.0)
+
+        trace = tracer.to_chrome_trace()
+        metadata, inner, outer = trace["traceEvents"]
+        assert metadata["ph"] == "M"
+        assert (inner["name"], outer["name"]) == ("inner", "outer")
+        assert outer["args"] == {"size": 3} and outer["cat"] == "test"
+        assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+        assert trace["otherData"]["dropped"] == 1
+
+        path = tracer.write(str(tmp_path / "trace_{pid}.json"))
+        with open(path) as f:
+            assert json.load(f) == json.loads(json.dumps(trace))
+
+    def test_engine_spans(self, monkeypatch):
+        monkeypatch.setattr(TRACER, "enabled", True)
+        TRACER.clear()
+
+        api = API(Credentials("tracing", "api_key", "region", "firebase_uid"))
+        mount_emulator(api)
+        dataset = Dataset(api, "tracing_dataset")
+        dataset.insert_documents(static_documents(20))
+        StableEngine(dataset=dataset, operator=CopyOperator(), pull_chunksize=10, show_progress_bar=False)()
+
+        names = {event["name"] for event in TRACER.to_chrome_trace()["traceEvents"]}
+        TRACER.clear()
+        assert {"StableEngine", "pull", "CopyOperator", "transform", "diff", "upload", "serialize"} <= names
+        assert "POST /datasets/{dataset_id}/documents/get_where" in names
+
+    @pytest.mark.parametrize("failing_status", [WorkflowContextManager.IN_PROGRESS, WorkflowContextManager.COMPLETE])
+    def test_workflow_span_when_status_fails(self, monkeypatch, failing_status):
+        monkeypatch.setattr(TRACER, "enabled", True)
+        writes = []
+        monkeypatch.setattr(TRACER, "write", lambda path=None: writes.append(path))
+        TRACER.clear()
+
+        def set_workflow_status(self, status, **kwargs):
+            if status == failing_status:
+                raise requests.ConnectionError("down")
+
+        monkeypatch.setattr(API, "_set_workflow_status", set_workflow_status)
+        monkeypatch.setattr(API, "_update_workflow_pricing", lambda self, **kwargs: None)
+
+        credentials = Credentials("tracing", "api_key", "region", "firebase_uid")
+        with pytest.raises(requests.ConnectionError):
+            with WorkflowContextManager("workflow", "job_id", credentials=credentials) as workflow:
+                workflow.set_workflow_pricing(1)
+
+        names = [event["name"] for event in TRACER.to_chrome_trace()["traceEvents"]]
+        TRACER.clear()
+        assert names.count("WorkflowContextManager") == 1
+        assert len(writes) == 1
+
+    def test_timer(self, monkeypatch):
+        monkeypatch.setattr(TRACER, "enabled", True)
+        monkeypatch.setenv("_WORKFLOW_START_TIME", "100.0")
+        monkeypatch.delenv("_WORKFLOW_FINISH_TIME", raising=False)
+        TRACER.clear()
+
+        assert Timer().stop() > 0
+        [event] = [event for event in TRACER.to_chrome_trace()["traceEvents"] if event["ph"] == "X"]
+        TRACER.clear()
+        assert event["name"] == "workflow" and event["ts"] == 100.0 * 1e6